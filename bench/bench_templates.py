@@ -0,0 +1,163 @@
+# bench/bench_templates.py
+# Microbenchmark: template renderers vs the f-string renderers they replaced, on large scenarios.
+#
+#   python bench/bench_templates.py [--steps 10000] [--repeat 20]
+#
+# Needs the servers' requirements installed (the server modules are imported to get the real renderers). The
+# legacy renderers below are frozen copies, kept only as the baseline. They do not escape values, so the inputs
+# are plain ASCII and both sides must produce the same code; the template side still pays for escaping every value.
+# The only later edit: UI steps address page-object fields as page.<field>, as the generator now does.
+import argparse, statistics, time
+from common import load_server
+
+# {i} makes typed/asserted values unique per step, so the escape memo is not flattered by a 9-step cycle
+ACTIONS = [("open", None, "https://example.test/login"), ("type", "username", "alice{i}"), ("click", "submit", None),
+           ("assertText", "banner", "Welcome alice{i}"), ("select", "country", "Norway"), ("hover", "menu", None),
+           ("wait", None, "250"), ("waitFor", "results", None), ("scroll", None, "300")]
+
+
+def make_steps(n: int) -> list[dict]:
+    steps = []
+    for i in range(n):
+        a, t, v = ACTIONS[i % len(ACTIONS)]
+        steps.append({"action": a, "target": t, "value": v and v.format(i=i)})
+    return steps
+
+
+def legacy_render_spec(scenario, steps):
+    scenario = (scenario or "Generated scenario").replace("'", "\\'")
+    body_lines = []
+    for s in steps:
+        a = (s.get("action") or "").lower()
+        tgt = s.get("target")
+        val = s.get("value")
+        if a == "open" and val:
+            body_lines.append(f'await page.goto("{val}");')
+        elif a == "click" and tgt:
+            body_lines.append(f'await page.click("#{tgt}");')
+        elif a == "type" and tgt and val is not None:
+            body_lines.append(f'await page.fill("#{tgt}", "{val}");')
+        elif a == "asserttext" and tgt and val is not None:
+            body_lines.append(f'await expect(page.locator("#{tgt}")).toContainText("{val}");')
+        elif a == "select" and tgt and val is not None:
+            body_lines.append(f'await page.selectOption("#{tgt}", "{val}");')
+        elif a == "hover" and tgt:
+            body_lines.append(f'await page.hover("#{tgt}");')
+        elif a == "wait" and val:
+            body_lines.append(f'await page.waitForTimeout({int(val)});')
+        elif a == "waitfor" and tgt:
+            body_lines.append(f'await page.locator("#{tgt}").waitFor();')
+        else:
+            body_lines.append(f'// TODO: unsupported step: {s}')
+    body = "\n  ".join(body_lines) or "// TODO: derive concrete steps from scenario"
+    return f"""import {{ test, expect }} from '@playwright/test';
+
+    test('{scenario}', async ({{ page }}) => {{
+      {body}
+    }});
+    """
+
+
+def legacy_render_ui_test(input) -> str:
+    imports = "\n".join([f"import {imp};" for imp in input.imports])
+    groups = ""
+    if input.testGroups:
+        gs = ", ".join([f'"{g}"' for g in input.testGroups])
+        groups = f"(groups = {{ {gs} }})"
+    body_lines = []
+    if input.pageObjectFqn:
+        _, po_cls = input.pageObjectFqn.rsplit('.', 1)
+        body_lines.append(f"{po_cls} page = new {po_cls}(driver);")
+    for s in input.steps:
+        a = (s.action or "").lower()
+        if a == "open" and s.value:
+            body_lines.append(f'driver.get("{s.value}");')
+        elif a == "click" and s.target:
+            body_lines.append(f'page.{s.target}.click();')
+        elif a == "type" and s.target and s.value is not None:
+            body_lines.append(f'page.{s.target}.clear(); page.{s.target}.sendKeys("{s.value}");')
+        elif a == "asserttext" and s.value and s.target:
+            body_lines.append(f'org.testng.Assert.assertTrue(page.{s.target}.getText().contains("{s.value}"));')
+        elif a == "select" and s.target and s.value is not None:
+            body_lines.append(f'new org.openqa.selenium.support.ui.Select(page.{s.target}).selectByVisibleText("{s.value}");')
+        elif a == "hover" and s.target:
+            body_lines.append(f'new org.openqa.selenium.interactions.Actions(driver).moveToElement(page.{s.target}).perform();')
+        elif a == "wait" and s.value:
+            body_lines.append(f'try {{ Thread.sleep({int(s.value)}); }} catch (InterruptedException e) {{ Thread.currentThread().interrupt(); }}')
+        elif a == "waitfor" and s.target:
+            body_lines.append(f'new org.openqa.selenium.support.ui.WebDriverWait(driver, java.time.Duration.ofSeconds(10))'
+                              f'.until(org.openqa.selenium.support.ui.ExpectedConditions.visibilityOf(page.{s.target}));')
+        else:
+            body_lines.append("// TODO: step not recognized")
+    body = "\n        ".join(body_lines) or "// TODO: add steps"
+    return f"""    package {input.packageName};
+
+import org.testng.annotations.*;
+import org.openqa.selenium.*;
+import org.openqa.selenium.chrome.ChromeDriver;
+import io.github.bonigarcia.wdm.WebDriverManager;
+{imports}
+
+public class {input.className} {{
+    protected WebDriver driver;
+
+    @BeforeClass
+    public void setUp() {{
+        WebDriverManager.chromedriver().setup();
+        driver = new ChromeDriver();
+    }}
+
+    @AfterClass
+    public void tearDown() {{
+        if (driver != null) driver.quit();
+    }}
+
+    @Test {groups}
+    public void scenario() {{
+        {body}
+    }}
+}}
+"""
+
+
+def timeit(fn, repeat: int) -> list[float]:
+    fn()  # warm-up
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def report(label: str, steps: int, times: list[float], base: float | None = None):
+    med = statistics.median(times)
+    rel = f"  x{base / med:.2f} vs legacy" if base else ""
+    print(f"  {label:<9} {med * 1000:9.2f} ms/render  {steps / med:12,.0f} steps/s{rel}")
+    return med
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--steps", type=int, default=10_000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+    steps = make_steps(args.steps)
+
+    pw = load_server("pw-mcp-py")
+    assert pw._render_spec("bench", steps) == legacy_render_spec("bench", steps)
+    print(f"playwright spec, {args.steps} steps")
+    base = report("legacy", args.steps, timeit(lambda: legacy_render_spec("bench", steps), args.repeat))
+    report("template", args.steps, timeit(lambda: pw._render_spec("bench", steps), args.repeat), base)
+
+    sel = load_server("sel-testng-rest-py")
+    spec = sel.GenerateUiTest(packageName="com.example.tests", className="BenchTest", steps=steps,
+                              pageObjectFqn="com.example.pages.LoginPage", testGroups=["bench"])
+    assert sel._render_ui_test(spec) == legacy_render_ui_test(spec)
+    print(f"testng ui test, {args.steps} steps")
+    base = report("legacy", args.steps, timeit(lambda: legacy_render_ui_test(spec), args.repeat))
+    report("template", args.steps, timeit(lambda: sel._render_ui_test(spec), args.repeat), base)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# bench/common.py
+# Shared helpers for the benchmark scripts: importing the servers/router, timing, percentiles, RSS and the
+# JSON result files that compare.py diffs between commits.
+import datetime, importlib.util, json, os, pathlib, platform, statistics, subprocess, sys, time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+SERVERS = ROOT / "servers"
+ROUTER = ROOT / "router"
+RESULTS = pathlib.Path(__file__).resolve().parent / "results"
+
+
+def load_server(name: str):
+    """Import servers/<name>/server.py under a unique module name."""
+    root = SERVERS / name
+    sys.path[:0] = [str(root), str(SERVERS)]
+    try:
+        spec = importlib.util.spec_from_file_location(f"{name.replace('-', '_')}_server", root / "server.py")
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        return mod
+    finally:
+        del sys.path[:2]
+
+
+def router_path():
+    if str(ROUTER) not in sys.path:
+        sys.path.insert(0, str(ROUTER))
+
+
+def timed(fn, min_time: float = 0.2, max_repeat: int = 50) -> list[float]:
+    """Run fn once to warm up, then until min_time has passed (at least 3, at most max_repeat runs)."""
+    fn()
+    times, start = [], time.perf_counter()
+    while len(times) < 3 or (len(times) < max_repeat and time.perf_counter() - start < min_time):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def latency_summary(seconds: list[float]) -> dict:
+    s = sorted(seconds)
+    ms = lambda v: round(v * 1000, 3)
+    return {"count": len(s), "p50_ms": ms(percentile(s, 50)), "p90_ms": ms(percentile(s, 90)),
+            "p99_ms": ms(percentile(s, 99)), "max_ms": ms(s[-1]) if s else 0.0,
+            "mean_ms": ms(statistics.fmean(s)) if s else 0.0}
+
+
+def rss_mb(pid: int | None = None) -> dict | None:
+    """Current and peak resident set size of a process (Linux /proc; None elsewhere)."""
+    status = pathlib.Path(f"/proc/{pid or os.getpid()}/status")
+    try:
+        fields = dict(line.split(":", 1) for line in status.read_text().splitlines() if ":" in line)
+    except OSError:
+        return None
+    kb = lambda k: int(fields[k].split()[0]) if k in fields else 0
+    return {"rss_mb": round(kb("VmRSS") / 1024, 1), "peak_mb": round(kb("VmHWM") / 1024, 1)}
+
+
+def metadata() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save(kind: str, results: dict, out: str | None = None) -> pathlib.Path:
+    meta = metadata()
+    if out:
+        path = pathlib.Path(out)
+    else:
+        stamp = meta["timestamp"].replace(":", "").replace("-", "")[:15]
+        path = RESULTS / f"{kind}-{meta['commit'] or 'nogit'}-{stamp}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"kind": kind, "meta": meta, "results": results}, indent=2), encoding="utf-8")
+    return path
@@ -0,0 +1,58 @@
+# bench/compare.py
+# Compare two result files from micro.py / load.py (e.g. main vs a branch).
+#
+#   python bench/compare.py results/micro-abc123-....json results/micro-def456-....json [--threshold 10] [--fail]
+#
+# Prints every shared metric with its relative change and marks changes beyond the threshold as better/worse;
+# --fail exits 1 when anything got worse, for use in CI.
+import argparse, json, sys
+
+# metric -> True when higher is better
+METRICS = {"median_ms": False, "items_per_s": True, "p50_ms": False, "p99_ms": False, "throughput_rps": True,
+           "rss_mb": False}
+
+
+def flatten(result: dict) -> dict:
+    out = {}
+    for case, values in result["results"].items():
+        if "skipped" in values:
+            continue
+        for key, higher in METRICS.items():
+            value = values.get(key, (values.get("server") or {}).get(key))
+            if isinstance(value, (int, float)):
+                out[(case, key)] = (value, higher)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("base")
+    ap.add_argument("head")
+    ap.add_argument("--threshold", type=float, default=10.0, help="percent change that counts as a difference")
+    ap.add_argument("--fail", action="store_true", help="exit 1 if any metric got worse beyond the threshold")
+    args = ap.parse_args()
+    base, head = (json.load(open(p, encoding="utf-8")) for p in (args.base, args.head))
+    if base["kind"] != head["kind"]:
+        sys.exit(f"cannot compare {base['kind']} results with {head['kind']} results")
+    print(f"base {base['meta']['commit']} ({base['meta']['timestamp']})  head {head['meta']['commit']} "
+          f"({head['meta']['timestamp']})")
+
+    a, b = flatten(base), flatten(head)
+    worse = 0
+    for key in sorted(a.keys() & b.keys()):
+        (old, higher), (new, _) = a[key], b[key]
+        change = (new - old) / old * 100 if old else 0.0
+        verdict = ""
+        if abs(change) >= args.threshold:
+            better = (change > 0) == higher
+            verdict = "better" if better else "WORSE"
+            worse += not better
+        print(f"{key[0]:<28} {key[1]:<15} {old:>12.3f} -> {new:>12.3f}  {change:+7.1f}%  {verdict}")
+    for key in sorted(a.keys() ^ b.keys()):
+        print(f"{key[0]:<28} {key[1]:<15} only in {'base' if key in a else 'head'}")
+    if args.fail and worse:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# bench/load.py
+# Load test for both /tool servers and the router, entirely on local stand-ins.
+#
+#   python bench/load.py [--requests 200] [--concurrency 16] [--only sel.] [--out results.json]
+#
+# Each server runs under uvicorn in its own process with bench/stubs first on PATH (gradle, node, npm and npx
+# stand-ins that write plausible results), a private toolchain/cache directory, and browser prewarm off. A local
+# static HTML site is the target for the browser scenario, which is skipped when Chromium is not installed.
+# Every scenario reports p50/p90/p99 latency, throughput, errors and the server's RSS afterwards; the router
+# scenarios time whole router.py batch runs (generate + write + run + publish into a local bare repo).
+import argparse, contextlib, http.server, json, os, pathlib, shutil, socket, subprocess, sys, tempfile, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from common import ROOT, ROUTER, SERVERS, latency_summary, router_path, rss_mb, save
+
+STUBS = pathlib.Path(__file__).resolve().parent / "stubs"
+PAGE = """<!doctype html><html><body>
+<form><input id="username"><input id="password" type="password"><button id="submit" type="submit">Go</button></form>
+<div id="banner">Welcome</div></body></html>"""
+UI_SCENARIO = "open /\ntype alice{i} into username\ntype secret into password\nclick submit\n" \
+              "assert text Welcome on banner\nwait for banner"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def static_site(root: pathlib.Path):
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "index.html").write_text(PAGE, encoding="utf-8")
+    handler = lambda *a, **k: http.server.SimpleHTTPRequestHandler(*a, directory=str(root), **k)
+    http.server.SimpleHTTPRequestHandler.log_message = lambda *a: None
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    finally:
+        httpd.shutdown()
+
+
+@contextlib.contextmanager
+def server(name: str, env: dict, tag: str = ""):
+    """uvicorn servers/<name>/server.py on a free port; yields (url, pid) once /tool answers."""
+    port = free_port()
+    log = open(pathlib.Path(env["BENCH_TMP"]) / f"{name}{tag}.log", "w")
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level",
+                             "warning"], cwd=SERVERS / name, env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        import requests
+        deadline = time.time() + 60
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{name} exited with {proc.returncode}; see {log.name}")
+            try:
+                requests.post(url + "/tool", json={"tool": "list_jobs", "input": {}}, timeout=1)
+                break
+            except requests.ConnectionError:
+                if time.time() > deadline:
+                    raise RuntimeError(f"{name} did not start; see {log.name}")
+                time.sleep(0.1)
+        yield url, proc.pid
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        log.close()
+
+
+def drive(fn, requests: int, concurrency: int) -> dict:
+    """Closed loop: `concurrency` workers call fn(i) until `requests` calls are done."""
+    latencies, errors, first_error = [], 0, None
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        nonlocal errors, first_error
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                fn(i)
+                ok = True
+            except Exception as e:
+                ok = False
+                with lock:
+                    errors += 1
+                    first_error = first_error or f"{type(e).__name__}: {e}"
+            dt = time.perf_counter() - t0
+            if ok:
+                with lock:
+                    latencies.append(dt)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for f in [pool.submit(worker) for _ in range(concurrency)]:
+            f.result()
+    wall = time.perf_counter() - start
+    return {**latency_summary(latencies), "errors": errors, "first_error": first_error, "concurrency": concurrency,
+            "wall_s": round(wall, 3), "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0}
+
+
+def ui_steps(i: int, site: str) -> list[dict]:
+    from scenario_parser import parse_ui
+    return [{**s, "value": site} if s["action"] == "open" else s for s in parse_ui(UI_SCENARIO.format(i=i))]
+
+
+def sel_scenarios(client, tmp: pathlib.Path, site: str, n: int, c: int):
+    """(name, fn(i), requests, concurrency) for the Selenium/TestNG server."""
+    def ui_spec(i, unique=True):
+        return {"packageName": "com.example.tests", "className": f"LoadUiTest{i if unique else 0}",
+                "pageObjectFqn": "com.example.pages.LoadPage", "steps": ui_steps(i if unique else 0, site)}
+    pom = {"packageName": "com.example.pages", "className": "LoadPage", "url": site,
+           "elements": [{"name": f, "locatorType": "id", "locatorValue": f} for f in ("username", "password", "submit")]}
+    project = tmp / "sel-project"
+
+    def write(i):
+        files = [{"path": f"src/test/java/com/example/tests/LoadUiTest{k}.java",
+                  "content": f"// rev {(i + k) % 3}\n@Test class LoadUiTest{k} {{}}\n"} for k in range(10)]
+        client.call("write_files", {"projectRoot": str(project), "files": files})
+
+    def run(i):
+        res = client.call("run_gradle_tests", {"projectRoot": str(project), "wait": True})
+        if res.get("status") != "succeeded":
+            raise RuntimeError(f"gradle job {res.get('status')}: {res.get('error')}")
+
+    return [
+        ("sel.generate_ui", lambda i: client.call("generate_testng_ui_test", ui_spec(i)), n, c),
+        ("sel.generate_ui_cached", lambda i: client.call("generate_testng_ui_test", ui_spec(i, False)), n, c),
+        ("sel.generate_batch", lambda i: client.call("generate_batch", {"items": [
+            {"kind": "ui", "spec": ui_spec(i * 25 + k)} for k in range(25)]}), max(1, n // 10), c),
+        ("sel.tools_batch", lambda i: client.batch([("generate_pom_ui", pom),
+                                                    ("generate_testng_ui_test", ui_spec(i))], parallel=True), n, c),
+        ("sel.write_files", write, n, c),
+        ("sel.run_gradle", run, max(1, n // 10), min(c, 4)),
+    ]
+
+
+def pw_scenarios(client, tmp: pathlib.Path, site: str, n: int, c: int):
+    root = tmp / "pw-project"
+
+    def browse(i):
+        sid = client.call("launch_browser", {})["sessionId"]
+        try:
+            client.call("goto", {"sessionId": sid, "url": site})
+        finally:
+            client.call("close_session", {"sessionId": sid})
+
+    def run(i):
+        res = client.call("run_tests", {"testsRoot": str(root), "wait": True})
+        if res.get("status") != "succeeded":
+            raise RuntimeError(f"run_tests job {res.get('status')}: {res.get('error')}")
+
+    return [
+        ("pw.generate", lambda i: client.call("generate_playwright_test", {
+            "testsRoot": str(root), "name": f"load-{i % 50}.spec.ts", "steps": ui_steps(i, site)}), n, c),
+        ("pw.generate_batch", lambda i: client.call("generate_batch", {"testsRoot": str(root), "items": [
+            {"name": f"batch-{k}.spec.ts", "steps": ui_steps(i * 25 + k, site)} for k in range(25)]}),
+         max(1, n // 10), c),
+        ("pw.run_tests", run, max(1, n // 10), min(c, 4)),
+        ("pw.browser", browse, max(1, n // 4), min(c, 8)),
+    ]
+
+
+def router_runs(framework: str, sel_url: str, pw_url: str, tmp: pathlib.Path, site: str, scenarios: int,
+                runs: int) -> dict:
+    """Time whole router.py batch runs; every run regenerates into the same project and publishes it."""
+    remote = tmp / f"{framework}-remote.git"
+    if not remote.exists():
+        subprocess.run(["git", "init", "-q", "--bare", str(remote)], check=True)
+    scenario_file = tmp / f"{framework}-scenarios.jsonl"
+    with open(scenario_file, "w", encoding="utf-8") as fh:
+        for i in range(scenarios):
+            fh.write(json.dumps({"name": f"load-{i}", "scenario": UI_SCENARIO.format(i=i)}) + "\n")
+    env = {**os.environ, "SEL_URL": sel_url, "PW_URL": pw_url, "GIT_AUTHOR_NAME": "bench",
+           "GIT_AUTHOR_EMAIL": "bench@localhost", "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@localhost"}
+    cmd = [sys.executable, str(ROUTER / "router.py"), "--framework", framework, "--appUrl", site,
+           "--scenarioFile", str(scenario_file), "--testsRoot", str(tmp / f"router-{framework}"),
+           "--testsRepo", str(remote)]
+
+    def one(i):
+        res = subprocess.run(cmd, cwd=ROUTER, env=env, capture_output=True, text=True)
+        if res.returncode:
+            raise RuntimeError(f"router exited {res.returncode}: {res.stderr.strip()[-300:]}")
+    return {**drive(one, runs, 1), "scenarios": scenarios}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200, help="calls per scenario (batch/run scenarios use fewer)")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--router-scenarios", type=int, default=50, help="scenarios per router.py batch run")
+    ap.add_argument("--router-runs", type=int, default=3)
+    ap.add_argument("--only", help="run only scenarios whose name contains this")
+    ap.add_argument("--keep", action="store_true", help="keep the temp directory (server logs, projects)")
+    ap.add_argument("--out", help="result file (default bench/results/load-<commit>-<time>.json)")
+    args = ap.parse_args()
+
+    router_path()
+    from client import ToolClient
+    tmp = pathlib.Path(tempfile.mkdtemp(prefix="mcp-bench-"))
+    env = {**os.environ, "PATH": f"{STUBS}{os.pathsep}{os.environ.get('PATH', '')}", "BENCH_TMP": str(tmp),
+           "PW_TOOLCHAIN_DIR": str(tmp / "toolchain"), "PW_POOL_PREWARM": "0", "PYTHONDONTWRITEBYTECODE": "1"}
+    wanted = lambda name: not args.only or args.only in name
+    results = {}
+    try:
+        with static_site(tmp / "site") as site, server("sel-testng-rest-py", env) as (sel_url, sel_pid), \
+                server("pw-mcp-py", env) as (pw_url, pw_pid):
+            sel = ToolClient(sel_url, pool_size=args.concurrency)
+            pw = ToolClient(pw_url, pool_size=args.concurrency)
+            plan = [(s, sel_pid) for s in sel_scenarios(sel, tmp, site, args.requests, args.concurrency)]
+            plan += [(s, pw_pid) for s in pw_scenarios(pw, tmp, site, args.requests, args.concurrency)]
+            for (name, fn, n, c), pid in plan:
+                if not wanted(name):
+                    continue
+                if name == "pw.browser":
+                    try:
+                        fn(-1)
+                    except Exception as e:
+                        print(f"{name:<24} skipped ({type(e).__name__}: {str(e)[:80]})")
+                        results[name] = {"skipped": str(e)}
+                        continue
+                results[name] = {**drive(fn, n, c), "server": rss_mb(pid)}
+                report(name, results[name])
+            for framework in ("selenium-testng", "playwright"):
+                name = f"router.{framework}"
+                if wanted(name):
+                    results[name] = {**router_runs(framework, sel_url, pw_url, tmp, site, args.router_scenarios,
+                                                   args.router_runs), "server": rss_mb(sel_pid if "sel" in name else pw_pid)}
+                    report(name, results[name])
+    finally:
+        if args.keep:
+            print(f"kept {tmp}")
+        else:
+            shutil.rmtree(tmp, ignore_errors=True)
+    print(f"saved {save('load', results, args.out)}")
+
+
+def report(name: str, r: dict):
+    mem = r.get("server") or {}
+    err = f"  errors={r['errors']} ({r['first_error'][:60]})" if r["errors"] else ""
+    print(f"{name:<24} n={r['count']:<5} p50={r['p50_ms']:9.2f} ms  p99={r['p99_ms']:9.2f} ms  "
+          f"{r['throughput_rps']:8.1f} req/s  rss={mem.get('rss_mb', '?')} MB{err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# bench/micro.py
+# Microbenchmarks for the pure hot paths: scenario parsing in the router and every renderer in both servers.
+#
+#   python bench/micro.py [--sizes 1,100,1000,10000,100000] [--only render] [--out results.json]
+#
+# Each case is timed on its own (model construction and input generation are setup, not measured) and
+# reported as median/min time and items per second; results are written as JSON for compare.py.
+import argparse, statistics
+from common import load_server, router_path, save, timed
+
+UI_LINES = ["open https://example.test/login", "type alice{i} into username", "click submit",
+            "assert text Welcome alice{i} on banner", "select Norway from country", "hover over menu",
+            "wait 250ms", "wait for results", "scroll down {i}"]
+
+
+def ui_text(n: int) -> str:
+    return "\n".join(UI_LINES[i % len(UI_LINES)].format(i=i) for i in range(n))
+
+
+def api_text(n: int) -> str:
+    out = []
+    for i in range(n):
+        out.append(f"POST /items/{i} expect 201" if i % 2 else f"GET /items/{i}")
+        if i % 3 == 0:
+            out += [f"header X-Request-Id: r{i}", f"query page={i}", f'expect $.id == "{i}"']
+    return "\n".join(out)
+
+
+def cases(sizes: list[int]):
+    """Yield (name, size, fn); setup happens here, only fn is timed."""
+    router_path()
+    from scenario_parser import parse_api, parse_ui
+
+    sel = load_server("sel-testng-rest-py")
+    pw = load_server("pw-mcp-py")
+    for n in sizes:
+        text_ui, text_api = ui_text(n), api_text(n)
+        yield "parse_ui", n, lambda: parse_ui(text_ui)
+        yield "parse_api", n, lambda: parse_api(text_api)
+
+        steps = parse_ui(text_ui)
+        pom = sel.GeneratePOM(packageName="com.example.pages", className="BenchPage", url="https://example.test",
+                              elements=[{"name": f"field{i}", "locatorType": ("id", "css", "xpath")[i % 3],
+                                         "locatorValue": f"#f{i}"} for i in range(n)])
+        ui = sel.GenerateUiTest(packageName="com.example.tests", className="BenchUiTest", steps=steps,
+                                pageObjectFqn="com.example.pages.BenchPage", testGroups=["bench"])
+        api = sel.GenerateApiTest(packageName="com.example.tests", className="BenchApiTest",
+                                  baseUrl="https://api.example.test", requests=parse_api(text_api))
+        yield "render_pom", n, lambda: sel._render_pom(pom)
+        yield "render_ui_test", n, lambda: sel._render_ui_test(ui)
+        yield "render_api_test", n, lambda: sel._render_api_test(api)
+        yield "render_spec", n, lambda: pw._render_spec("bench", steps)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1,100,1000,10000,100000")
+    ap.add_argument("--only", help="run only cases whose name contains this")
+    ap.add_argument("--min-time", type=float, default=0.2, help="seconds to spend per case")
+    ap.add_argument("--out", help="result file (default bench/results/micro-<commit>-<time>.json)")
+    args = ap.parse_args()
+
+    results = {}
+    for name, n, fn in cases([int(s) for s in args.sizes.split(",")]):
+        if args.only and args.only not in name:
+            continue
+        times = timed(fn, args.min_time)
+        med = statistics.median(times)
+        results[f"{name}/{n}"] = {"name": name, "size": n, "runs": len(times), "median_ms": round(med * 1000, 4),
+                                  "min_ms": round(min(times) * 1000, 4), "items_per_s": round(n / med, 1)}
+        print(f"{name:<16} {n:>7}  {med * 1000:10.3f} ms  {n / med:14,.0f} items/s")
+    print(f"saved {save('micro', results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
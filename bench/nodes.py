@@ -0,0 +1,108 @@
+# bench/nodes.py
+# Multi-node routing (router/nodes.py) against several local uvicorn instances of the Selenium server.
+#
+#   python bench/nodes.py [--nodes 3] [--roots 30] [--batches 48] [--repeat 20] [--concurrency 12]
+#
+# Checks, printed as they run and saved like the other benchmarks:
+#   sticky    two independent NodePools (two router processes) map every testsRoot to the same node
+#   scaleout  generate_batch renders spread over 1 node vs all nodes (throughput; needs as many cores as nodes)
+#   load      a node with a backlog of queued jobs is avoided by pick(), and by for_root() beyond the slack when
+#             spill-over is switched on (ROUTER_STICKY_SLACK; off by default, when every root stays put)
+#   failover  after one node is stopped, only the roots that were on it move
+import argparse, contextlib, os, pathlib, shutil, tempfile, time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from common import router_path, save
+from load import STUBS, server, ui_steps
+
+
+def scenario_batch(i: int, size: int = 25, repeat: int = 1) -> dict:
+    return {"items": [{"kind": "ui", "spec": {"packageName": "com.example.tests", "className": f"Nodes{i}x{k}",
+                                              "steps": ui_steps(i * size + k, "http://localhost") * repeat}}
+                      for k in range(size)]}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nodes", type=int, default=3)
+    ap.add_argument("--roots", type=int, default=30, help="testsRoots to place")
+    ap.add_argument("--batches", type=int, default=48, help="generate_batch requests in the scale-out check")
+    ap.add_argument("--repeat", type=int, default=20, help="step list repeats per scenario (render cost)")
+    ap.add_argument("--concurrency", type=int, default=12)
+    ap.add_argument("--out")
+    args = ap.parse_args()
+
+    router_path()
+    from client import ToolClient
+    from nodes import NodePool, lease
+
+    tmp = pathlib.Path(tempfile.mkdtemp(prefix="mcp-nodes-"))
+    env = {**os.environ, "PATH": f"{STUBS}{os.pathsep}{os.environ.get('PATH', '')}", "BENCH_TMP": str(tmp),
+           "BENCH_STUB_DELAY": "2", "SEL_RUN_CONCURRENCY": "1", "PYTHONDONTWRITEBYTECODE": "1"}
+    clients = {}
+    client_for = lambda url: clients.setdefault(url, ToolClient(url, pool_size=args.concurrency))
+    roots = [f"/srv/tests/project-{i}" for i in range(args.roots)]
+    results = {}
+    try:
+        with contextlib.ExitStack() as stack:
+            nodes = [server("sel-testng-rest-py", env, tag=f"-{n}") for n in range(args.nodes)]
+            urls = [stack.enter_context(n)[0] for n in nodes]
+            print("nodes:", ", ".join(urls))
+            quiet = lambda: contextlib.redirect_stderr(open(os.devnull, "w"))  # for_root logs every placement
+
+            a, b = NodePool("sel", urls, client_for), NodePool("sel", urls, client_for)
+            with quiet():
+                placed = {r: a.for_root(r) for r in roots}
+                agree = sum(placed[r] == b.for_root(r) for r in roots)
+            spread = Counter(placed.values())
+            results["sticky"] = {"roots": len(roots), "agree": agree, "per_node": [spread[u] for u in urls]}
+            print(f"sticky    {agree}/{len(roots)} roots placed identically by two pools; "
+                  f"per node {[spread[u] for u in urls]}")
+
+            batches = [scenario_batch(i, repeat=args.repeat) for i in range(args.batches)]
+            for label, pool in (("1 node", NodePool("sel", urls[:1], client_for)),
+                                (f"{len(urls)} nodes", NodePool("sel", urls, client_for, interval=0.2))):
+                def render(batch):
+                    url = pool.pick()
+                    with lease(url):
+                        return url, clients[url].call("generate_batch", batch)
+                start = time.perf_counter()
+                with ThreadPoolExecutor(args.concurrency) as ex:
+                    used = Counter(url for url, _ in ex.map(render, batches))
+                wall = time.perf_counter() - start
+                rate = round(len(batches) * 25 / wall, 1)
+                results[f"scaleout.{label.replace(' ', '_')}"] = {"items_per_s": rate,
+                                                                  "per_node": [used[u] for u in urls]}
+                print(f"scaleout  {label:<8} {rate:9.1f} scenarios/s  per node {[used[u] for u in urls]}")
+
+            busy = urls[0]
+            project = tmp / "busy"
+            project.mkdir()
+            for _ in range(8):  # 8 slow stub Gradle runs on a single worker: a deep queue on node 0
+                clients[busy].call("warm_gradle", {"projectRoot": str(project)})
+            d = NodePool("sel", urls, client_for, interval=0, slack=4)  # spill-over on
+            picks = Counter(d.pick() for _ in range(50))
+            busy_roots = [r for r in roots if placed[r] == busy]
+            with quiet():
+                kept = sum(d.for_root(r) == busy for r in busy_roots)
+            results["load"] = {"busy_node_load": round(d.nodes[0].load, 2), "picks_of_busy": picks[busy],
+                               "busy_roots": len(busy_roots), "kept_on_busy": kept}
+            print(f"load      busy node load {d.nodes[0].load:.1f}: picked {picks[busy]}/50 times; "
+                  f"{kept}/{len(busy_roots)} of its roots stayed (slack {d.slack:g})")
+
+            stopped = urls[-1]
+            nodes[-1].__exit__(None, None, None)
+            c = NodePool("sel", urls, client_for)  # no spill-over: node 0's backlog does not move roots
+            with quiet():
+                after = {r: c.for_root(r) for r in roots}
+            moved = sum(after[r] != placed[r] for r in roots if placed[r] != stopped)
+            results["failover"] = {"on_stopped": spread[stopped], "rehomed": sum(after[r] != stopped for r in roots),
+                                   "moved_from_survivors": moved}
+            print(f"failover  node stopped: its {spread[stopped]} roots rehomed, {moved} roots on other nodes moved")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"saved {save('nodes', results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# bench/startup.py
+# Cold-start cost of the servers and the router: import time in a fresh interpreter, against a budget.
+#
+#   python bench/startup.py [--repeat 5] [--budget pw=900] [--top 8] [--fail] [--out results.json]
+#
+# Every case imports its module in a new `python -X importtime` process, so nothing is cached in-process. Reported
+# per case: median/min import time and whole-process wall time, the slowest top-level imports, and any module from
+# the case's `absent` list that was loaded anyway (generator-only servers must not load Playwright or GitPython,
+# the router must not load requests before its first call). `lazy` times the deferred dependencies on their own,
+# i.e. what the first tool call that needs them pays. --fail exits 1 when a case is over budget or loads a module it
+# should not, so CI can hold the line.
+import argparse, os, statistics, subprocess, sys, time
+from common import ROUTER, SERVERS, save
+
+# name: (directory, module, extra env, modules that must not be imported, budget ms)
+CASES = {
+    "sel": (SERVERS / "sel-testng-rest-py", "server", {}, (), 1000),
+    "sel.generator": (SERVERS / "sel-testng-rest-py", "server", {"MCP_GENERATOR_ONLY": "1"}, ("git",), 1000),
+    "pw": (SERVERS / "pw-mcp-py", "server", {}, ("git", "playwright"), 1000),
+    "pw.generator": (SERVERS / "pw-mcp-py", "server", {"MCP_GENERATOR_ONLY": "1"}, ("git", "playwright"), 1000),
+    "router": (ROUTER, "router", {}, ("requests", "urllib3"), 250),
+}
+# dependencies the modules above load on first use instead of at import
+LAZY = {"lazy.git": "git", "lazy.playwright": "playwright.async_api", "lazy.requests": "requests"}
+
+PROBE = """import sys, time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+print(",".join(sorted(m for m in {absent!r} if m in sys.modules)))
+"""
+
+
+def probe(cwd, module: str, env: dict, absent=()) -> tuple[float, float, list[str], str]:
+    """(import s, process wall s, unexpected modules, -X importtime report) from one fresh interpreter."""
+    start = time.perf_counter()
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, absent=tuple(absent))],
+                       cwd=cwd, env={**os.environ, **env, "PYTHONDONTWRITEBYTECODE": "1"}, capture_output=True,
+                       text=True, timeout=120)
+    wall = time.perf_counter() - start
+    if p.returncode:
+        raise RuntimeError(f"import {module} failed:\n{p.stderr[-2000:]}")
+    seconds, loaded = p.stdout.splitlines()[-2:]
+    return float(seconds), wall, [m for m in loaded.split(",") if m], p.stderr
+
+
+def top_imports(report: str, n: int) -> list[tuple[str, float]]:
+    """Slowest imports made directly by the probed module (cumulative ms), from a -X importtime report."""
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            rows.append((name.strip(), int(cumulative) / 1000))
+    return sorted(rows, key=lambda r: -r[1])[:n]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5, help="fresh interpreters per case")
+    ap.add_argument("--budget", action="append", default=[], metavar="CASE=MS", help="override a case's budget")
+    ap.add_argument("--top", type=int, default=8, help="slowest direct imports to list per case")
+    ap.add_argument("--only", help="run cases whose name starts with this")
+    ap.add_argument("--fail", action="store_true", help="exit 1 on a budget overrun or an unexpected import")
+    ap.add_argument("--out")
+    args = ap.parse_args()
+    budgets = {name: case[4] for name, case in CASES.items()}
+    for b in args.budget:
+        name, _, ms = b.partition("=")
+        if name not in budgets:
+            ap.error(f"unknown case {name!r}; one of {', '.join(budgets)}")
+        budgets[name] = float(ms)
+
+    results, failures = {}, []
+    for name, (cwd, module, env, absent, _) in CASES.items():
+        if args.only and not name.startswith(args.only):
+            continue
+        runs = [probe(cwd, module, env, absent) for _ in range(args.repeat)]
+        times = sorted(r[0] * 1000 for r in runs)
+        median = statistics.median(times)
+        loaded = sorted({m for r in runs for m in r[2]})
+        top = top_imports(runs[-1][3], args.top)
+        over = median > budgets[name]
+        results[name] = {"median_ms": round(median, 1), "min_ms": round(times[0], 1),
+                         "process_ms": round(statistics.median(r[1] for r in runs) * 1000, 1),
+                         "budget_ms": budgets[name], "over_budget": over, "unexpected": loaded,
+                         "top": [{"module": m, "ms": round(ms, 1)} for m, ms in top]}
+        flag = "  OVER BUDGET" if over else ""
+        print(f"{name:<15} {median:8.1f} ms  (min {times[0]:.1f}, process {results[name]['process_ms']:.1f}, "
+              f"budget {budgets[name]:g}){flag}")
+        print("                " + ", ".join(f"{m} {ms:.0f}" for m, ms in top))
+        if loaded:
+            print(f"                imported although deferred: {', '.join(loaded)}")
+        if over:
+            failures.append(f"{name}: {median:.0f} ms > {budgets[name]:g} ms")
+        if loaded:
+            failures.append(f"{name}: imported {', '.join(loaded)}")
+
+    for name, module in LAZY.items():
+        if args.only and not name.startswith(args.only):
+            continue
+        try:
+            times = sorted(probe(ROUTER, module, {})[0] * 1000 for _ in range(args.repeat))
+        except RuntimeError:
+            print(f"{name:<15} not installed")
+            continue
+        results[name] = {"median_ms": round(statistics.median(times), 1), "min_ms": round(times[0], 1)}
+        print(f"{name:<15} {results[name]['median_ms']:8.1f} ms  paid by the first call that needs {module}")
+
+    print(f"saved {save('startup', results, args.out)}")
+    if failures:
+        print("startup check failed:\n  " + "\n  ".join(failures), file=sys.stderr)
+        if args.fail:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
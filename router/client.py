@@ -0,0 +1,194 @@
+# router/client.py
+# Reusable HTTP client for the /tool servers.
+#
+# One requests.Session per server keeps connections alive and pooled (sized for the router's concurrency), every
+# tool gets its own timeout instead of a flat 600 s, transient failures are retried with exponential backoff, and
+# several independent tool calls can be sent in one round trip through /tools/batch. Generated files are uploaded
+# as a chunked NDJSON stream (upload_files), so no request body ever holds the whole project.
+#
+# HTTP/2 is not offered: uvicorn serves HTTP/1.1 only, so pooled keep-alive connections are the win here.
+#
+# Every request carries X-Request-Id: <run id>-<n> (retries keep the id), which the servers attach to their
+# metrics context, jobs and spans. With opentelemetry-api installed each call is also a client span whose W3C
+# traceparent is sent along, so router and server spans form one trace.
+#
+# requests is imported when the first client is created, not with this module: `router.py --help`, argument errors
+# and code that only needs the parser or the node pool start without it.
+import contextlib, itertools, json, os, random, time, uuid
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:  # tracing is optional
+    trace = None
+
+CONNECT_TIMEOUT = 5
+DEFAULT_TIMEOUT = 60
+HEALTH_TIMEOUT = 3
+# read timeouts per tool; run tools only enqueue a job, so they are cheap too
+TOOL_TIMEOUTS = {
+    "generate_playwright_test": 30, "generate_pom_ui": 30, "generate_testng_ui_test": 30,
+    "generate_testng_api_test": 30, "generate_batch": 300, "write_files": 120,
+    "launch_browser": 60, "goto": 90, "run_tests": 30, "run_gradle_tests": 30,
+    "job_status": 15, "job_logs": 15, "git_push": 300, "upload": 300,
+}
+# tools that can be resent safely after the request may have reached the server
+IDEMPOTENT = {
+    "generate_playwright_test", "generate_pom_ui", "generate_testng_ui_test", "generate_testng_api_test",
+    "generate_batch", "write_files", "goto", "job_status", "job_logs", "list_jobs", "pool_stats", "cache_stats",
+}
+RETRY_STATUS = {502, 503, 504}
+UPLOAD_CHUNK = 4 << 20  # characters of one file per upload line
+
+
+class ToolClient:
+    def __init__(self, base_url: str, pool_size: int = 16, retries: int = 3, backoff: float = 0.5,
+                 run_id: str | None = None):
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self.backoff = backoff
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self._seq = itertools.count(1)
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def health(self, timeout: float = HEALTH_TIMEOUT) -> dict:
+        """GET /health (load figures for nodes.py); {} from a server without the endpoint (up, load unknown)."""
+        r = self.session.get(self.base_url + "/health", timeout=(CONNECT_TIMEOUT, timeout))
+        if r.status_code == 404:
+            return {}
+        r.raise_for_status()
+        return r.json()
+
+    def call(self, tool: str, payload=None, timeout: float | None = None):
+        """The tool's result; raises ToolError when the server answers with nothing but {"error": ...} (unknown or
+        disabled tool, bad input), so callers never read fields of a result that is not there."""
+        return _checked(tool, self._post("/tool", {"tool": tool, "input": payload or {}}, tool, timeout,
+                                         tool in IDEMPOTENT).json())
+
+    def stream(self, tool: str, payload=None, timeout: float | None = None):
+        """Yield NDJSON results from /tool/stream as they arrive."""
+        r = self._post("/tool/stream", {"tool": tool, "input": payload or {}}, tool, timeout, tool in IDEMPOTENT,
+                       stream=True)
+        with r:
+            for line in r.iter_lines():
+                if line:
+                    yield _checked(tool, json.loads(line))
+
+    def batch(self, calls: list[tuple[str, dict]], parallel: bool = False, timeout: float | None = None) -> list:
+        """Send several tool calls in one round trip; returns each call's result, raising on the first failure."""
+        body = {"calls": [{"tool": t, "input": p or {}} for t, p in calls], "parallel": parallel}
+        limit = timeout or max(_timeout(t) for t, _ in calls)
+        idempotent = all(t in IDEMPOTENT for t, _ in calls)  # the batch may only be resent if every call in it may
+        results = self._post("/tools/batch", body, "batch", limit, idempotent).json()["results"]
+        for (tool, _), res in zip(calls, results):
+            if not res.get("ok"):
+                raise ToolError(tool, res.get("status"), res.get("error"))
+        return [res["result"] for res in results]
+
+    def upload_files(self, header: dict, files, timeout: float | None = None) -> dict:
+        """Streamed write_files (POST /files/stream): `header` is the write_files input without `files`, `files`
+        any iterable of { path, content, overwrite? }. Sent with chunked transfer encoding, big files split."""
+        def body():
+            yield (json.dumps(header) + "\n").encode("utf-8")
+            for f in files:
+                content = f.get("content") or ""
+                for start in range(0, max(len(content), 1), UPLOAD_CHUNK):
+                    line = {**f, "content": content[start:start + UPLOAD_CHUNK],
+                            "more": start + UPLOAD_CHUNK < len(content)}
+                    yield (json.dumps(line) + "\n").encode("utf-8")
+        # never resent: the body is a generator, consumed by the first attempt
+        return _checked("write_files", self._post("/files/stream", None, "upload", timeout, False, data=body()).json())
+
+    def _post(self, path: str, body: dict | None, tool: str, timeout: float | None, idempotent: bool,
+              stream: bool = False, data=None):
+        """POST to the server; `tool` names the call in spans and picks its default timeout, `idempotent` says
+        whether it may be resent after it may have reached the server."""
+        with span(f"call {tool}", **{"tool.name": tool, "server.url": self.base_url}):
+            headers = {"X-Request-Id": f"{self.run_id}-{next(self._seq)}"}
+            if data is not None:
+                headers["Content-Type"] = "application/x-ndjson"
+            if trace is not None:
+                propagate.inject(headers)
+            return self._send(path, body, tool, timeout, idempotent, stream, headers, data)
+
+    def _send(self, path, body, tool, timeout, idempotent, stream, headers, data=None):
+        import requests
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                r = self.session.post(self.base_url + path, json=body, data=data, stream=stream, headers=headers,
+                                      timeout=(CONNECT_TIMEOUT, timeout or _timeout(tool)))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # a failed connect never reached the server, so any tool may retry it; anything later only
+                # for tools that are safe to resend
+                if last or not (_never_sent(e) or idempotent):
+                    raise
+            else:
+                if r.status_code in RETRY_STATUS and idempotent and not last:
+                    r.close()
+                else:
+                    r.raise_for_status()
+                    return r
+            time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+
+class ToolError(Exception):
+    """A tool call failed: an {"error": ...} result, or a failed call inside a /tools/batch request."""
+
+    def __init__(self, tool: str, status, error):
+        super().__init__(f"{tool} failed ({status}): {error}")
+        self.tool, self.status, self.error = tool, status, error
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """A client-side span (no-op without opentelemetry)."""
+    if trace is None:
+        yield None
+        return
+    with trace.get_tracer("router").start_as_current_span(name, kind=trace.SpanKind.CLIENT) as s:
+        for k, v in attributes.items():
+            s.set_attribute(k, v)
+        yield s
+
+
+def setup_tracing(service_name: str = "router") -> bool:
+    """Export spans over OTLP when OTEL_EXPORTER_OTLP_ENDPOINT is set and the SDK is installed."""
+    if trace is None or not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return False
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        return False
+    provider = TracerProvider(resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    return True
+
+
+def _checked(tool: str, out):
+    """`out` unless it is an error-only body ({"error": ...}; results that report an error next to other fields,
+    like a rejected git push, are returned as they are)."""
+    if isinstance(out, dict) and len(out) == 1 and "error" in out:
+        raise ToolError(tool, 400, out["error"])
+    return out
+
+
+def _timeout(tool: str) -> float:
+    return TOOL_TIMEOUTS.get(tool, DEFAULT_TIMEOUT)
+
+
+def _never_sent(e: Exception) -> bool:
+    import requests
+    from urllib3.exceptions import ConnectTimeoutError
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    reason = getattr(e.args[0] if e.args else None, "reason", None)
+    return isinstance(reason, ConnectTimeoutError)  # includes NewConnectionError (refused, DNS)
@@ -0,0 +1,159 @@
+# router/nodes.py
+# Health-checked pools of MCP server nodes, one per framework.
+#
+# PW_URL / SEL_URL (or --pwNodes / --selNodes) take one or more comma-separated base URLs. Each node's GET /health
+# is polled, all nodes in parallel, at most every HEALTH_INTERVAL seconds; a node that cannot be reached is skipped
+# until a later check succeeds.
+#
+# Work tied to a testsRoot (writing files, test runs, git) must stay on one node, and should land on the same node
+# run after run, where that root's node_modules and Gradle caches are warm. for_root() picks that node by
+# rendezvous hashing of the root over the healthy nodes: every router process agrees without shared state, and
+# adding or removing a node only moves the roots that hashed to it. Only a node that is down hands its roots on
+# (to the next node in rendezvous order, which every router agrees on too). The choice is pinned for the rest of
+# the run. The servers' per-root locks only hold within one process, so a root must never be owned by two nodes.
+#
+# Spilling a root to a less busy node is opt-in (ROUTER_STICKY_SLACK, unset by default): with it set, a preferred
+# node busier than the least-loaded one by more than the slack loses the root. Load is what this router process
+# sees, so two routers can then disagree about a root's node; only set it when a single router serves each root.
+#
+# Stateless work (renders, locator resolution) goes to the least-loaded node via pick().
+#
+# Nodes started with MCP_GENERATOR_ONLY=1 report `generatorOnly` on /health: they take renders from pick() but never
+# own a testsRoot or get browser work (pick(generator_ok=False)), since browsers, runs and git are switched off there.
+#
+# A node's load is its reported `busy` count (tool calls executing or queued, queued and running jobs), plus the
+# calls this router currently has open to it (health is sampled, these are not), plus CPU_WEIGHT times its load
+# average per core.
+import contextlib, hashlib, os, random, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+HEALTH_INTERVAL = float(os.getenv("ROUTER_HEALTH_INTERVAL", "5"))
+STICKY_SLACK = float(os.environ["ROUTER_STICKY_SLACK"]) if os.getenv("ROUTER_STICKY_SLACK") else None
+CPU_WEIGHT = 4.0
+
+_by_url: dict[str, "Node"] = {}
+
+
+class NoHealthyNode(Exception):
+    pass
+
+
+class Node:
+    def __init__(self, url: str, client_for):
+        self.url = url
+        self._client_for = client_for  # resolved per check, so clients are created with the final pool size
+        self.healthy = True  # until the first check says otherwise
+        self.health: dict = {}
+        self.error: str | None = None
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def check(self):
+        try:
+            self.health = self._client_for(self.url).health()
+            self.healthy, self.error = True, None
+        except Exception as e:
+            self.healthy, self.error = False, str(e)
+
+    @property
+    def load(self) -> float:
+        cpu = self.health.get("cpu") or 0.0
+        return self.health.get("busy", 0) + self.pending + CPU_WEIGHT * cpu
+
+    def info(self) -> dict:
+        return {"url": self.url, "healthy": self.healthy, "load": round(self.load, 2), "pending": self.pending,
+                "error": self.error}
+
+
+class NodePool:
+    def __init__(self, name: str, urls, client_for, interval: float = HEALTH_INTERVAL,
+                 slack: float | None = STICKY_SLACK):
+        """`urls`: list or comma-separated string; `client_for(url)` returns the ToolClient for a node; `slack`:
+        opt-in spill-over of roots from busy nodes (None: a root always stays on its rendezvous owner)."""
+        if isinstance(urls, str):
+            urls = urls.split(",")
+        urls = list(dict.fromkeys(u.strip().rstrip("/") for u in urls if u.strip()))
+        if not urls:
+            raise ValueError(f"no {name} server URLs given")
+        self.name, self.interval, self.slack = name, interval, slack
+        self.nodes = [Node(u, client_for) for u in urls]
+        for n in self.nodes:
+            _by_url[n.url] = n
+        self._pinned: dict[str, str] = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False):
+        """Re-check every node's /health if the last check is older than `interval` (single-node pools never
+        check: there is nothing to choose between)."""
+        if len(self.nodes) == 1:
+            return
+        with self._lock:
+            if not force and time.monotonic() - self._checked < self.interval:
+                return
+            with ThreadPoolExecutor(max_workers=len(self.nodes)) as pool:
+                list(pool.map(Node.check, self.nodes))
+            self._checked = time.monotonic()
+
+    def healthy(self) -> list[Node]:
+        self.refresh()
+        nodes = [n for n in self.nodes if n.healthy]
+        if not nodes:
+            raise NoHealthyNode(f"no healthy {self.name} node: " +
+                                "; ".join(f"{n.url}: {n.error}" for n in self.nodes))
+        return nodes
+
+    def full(self) -> list[Node]:
+        """Healthy nodes that offer every tool (not generator-only)."""
+        nodes = [n for n in self.healthy() if not n.health.get("generatorOnly")]
+        if not nodes:
+            raise NoHealthyNode(f"no healthy {self.name} node offers browsers, runs and git (all are generator-only)")
+        return nodes
+
+    def pick(self, generator_ok: bool = True) -> str:
+        """Least-loaded healthy node, for work that is not tied to a testsRoot; generator_ok=False for browser
+        sessions, which generator-only nodes do not have."""
+        nodes = self.healthy() if generator_ok else self.full()
+        return min(nodes, key=lambda n: (n.load, random.random())).url
+
+    def for_root(self, tests_root: str) -> str:
+        """The node that owns `tests_root` for this run (sticky across runs, see module comment)."""
+        with self._lock:
+            url = self._pinned.get(tests_root)
+        if url is not None:
+            return url
+        nodes = self.full()
+        preferred = max(nodes, key=lambda n: _weight(tests_root, n.url))
+        node = preferred
+        if self.slack is not None:
+            least = min(nodes, key=lambda n: n.load)
+            node = least if preferred.load > least.load + self.slack else preferred
+        with self._lock:
+            url = self._pinned.setdefault(tests_root, node.url)
+        if len(self.nodes) > 1:
+            moved = "" if url == preferred.url else f" (preferred {preferred.url} is busy)"
+            print(f"[{self.name}] {tests_root} -> {url}{moved}", file=sys.stderr)
+        return url
+
+    def status(self) -> list[dict]:
+        return [n.info() for n in self.nodes]
+
+
+def _weight(key: str, url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{key}\0{url}".encode("utf-8"), digest_size=8).digest(), "big")
+
+
+@contextlib.contextmanager
+def lease(url: str):
+    """Count a call to `url` as in flight for load balancing while the block runs."""
+    node = _by_url.get(url.rstrip("/"))
+    if node is None:
+        yield
+        return
+    with node._lock:
+        node.pending += 1
+    try:
+        yield
+    finally:
+        with node._lock:
+            node.pending -= 1
@@ -1,8 +1,16 @@
-import argparse, os, requests, sys
-from scenario_parser import parse_ui, parse_api
+import argparse, contextvars, hashlib, json, os, pathlib, re, sys, time, uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from client import ToolClient, ToolError, setup_tracing, span
+from nodes import NodePool, NoHealthyNode, lease
+from scenario_parser import ScenarioError, parse_ui, parse_api
 
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "servers"))  # servers/mcp_common
+from mcp_common.templating import java_identifier
+
+# one or more comma-separated server URLs per framework (see nodes.py)
 PW_URL = os.getenv("PW_URL", "http://localhost:7010")
 SEL_URL = os.getenv("SEL_URL", "http://localhost:7020")
+GRADLE_FILES = ["build.gradle", "settings.gradle", "gradle.properties"]
 
 def _ensure_open_step(steps, app_url: str):
     """Ensure there's an 'open' step with a valid URL. If an 'open' exists but is invalid, fix it."""
@@ -19,54 +27,411 @@ def _ensure_open_step(steps, app_url: str):
     return steps
 
 
+_clients = {}
+POOL_SIZE = 16
+# every server call of this invocation is tagged X-Request-Id: <RUN_ID>-<n>
+RUN_ID = os.getenv("ROUTER_RUN_ID") or uuid.uuid4().hex[:12]
+
+def client(url) -> ToolClient:
+    """One pooled keep-alive client per server URL, shared by all threads."""
+    if url not in _clients:
+        _clients[url] = ToolClient(url, pool_size=POOL_SIZE, run_id=RUN_ID)
+    return _clients[url]
+
+PW = NodePool("playwright", PW_URL, client)
+SEL = NodePool("selenium", SEL_URL, client)
+
+# --rerun -> run_cache policy of the servers' run tools; RUN_REUSE is added to every run call (set in main)
+RERUN_POLICIES = {"always": "never", "changed": "passed", "stable": "stable"}
+APP_HEADERS = ("x-build-id", "x-app-version", "etag", "last-modified")  # first one present identifies the build
+RUN_REUSE = {"reuse": "never"}
+
+def app_fingerprint(url):
+    """Build id, ETag or Last-Modified of the app under test (one HEAD request), or None if it sends none."""
+    import requests
+    try:
+        r = requests.head(url, allow_redirects=True, timeout=5)
+        if r.status_code in (405, 501):
+            with requests.get(url, stream=True, timeout=5) as r:
+                pass
+    except requests.RequestException as e:
+        print(f"app fingerprint unavailable: {e}", file=sys.stderr)
+        return None
+    return next((f"{h}:{r.headers[h]}" for h in APP_HEADERS if r.headers.get(h)), None)
+
+def run_reuse(rerun, app_url, build_id=None):
+    """run_tests / run_gradle_tests options for --rerun. Reuse needs to know which app build the stored results
+    were for, so without a build id or caching headers everything runs. The app is only asked for its headers when
+    a reuse policy is selected."""
+    if rerun == "always":
+        return {"reuse": "never"}
+    fp = f"build:{build_id}" if build_id else app_fingerprint(app_url)
+    if fp is None:
+        print(f"--rerun {rerun}: {app_url} sends no build id, ETag or Last-Modified; pass --appBuildId to reuse "
+              "results. Running every test.", file=sys.stderr)
+        return {"reuse": "never"}
+    return {"reuse": RERUN_POLICIES[rerun], "appFingerprint": fp}
+
 def call(url, tool, payload=None):
-    payload = payload or {}
-    r = requests.post(f"{url}/tool", json={"tool": tool, "input": payload}, timeout=600)
-    r.raise_for_status()
-    return r.json()
+    with lease(url):
+        return client(url).call(tool, payload)
+
+def call_many(url, calls, parallel=False):
+    """Independent tool calls in a single /tools/batch round trip."""
+    with lease(url):
+        return client(url).batch(calls, parallel=parallel)
+
+def wait_job(url, submitted, poll=2.0):
+    """Follow a queued run job: print its log lines as they arrive and return the final job state."""
+    job_id, offset = submitted.get("jobId"), 0
+    if job_id is None:  # finished without a job (e.g. wait: true)
+        return submitted
+    while True:
+        chunk = call(url, "job_logs", {"jobId": job_id, "offset": offset})
+        lines = chunk.get("lines") or []
+        for line in lines:
+            print(line)
+        offset = chunk.get("next", offset + len(lines))
+        if lines:
+            continue  # keep draining before sleeping
+        if chunk.get("status") not in ("queued", "running"):
+            return call(url, "job_status", {"jobId": job_id})
+        time.sleep(poll)
+
+def resolve_locators(pages):
+    """{appUrl: [steps, ...]} -> {appUrl: {target: locator | None}} from the live pages.
+
+    One pooled browser session on the Playwright server visits each page once and matches all of its targets in
+    a single resolve_locators call (the server caches the page index per URL + DOM hash). Without a reachable
+    Playwright server this returns {} and targets fall back to element ids.
+    """
+    import requests  # imported lazily, as in client.py; only the exception type is needed here
+    out = {}
+    try:
+        # any full node will do: the session and its page index live there only for this call
+        url = PW.pick(generator_ok=False)
+        session = call(url, "launch_browser", {"headless": True}).get("sessionId")
+    except (ToolError, NoHealthyNode, requests.RequestException) as e:
+        # a generator-only node answers {"error": "tool launch_browser is disabled: ..."} (a ToolError)
+        print(f"locator resolution skipped: {e}", file=sys.stderr)
+        return out
+    if not session:
+        print("locator resolution skipped: launch_browser returned no sessionId", file=sys.stderr)
+        return out
+    try:
+        for app_url, step_lists in pages.items():
+            targets = sorted({s["target"] for steps in step_lists for s in steps if s.get("target")})
+            if not app_url or not targets:
+                continue
+            try:
+                res = call(url, "resolve_locators", {"sessionId": session, "url": app_url, "targets": targets})
+            except ToolError as e:
+                print(f"[{app_url}] locator resolution failed: {e}", file=sys.stderr)
+                continue
+            if res.get("unresolved"):
+                print(f"[{app_url}] unresolved targets: {', '.join(res['unresolved'])}", file=sys.stderr)
+            out[app_url] = res.get("locators") or {}
+    finally:
+        call(url, "close_session", {"sessionId": session})
+    return out
+
+def dry_run(items, concurrency=8):
+    """{name: dry_run_steps result} for spec items ({name, steps}), each executed on its own pooled page.
+
+    Best-effort like resolve_locators: without a reachable Playwright server (or one in generator-only mode) this
+    returns {} and every item counts as unchecked.
+    """
+    import requests  # imported lazily, as in client.py; only the exception type is needed here
+    try:
+        url = PW.pick(generator_ok=False)
+    except NoHealthyNode as e:
+        print(f"dry run skipped: {e}", file=sys.stderr)
+        return {}
+
+    def one(item):
+        try:
+            res = call(url, "dry_run_steps", {"steps": item["steps"]})
+        except (ToolError, requests.RequestException) as e:
+            return item["name"], {"error": str(e)}
+        return item["name"], res
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        out = dict(pool.map(one, items))
+    unchecked = [r["error"] for r in out.values() if "steps" not in r]
+    if unchecked:
+        print(f"dry run unavailable for {len(unchecked)} scenario(s): {unchecked[0]}", file=sys.stderr)
+    return {name: r for name, r in out.items() if "steps" in r}
+
+def _rejected(name, res):
+    """Print why a scenario failed its dry run; True when it did."""
+    if res is None or res.get("ok"):
+        return False
+    step = res["steps"][res["failedAt"]]
+    where = f" {step['selector']}" if step.get("selector") else ""
+    print(f"[{name}] rejected by dry run: step {step['index'] + 1} {step['action']}{where}: {step['error']}",
+          file=sys.stderr)
+    return True
+
+def with_selectors(steps, found):
+    """Steps for the Playwright renderer: `selector` wherever the target resolved."""
+    return [{**s, "selector": found[s["target"]]["selector"]} if found.get(s.get("target")) else s for s in steps]
+
+def pom_fields(steps, found, elements):
+    """Steps for the TestNG renderer, targets renamed to POM fields; adds the fields to `elements` (name -> spec).
+
+    Unresolved targets become id locators, as before.
+    """
+    out = []
+    for s in steps:
+        tgt = s.get("target")
+        if not tgt:
+            out.append(s)
+            continue
+        loc = found.get(tgt)
+        field = java_identifier(tgt)  # the Selenium server names the POM field and its uses the same way
+        elements.setdefault(field, {"name": field, "locatorType": loc["locatorType"] if loc else "id",
+                                    "locatorValue": loc["locatorValue"] if loc else tgt})
+        out.append({**s, "target": field})
+    return out
+
+def publish(url, tests_root, tests_repo, paths):
+    """Commit just the generated paths and fast-forward push; a rejected push is reported, never forced."""
+    out = call(url, "git_push", {"projectRoot": tests_root, "remoteUrl": tests_repo, "branch": "main", "paths": paths})
+    if not out.get("ok"):
+        print("git push failed:", out.get("error"), file=sys.stderr)
+    return out
+
+def call_stream(url, tool, payload=None):
+    """Call a batch tool on /tool/stream and yield each NDJSON result line as it arrives."""
+    return client(url).stream(tool, payload)
+
+def load_scenarios(path):
+    """Load a --scenarioFile: JSONL (one object or string per line) or YAML (a list, or {scenarios: [...]})."""
+    with open(path, encoding="utf-8") as fh:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            data = yaml.safe_load(fh) or []
+            entries = data.get("scenarios", []) if isinstance(data, dict) else data
+        else:
+            entries = [json.loads(line) for line in fh if line.strip()]
+    return [{"scenario": e} if isinstance(e, str) else e for e in entries]
 
-def run_playwright(app_url, scenario_text, tests_root, tests_repo):
+def _scenario_name(entry):
+    """The entry's name, else a slug of the scenario plus a hash of it: the same scenario gets the same file names
+    in every run, and no two scenarios share a file (or overwrite each other on a shared testsRoot)."""
+    return entry.get("name") or _slug(entry["scenario"])
+
+def _api_requests(entry):
+    """parse_api for a batch entry; a malformed line is reported with the scenario's name."""
+    try:
+        return parse_api(entry["scenario"])
+    except ScenarioError:
+        print(f"[{_scenario_name(entry)}] malformed API scenario", file=sys.stderr)
+        raise
+
+def _page_name(url):
+    """File / class name for the scenarios grouped on one page or base URL."""
+    return _slug(re.sub(r"^[a-z]+://", "", url or "", flags=re.I))
+
+def _slug(text):
+    words = re.findall(r"[a-z0-9]+", text.lower())[:5]
+    return "-".join(words + [hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]])
+
+def _grouped(pairs):
+    """{key: [values]} from (key, value) pairs, keys in first-seen order."""
+    out = {}
+    for key, value in pairs:
+        out.setdefault(key, []).append(value)
+    return out
+
+def _class_suffix(name):
+    return "".join(p.capitalize() for p in re.split(r"[^0-9A-Za-z]+", name) if p)
+
+def _chunks(items, size):
+    return [items[k:k + size] for k in range(0, len(items), size)]
+
+def _stream_batch(pick, batch):
+    url = pick()
+    out = []
+    with lease(url):
+        for res in call_stream(url, "generate_batch", batch):
+            print(f"[{res.get('name') or res.get('path')}] {res.get('error', 'ok')}", file=sys.stderr)
+            out.append(res)
+    return out
+
+def _fan_out(pick, batches, concurrency):
+    """Send generate_batch chunks with at most `concurrency` requests in flight; return results in input order.
+
+    `pick()` chooses the node for each chunk: the testsRoot's node when the chunk writes files there, the
+    least-loaded node for pure renders.
+    """
+    results = [None] * len(batches)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        # each worker runs in a copy of this context, so its calls stay inside the current trace
+        futures = {pool.submit(contextvars.copy_context().run, _stream_batch, pick, b): n
+                   for n, b in enumerate(batches)}
+        for fut in as_completed(futures):
+            results[futures[fut]] = fut.result()
+    return [res for chunk in results for res in chunk]
+
+def _parse_entries(entries, app_url):
+    """(entry, appUrl, steps) per scenario, plus the steps grouped by page for resolve_locators."""
+    parsed, pages = [], {}
+    for e in entries:
+        url = e.get("appUrl") or app_url
+        steps = _ensure_open_step(parse_ui(e["scenario"]), url)
+        parsed.append((e, url, steps))
+        pages.setdefault(url, []).append(steps)
+    return parsed, pages
+
+def run_playwright_batch(entries, app_url, tests_root, tests_repo, concurrency, batch_size, check=True,
+                         group="page"):
+    parsed, pages = _parse_entries(entries, app_url)
+    found = resolve_locators(pages)
+    items, urls = [], {}
+    for e, url, steps in parsed:
+        name = re.sub(r"[^0-9A-Za-z_-]+", "-", _scenario_name(e)) + ".spec.ts"
+        urls[name] = url
+        items.append({"name": name, "scenario": e["scenario"], "steps": with_selectors(steps, found.get(url, {}))})
+    if check:
+        # steps run on pooled pages first: a broken selector costs milliseconds here instead of a test run
+        checked = dry_run(items, concurrency)
+        items = [it for it in items if not _rejected(it["name"], checked.get(it["name"]))]
+        print(f"dry run: {len(checked)} checked, {len(items)} of {len(parsed)} scenarios kept", file=sys.stderr)
+        if not items:
+            return
+    if group == "page":
+        # one spec per page: its scenarios share a file, so one worker and browser run them instead of one each
+        items = [{"name": _page_name(url) + ".spec.ts", "scenario": url,
+                  "scenarios": [{"scenario": it["scenario"], "steps": it["steps"]} for it in group_items]}
+                 for url, group_items in _grouped((urls[it["name"]], it) for it in items).items()]
+    batches = [{"testsRoot": tests_root, "items": chunk} for chunk in _chunks(items, batch_size)]
+    node = PW.for_root(tests_root)  # specs are written into testsRoot on that node, where the run happens too
+    _fan_out(lambda: node, batches, concurrency)
+    print(wait_job(node, call(node, "run_tests", {"testsRoot": tests_root, **RUN_REUSE})))
+
+def selenium_ui_items(entries, app_url, group="page"):
+    """generate_batch items for UI scenarios: a page object per page URL (GeneratedPage<page>, with that page's URL
+    and locators) and the test classes that use it. Pages never share a POM, so a target name found on several
+    pages (a "submit" on /login and on /checkout) gets each page's own locator."""
+    parsed, pages = _parse_entries(entries, app_url)
+    found = resolve_locators(pages)
+    elements, scenarios = {}, []  # elements: {page URL: {field: element spec}}
+    for e, url, steps in parsed:
+        scenarios.append((url, {"name": _scenario_name(e), "description": e["scenario"],
+                                "steps": pom_fields(steps, found.get(url, {}), elements.setdefault(url, {}))}))
+    items, pom = [], {}
+    for url, fields in elements.items():
+        suffix = _class_suffix(_page_name(url))
+        pom[url] = f"com.example.pages.GeneratedPage{suffix}"
+        items.append({"kind": "pom", "spec": {"packageName": "com.example.pages", "className": f"GeneratedPage{suffix}",
+                                              "url": url, "elements": list(fields.values())}})
+    if group == "page":
+        classes = [(url, f"GeneratedUiTest{_class_suffix(_page_name(url))}", {"scenarios": page_scenarios})
+                   for url, page_scenarios in _grouped(scenarios).items()]
+    else:
+        classes = [(url, f"GeneratedUiTest{_class_suffix(s['name'])}", {"steps": s["steps"]}) for url, s in scenarios]
+    for url, class_name, body in classes:
+        items.append({"kind": "ui", "spec": {"packageName": "com.example.tests", "className": class_name,
+                                             "imports": [pom[url]], "testGroups": ["smoke"], "pageObjectFqn": pom[url],
+                                             **body}})
+    return items
+
+def run_selenium_batch(entries, app_url, test_type, tests_root, tests_repo, concurrency, batch_size, group="page"):
+    """group "page": one test class per page (UI, one driver per class) or base URL (API, one shared
+    RequestSpecification), a @Test method per scenario; "scenario": one class per scenario."""
+    items = []
+    if test_type == "ui":
+        items = selenium_ui_items(entries, app_url, group)
+    elif group == "page":
+        scenarios = ((e.get("appUrl") or app_url, {"name": _scenario_name(e), "description": e["scenario"],
+                                                   "requests": _api_requests(e)}) for e in entries)
+        for base_url, url_scenarios in _grouped(scenarios).items():
+            items.append({"kind": "api", "spec": {
+                "packageName": "com.example.api",
+                "className": f"GeneratedApiTest{_class_suffix(_page_name(base_url))}",
+                "baseUrl": base_url,
+                "scenarios": url_scenarios
+            }})
+    else:
+        for e in entries:
+            items.append({"kind": "api", "spec": {
+                "packageName": "com.example.api",
+                "className": f"GeneratedApiTest{_class_suffix(_scenario_name(e))}",
+                "baseUrl": e.get("appUrl") or app_url,
+                "requests": _api_requests(e)
+            }})
+    # Java sources are rendered on whichever node is least loaded, then written and run on the testsRoot's node
+    results = _fan_out(SEL.pick, [{"items": chunk} for chunk in _chunks(items, batch_size)], concurrency)
+    files = ({k: r[k] for k in ("path", "content", "overwrite")} for r in results if "error" not in r)
+
+    # streamed upload: files are written (atomically, in parallel) as they arrive instead of in one huge body
+    node = SEL.for_root(tests_root)
+    with lease(node):
+        out = client(node).upload_files({
+            "projectRoot": tests_root,
+            "createBuildIfMissing": True,
+            "groupId": "com.example",
+            "artifactId": f"{test_type}-tests",
+            "version": "0.1.0"
+        }, files)
+    for err in out.get("errors") or []:
+        print(f"[{err.get('path')}] write failed: {err.get('error')}", file=sys.stderr)
+    written = out.get("written") or []
+
+    # only the regenerated test classes run (--tests filters); Gradle's daemon and caches stay warm
+    print(wait_job(node, call(node, "run_gradle_tests", {"projectRoot": tests_root, "changedFiles": written,
+                                                        **RUN_REUSE})))
+    publish(node, tests_root, tests_repo, written + (out.get("unchanged") or []) + GRADLE_FILES)
+
+def run_playwright(app_url, scenario_text, tests_root, tests_repo, check=True):
     steps = _ensure_open_step(parse_ui(scenario_text), app_url)
     # Inject an 'open' step if missing, using the CLI --appUrl
     if app_url and not any(s.get("action") == "open" for s in steps):
         steps.insert(0, {"action": "open", "value": app_url})
-    call(PW_URL, "launch_browser", {"headless": True})
-    call(PW_URL, "goto", {"url": app_url})
-    call(PW_URL, "generate_playwright_test", {
+    # targets -> selectors on the loaded page instead of assuming element ids
+    steps = with_selectors(steps, resolve_locators({app_url: [steps]}).get(app_url, {}))
+    name = re.sub(r"[^0-9A-Za-z_-]+", "-", _scenario_name({"scenario": scenario_text})) + ".spec.ts"
+    if check:
+        res = dry_run([{"name": name, "steps": steps}]).get(name)
+        if _rejected(name, res):
+            sys.exit(1)  # nothing written, no test run started
+    node = PW.for_root(tests_root)
+    call(node, "generate_playwright_test", {
         "testsRoot": tests_root,
-        "name": "generated.spec.ts",
+        "name": name,
         "scenario": scenario_text,
         "steps": steps
     })
-    print(call(PW_URL, "run_tests", {"testsRoot": tests_root}))
-    #call(PW_URL, "git_push", {"projectRoot": tests_root, "remoteUrl": tests_repo, "branch": "main"})
+    print(wait_job(node, call(node, "run_tests", {"testsRoot": tests_root, **RUN_REUSE})))
+    #call(node, "git_push", {"projectRoot": tests_root, "remoteUrl": tests_repo, "branch": "main"})
 
 def run_selenium_ui(app_url, scenario_text, tests_root, tests_repo):
     steps = _ensure_open_step(parse_ui(scenario_text), app_url)
     if app_url and not any(s.get("action") == "open" for s in steps):
         steps.insert(0, {"action": "open", "value": app_url})
-    # Example POM with common fields; adjust to your app’s selectors
-    pom_out = call(SEL_URL, "generate_pom_ui", {
+    # POM fields come from the targets resolved on the live page (via the Playwright server's browser pool)
+    elements = {}
+    steps = pom_fields(steps, resolve_locators({app_url: [steps]}).get(app_url, {}), elements)
+    # page object and test named per scenario, so a batch's page objects are never overwritten with this
+    # scenario's fields only
+    suffix = _class_suffix(_scenario_name({"scenario": scenario_text}))
+    pom_out, test_out = call_many(SEL.pick(), [("generate_pom_ui", {
         "packageName": "com.example.pages",
-        "className": "GeneratedPage",
+        "className": f"GeneratedPage{suffix}",
         "url": app_url,
-        "elements": [
-            {"name": "username", "locatorType": "id", "locatorValue": "username"},
-            {"name": "password", "locatorType": "id", "locatorValue": "password"},
-            {"name": "submit",   "locatorType": "css", "locatorValue": "button[type='submit']"}
-        ]
-    })
-
-    test_out = call(SEL_URL, "generate_testng_ui_test", {
+        "elements": list(elements.values())
+    }), ("generate_testng_ui_test", {
         "packageName": "com.example.tests",
-        "className": "GeneratedUiTest",
-        "imports": ["com.example.pages.GeneratedPage"],
+        "className": f"GeneratedUiTest{suffix}",
+        "imports": [f"com.example.pages.GeneratedPage{suffix}"],
         "testGroups": ["smoke"],
-        "pageObjectFqn": "com.example.pages.GeneratedPage",
+        "pageObjectFqn": f"com.example.pages.GeneratedPage{suffix}",
         "steps": steps
-    })
+    })], parallel=True)  # both renders in one round trip
 
-    call(SEL_URL, "write_files", {
+    node = SEL.for_root(tests_root)
+    out = call(node, "write_files", {
         "projectRoot": tests_root,
         "files": [pom_out, test_out],
         "createBuildIfMissing": True,
@@ -74,22 +439,26 @@ def run_selenium_ui(app_url, scenario_text, tests_root, tests_repo):
         "artifactId": "ui-tests",
         "version": "0.1.0"
     })
+    written = out.get("written") or []
 
-    print(call(SEL_URL, "run_gradle_tests", {"projectRoot": tests_root}))
-    call(SEL_URL, "git_push", {"projectRoot": tests_root, "remoteUrl": tests_repo, "branch": "main"})
+    # only the regenerated test classes run (--tests filters); Gradle's daemon and caches stay warm
+    print(wait_job(node, call(node, "run_gradle_tests", {"projectRoot": tests_root, "changedFiles": written,
+                                                        **RUN_REUSE})))
+    publish(node, tests_root, tests_repo, written + (out.get("unchanged") or []) + GRADLE_FILES)
 
 def run_selenium_api(base_url, scenario_text, tests_root, tests_repo):
     # Parse NL → RestAssured request specs
     requests_spec = parse_api(scenario_text)
 
-    api_out = call(SEL_URL, "generate_testng_api_test", {
+    api_out = call(SEL.pick(), "generate_testng_api_test", {
         "packageName": "com.example.api",
-        "className": "GeneratedApiTest",
+        "className": f"GeneratedApiTest{_class_suffix(_scenario_name({'scenario': scenario_text}))}",
         "baseUrl": base_url,
         "requests": requests_spec
     })
 
-    call(SEL_URL, "write_files", {
+    node = SEL.for_root(tests_root)
+    out = call(node, "write_files", {
         "projectRoot": tests_root,
         "files": [api_out],
         "createBuildIfMissing": True,
@@ -97,28 +466,74 @@ def run_selenium_api(base_url, scenario_text, tests_root, tests_repo):
         "artifactId": "api-tests",
         "version": "0.1.0"
     })
+    written = out.get("written") or []
 
-    print(call(SEL_URL, "run_gradle_tests", {"projectRoot": tests_root}))
-    call(SEL_URL, "git_push", {"projectRoot": tests_root, "remoteUrl": tests_repo, "branch": "main"})
+    # only the regenerated test classes run (--tests filters); Gradle's daemon and caches stay warm
+    print(wait_job(node, call(node, "run_gradle_tests", {"projectRoot": tests_root, "changedFiles": written,
+                                                        **RUN_REUSE})))
+    publish(node, tests_root, tests_repo, written + (out.get("unchanged") or []) + GRADLE_FILES)
+
+def run(args):
+    if args.scenarioFile:
+        entries = load_scenarios(args.scenarioFile)
+        if args.framework == "playwright":
+            run_playwright_batch(entries, args.appUrl, args.testsRoot, args.testsRepo,
+                                 args.concurrency, args.batchSize, not args.noDryRun, args.group)
+        else:
+            run_selenium_batch(entries, args.appUrl, args.testType, args.testsRoot, args.testsRepo,
+                               args.concurrency, args.batchSize, args.group)
+    elif args.framework == "playwright":
+        run_playwright(args.appUrl, args.scenario, args.testsRoot, args.testsRepo, not args.noDryRun)
+    elif args.testType == "ui":
+        run_selenium_ui(args.appUrl, args.scenario, args.testsRoot, args.testsRepo)
+    else:
+        run_selenium_api(args.appUrl, args.scenario, args.testsRoot, args.testsRepo)
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--framework", required=True, choices=["playwright", "selenium-testng"])
     ap.add_argument("--testType", default="ui", choices=["ui","api"])  # ui (Selenium) | api (RestAssured)
     ap.add_argument("--appUrl", required=True)
-    ap.add_argument("--scenario", required=True)
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--scenario")
+    src.add_argument("--scenarioFile", help="JSONL or YAML file with many scenarios (batch mode)")
+    ap.add_argument("--concurrency", type=int, default=8, help="max generate_batch requests in flight")
+    ap.add_argument("--batchSize", type=int, default=25, help="scenarios per generate_batch request")
+    ap.add_argument("--group", default="page", choices=["page", "scenario"],
+                    help="batch mode: one test class / spec per page (UI) or base URL (API) with a test per "
+                         "scenario, or one per scenario")
     ap.add_argument("--testsRoot", default="./tests")
     ap.add_argument("--testsRepo", required=True)
+    ap.add_argument("--noDryRun", action="store_true",
+                    help="write Playwright specs without executing their steps on a pooled page first")
+    ap.add_argument("--rerun", default="always", choices=list(RERUN_POLICIES),
+                    help="always (default): run every test; changed: reuse results of tests whose sources, toolchain "
+                         "and app build match a green run; stable: only reuse tests that passed first time twice in a "
+                         "row")
+    ap.add_argument("--appBuildId", help="build id / version of the app under test (default: its ETag or "
+                                         "Last-Modified header)")
+    ap.add_argument("--pwNodes", help="comma-separated Playwright server URLs (default: PW_URL)")
+    ap.add_argument("--selNodes", help="comma-separated Selenium server URLs (default: SEL_URL)")
     args = ap.parse_args()
+    POOL_SIZE = max(POOL_SIZE, args.concurrency)
+    if args.pwNodes:
+        PW = NodePool("playwright", args.pwNodes, client)
+    if args.selNodes:
+        SEL = NodePool("selenium", args.selNodes, client)
+    setup_tracing("router")
+    print(f"run id: {RUN_ID}", file=sys.stderr)
+    RUN_REUSE = run_reuse(args.rerun, args.appUrl, args.appBuildId)
 
+    import requests
     try:
-        if args.framework == "playwright":
-            run_playwright(args.appUrl, args.scenario, args.testsRoot, args.testsRepo)
-        else:
-            if args.testType == "ui":
-                run_selenium_ui(args.appUrl, args.scenario, args.testsRoot, args.testsRepo)
-            else:
-                run_selenium_api(args.appUrl, args.scenario, args.testsRoot, args.testsRepo)
+        with span(f"router {args.framework} {args.testType}", **{"router.run_id": RUN_ID}):
+            run(args)
     except requests.HTTPError as e:
         print("Server error:", e.response.text, file=sys.stderr)
         sys.exit(1)
+    except (ToolError, NoHealthyNode) as e:
+        print("Server error:", e, file=sys.stderr)
+        sys.exit(1)
+    except ScenarioError as e:
+        print("Scenario error:", e, file=sys.stderr)
+        sys.exit(1)
@@ -1,60 +1,211 @@
 # router/scenario_parser.py
-# Simple parser that turns NL into structured steps for UI and API.
+# Table-driven parser that turns NL into structured steps for UI and API.
+#
+# Each grammar is a list of (action, regex) rules compiled once into a single alternation; one match per line
+# picks the rule (via the outer group name) and its fields, instead of re-lowering and re-splitting the line for
+# every verb. New verbs are added with Grammar.add(). The iter_* functions parse lazily from a string or any
+# iterable of lines (e.g. an open file), yielding compact __slots__ records; parse_ui / parse_api keep returning
+# the dicts the servers expect.
+#
+# UI lines that match no rule become `custom` steps (rendered as TODOs). API scenarios are stricter, since a bad line
+# would otherwise turn into a request with a nonsense method: a line that is neither a request (<METHOD> [path])
+# nor a well-formed continuation of the request above it raises ScenarioError with its line number.
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
 
-def parse_ui(ui_text: str):
-    """Return list of steps dicts: {action, target?, value?}."""
-    steps = []
-    for raw in ui_text.splitlines():
+
+@dataclass(slots=True)
+class Step:
+    action: str
+    target: str | None = None
+    value: str | None = None
+
+    def as_dict(self) -> dict:
+        d = {"action": self.action}
+        if self.target is not None:
+            d["target"] = self.target
+        if self.value is not None:
+            d["value"] = self.value
+        return d
+
+
+@dataclass(slots=True)
+class ApiRequest:
+    method: str
+    path: str = "/"
+    status: int = 200
+    headers: dict = field(default_factory=dict)
+    query: dict = field(default_factory=dict)
+    body: str | None = None
+    json_paths: dict = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "method": self.method,
+            "path": self.path,
+            "headers": self.headers,
+            "query": self.query,
+            "body": self.body,
+            "expect": {"status": self.status, "jsonPaths": self.json_paths}
+        }
+
+
+class ScenarioError(ValueError):
+    """A scenario line that cannot be parsed; `line` is its 1-based number."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+_GROUP = re.compile(r"\(\?P<(\w+)>")
+
+
+class Grammar:
+    """Ordered (action, pattern) rules compiled into one case-insensitive full-line regex."""
+
+    def __init__(self, rules: list[tuple[str, str]]):
+        self._rules = list(rules)
+        self._compile()
+
+    def add(self, action: str, pattern: str, first: bool = False):
+        """Register a new verb; `first` gives it priority over the built-in rules."""
+        if first:
+            self._rules.insert(0, (action, pattern))
+        else:
+            self._rules.append((action, pattern))
+        self._compile()
+
+    def match(self, line: str):
+        """Return (action, fields) for the first rule matching the whole line, or None."""
+        m = self._regex.fullmatch(line)
+        if m is None:
+            return None
+        idx = int(m.lastgroup[1:])
+        prefix = f"r{idx}_"
+        fields = {k[len(prefix):]: v for k, v in m.groupdict().items() if k.startswith(prefix) and v is not None}
+        return self._rules[idx][0], fields
+
+    def _compile(self):
+        # field groups are namespaced per rule (r3_target) so every alternative can use the same field names;
+        # the outer group (r3) closes last, so match.lastgroup identifies the rule
+        alts = []
+        for n, (_, pat) in enumerate(self._rules):
+            body = _GROUP.sub(lambda g: f"(?P<r{n}_{g[1]}>", pat)
+            alts.append(f"(?P<r{n}>{body})")
+        self._regex = re.compile("|".join(alts), re.IGNORECASE | re.DOTALL)
+
+
+UI_GRAMMAR = Grammar([
+    # only a URL or a root-relative path makes an 'open' step; anything else falls through to 'custom'
+    ("open", r"open\s+(?P<value>(?:https?://|/).*)"),
+    ("type", r"type\s+(?P<value>.+?)\s+into\s+(?P<target>.+)"),
+    ("click", r"click\s+(?P<target>.+)"),
+    ("assertText", r"assert\s+text\s+(?P<value>.+?)\s+on\s+(?P<target>.+)"),
+    ("select", r"select\s+(?P<value>.+?)\s+(?:from|in)\s+(?P<target>.+)"),
+    ("hover", r"hover\s+(?:over\s+)?(?P<target>.+)"),
+    ("wait", r"wait\s+(?:for\s+)?(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>ms|milliseconds?|s|secs?|seconds?)?"),
+    ("waitFor", r"wait\s+for\s+(?P<target>.+)"),
+])
+
+API_GRAMMAR = Grammar([
+    # continuation lines attach to the request above them
+    ("header", r"header\s+(?P<key>[^\s:=]+)\s*[:=]\s*(?P<value>.*)"),
+    ("query", r"query\s+(?P<key>[^\s=]+)\s*=\s*(?P<value>.*)"),
+    ("body", r"body\s+(?P<value>.+)"),
+    ("expectJson", r"expect\s+(?P<path>\$\S*)\s*(?:==?|equals)\s*(?P<value>.+)"),
+    ("expectStatus", r"expect\s+(?:status\s+)?(?P<status>\d{3})"),
+])
+
+# METHOD [path] [... expect <status>]; any line that is not a continuation starts a new request
+_REQUEST = re.compile(r"(?P<method>\S+)(?:\s+(?P<path>\S+))?(?P<rest>.*)", re.DOTALL)
+_INLINE_STATUS = re.compile(r"expect\s+(\d+)", re.IGNORECASE)
+METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+# how each continuation keyword is meant to be written, for error messages
+_CONTINUATIONS = {
+    "header": "'header <Name>: <value>'", "query": "'query <key>=<value>'", "body": "'body <json>'",
+    "expect": "'expect <status>' or 'expect $.path == <value>'",
+}
+
+
+def _lines(source: str | Iterable[str]) -> Iterator[tuple[int, str]]:
+    lines = source.splitlines() if isinstance(source, str) else source
+    for n, raw in enumerate(lines, 1):
         line = raw.strip()
-        if not line:
+        if line:
+            yield n, line
+
+
+def _unquote(v: str) -> str:
+    v = v.strip()
+    return v[1:-1] if len(v) >= 2 and v[0] == v[-1] and v[0] in "\"'" else v
+
+
+def iter_ui(source: str | Iterable[str]) -> Iterator[Step]:
+    """Lazily parse UI steps from a string or an iterable of lines."""
+    for _, line in _lines(source):
+        hit = UI_GRAMMAR.match(line)
+        if hit is None:
+            yield Step("custom", value=line)
             continue
-        low = line.lower()
-        if low.startswith("open "):
-            after = line.split(" ", 1)[1].strip()
-            # Only treat as an 'open' step if it's clearly a URL or a root-relative path
-            if after.startswith(("http://", "https://", "/")):
-                steps.append({"action": "open", "value": after})
-            else:
-                steps.append({"action": "custom", "value": line})
-        elif low.startswith("type ") and " into " in low:
-            _, rest = line.split(" ", 1)
-            value, target = rest.split(" into ", 1)
-            steps.append({"action": "type", "target": target.strip(), "value": value.strip()})
-        elif low.startswith("click "):
-            target = line.split(" ", 1)[1].strip()
-            steps.append({"action": "click", "target": target})
-        elif low.startswith("assert text ") and " on " in low:
-            part = line[len("assert text "):]
-            value, target = part.split(" on ", 1)
-            steps.append({"action": "assertText", "target": target.strip(), "value": value.strip()})
+        action, f = hit
+        if action == "wait":
+            # no unit reads as seconds ("wait 2"); ms/milliseconds as given
+            ms = float(f["value"]) * (1 if (f.get("unit") or "s").lower().startswith("m") else 1000)
+            yield Step("wait", value=str(int(ms)))
         else:
-            steps.append({"action": "custom", "value": line})
-    return steps
+            yield Step(action, f.get("target", "").strip() or None, f["value"].strip() if "value" in f else None)
 
 
-def parse_api(api_text: str):
-    """Return list of API request specs: {method, path, expect:{status}, headers, query, body}."""
-    reqs = []
-    for raw in api_text.splitlines():
-        line = raw.strip()
-        if not line:
+def iter_api(source: str | Iterable[str]) -> Iterator[ApiRequest]:
+    """Lazily parse API requests; header/query/body/expect lines extend the request above them. Raises
+    ScenarioError on a line that is neither."""
+    current: ApiRequest | None = None
+    for n, line in _lines(source):
+        hit = API_GRAMMAR.match(line) if current is not None else None
+        if hit is not None:
+            action, f = hit
+            if action == "header":
+                current.headers[f["key"]] = _unquote(f["value"])
+            elif action == "query":
+                current.query[f["key"]] = _unquote(f["value"])
+            elif action == "body":
+                current.body = f["value"].strip()
+            elif action == "expectJson":
+                current.json_paths[f["path"]] = _unquote(f["value"])
+            else:
+                current.status = int(f["status"])
             continue
-        parts = line.split()
-        method = parts[0].upper()
-        path = parts[1] if len(parts) > 1 else "/"
-        status = 200
-        if "expect" in line.lower():
-            try:
-                status = int(line.lower().split("expect")[-1].strip().split()[0])
-            except Exception:
-                status = 200
-        reqs.append({
-            "name": f"{method} {path}",
-            "method": method,
-            "path": path,
-            "headers": {},
-            "query": {},
-            "body": None,
-            "expect": {"status": status, "jsonPaths": {}}
-        })
-    return reqs
+        m = _REQUEST.fullmatch(line)
+        keyword = m["method"].lower()
+        if keyword in _CONTINUATIONS:
+            if current is None:
+                raise ScenarioError(n, f"{line!r} has no request above it to extend")
+            raise ScenarioError(n, f"malformed {keyword} line {line!r}; expected {_CONTINUATIONS[keyword]}")
+        if m["method"].upper() not in METHODS:
+            raise ScenarioError(n, f"{line!r} is not a request: expected <METHOD> <path> with METHOD one of "
+                                   f"{', '.join(sorted(METHODS))}")
+        if current is not None:
+            yield current
+        current = ApiRequest(m["method"].upper(), m["path"] or "/")
+        inline = _INLINE_STATUS.findall(m["rest"])
+        if inline:
+            current.status = int(inline[-1])
+    if current is not None:
+        yield current
+
+
+def parse_ui(ui_text: str | Iterable[str]):
+    """Return list of steps dicts: {action, target?, value?}."""
+    return [s.as_dict() for s in iter_ui(ui_text)]
+
+
+def parse_api(api_text: str | Iterable[str]):
+    """Return list of API request specs: {method, path, expect:{status}, headers, query, body}."""
+    return [r.as_dict() for r in iter_api(api_text)]
@@ -0,0 +1,2 @@
+# servers/mcp_common
+# Helpers shared by the MCP servers (tool registry, async subprocesses). Each server adds servers/ to sys.path.
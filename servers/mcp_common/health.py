@@ -0,0 +1,23 @@
+# servers/mcp_common/health.py
+# GET /health: liveness plus the load figures the router schedules by (see router/nodes.py).
+#
+# `busy` is the number the router compares across nodes: tool calls executing or waiting for a lane, plus queued
+# and running jobs. `cpu` is the 1-minute load average per core (None where the OS has no load average).
+import os, time
+
+_STARTED = time.time()
+
+
+def snapshot(registry, jobs, **extra) -> dict:
+    stats = jobs.stats()
+    cpus = os.cpu_count() or 1
+    try:
+        load1 = os.getloadavg()[0]
+    except (AttributeError, OSError):  # Windows
+        load1 = None
+    queued, running = stats.get("queued", 0), stats.get("running", 0)
+    return {"ok": True, "pid": os.getpid(), "uptime": round(time.time() - _STARTED, 1),
+            "inFlight": registry.in_flight, "waiting": registry.waiting,
+            "jobs": {"queued": queued, "running": running, "workers": stats["workers"]},
+            "busy": registry.in_flight + registry.waiting + queued + running,
+            "cpus": cpus, "cpu": None if load1 is None else round(load1 / cpus, 3), **extra}
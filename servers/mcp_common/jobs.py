@@ -0,0 +1,255 @@
+# servers/mcp_common/jobs.py
+# In-process job queue for long-running tools (run_tests, run_gradle_tests).
+#
+# Submitting returns a job id immediately; a fixed pool of worker tasks picks jobs up in FIFO order, so the
+# number of suites running side by side is capped by `workers`. Output is appended line by line to the job's
+# log file (MCP_JOB_LOG_DIR, default a temp dir) while the process runs and is read back in byte ranges
+# (job_logs offset/next), so server memory stays flat however much a suite prints. follow() streams the same log
+# (POST /tool/stream with job_logs) until the job finishes.
+# A job runs in a copy of the submitting request's context, so its request id and trace span carry over.
+# Jobs submitted with a key are coalesced (mcp_common.singleflight): an identical submission joins the queued or
+# running job, or gets a job that succeeded less than singleflight.TTL seconds ago, and cancelling it cancels it
+# for everyone who joined.
+import asyncio, contextlib, contextvars, os, pathlib, tempfile, time, uuid
+from pydantic import BaseModel
+from mcp_common import metrics, singleflight, tracing
+from mcp_common.registry import NotFound
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+
+
+class JobRef(BaseModel):
+    jobId: str
+
+class JobLogs(BaseModel):
+    jobId: str
+    offset: int = 0  # byte offset into the log; pass back the previous `next`
+    limit: int = 1000  # lines
+    maxBytes: int = 1 << 20
+
+
+class Job:
+    def __init__(self, tool: str, fn, log_dir: pathlib.Path, key: str | None = None):
+        self.id = uuid.uuid4().hex
+        self.tool = tool
+        self.fn = fn
+        self.key = key
+        self.joined = 0  # identical submissions answered with this job
+        self.status = QUEUED
+        self.created = time.time()
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.result: dict | None = None
+        self.error: str | None = None
+        self.log_path = log_dir / f"{self.id}.log"
+        self.log_lines = 0
+        self.log_bytes = 0
+        self._log = None
+        self.task: asyncio.Task | None = None
+        self.done = asyncio.Event()
+        self.request_id = tracing.request_id.get()
+        self.context = contextvars.copy_context()
+
+    def log(self, stream: str, line: str):
+        if self._log is None:
+            self._log = open(self.log_path, "ab")
+        line = line.replace("\n", " ")
+        data = f"[{stream}] {line}\n".encode("utf-8", "replace")
+        self._log.write(data)
+        self.log_lines += 1
+        self.log_bytes += len(data)
+
+    def read_log(self, offset: int, limit: int, max_bytes: int) -> tuple[list[str], int]:
+        """Whole lines from byte `offset`: at most `limit` lines / about `max_bytes`; returns (lines, next offset)."""
+        if self._log is not None:
+            self._log.flush()
+        offset = max(0, min(offset, self.log_bytes))
+        lines, size = [], 0
+        try:
+            fh = open(self.log_path, "rb")
+        except FileNotFoundError:
+            return lines, offset
+        with fh:
+            fh.seek(offset)
+            while len(lines) < limit and (size < max_bytes or not lines):
+                raw = fh.readline()
+                if not raw.endswith(b"\n"):  # nothing more, or a line still being written
+                    break
+                size += len(raw)
+                lines.append(raw[:-1].decode("utf-8", "replace"))
+        return lines, offset + size
+
+    def close_log(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def info(self) -> dict:
+        return {"jobId": self.id, "tool": self.tool, "status": self.status, "requestId": self.request_id,
+                "created": self.created, "started": self.started, "finished": self.finished,
+                "result": self.result, "error": self.error, "logLines": self.log_lines, "logBytes": self.log_bytes,
+                "joined": self.joined}
+
+
+class JobQueue:
+    def __init__(self, workers: int = 2, keep_finished: int = 200, log_dir: str | None = None):
+        self.workers = max(1, workers)
+        self.keep_finished = keep_finished
+        self._log_dir = log_dir or os.getenv("MCP_JOB_LOG_DIR")
+        self._jobs: dict[str, Job] = {}
+        self._keyed: dict[str, Job] = {}  # coalescing key -> latest job submitted with it
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def submit(self, tool: str, fn, key: str | None = None, ttl: float = singleflight.TTL) -> Job:
+        """Queue `fn(job)` (an async callable returning the job result dict) and return the job; with a `key`, an
+        unfinished job or one that succeeded within `ttl` seconds under the same key is returned instead."""
+        if key is not None:
+            job = self._keyed.get(key)
+            if job is not None and (job.finished is None or (
+                    job.status == SUCCEEDED and time.time() - job.finished < ttl)):
+                job.joined += 1
+                singleflight.count(tool, "joined" if job.finished is None else "reused")
+                return job
+            singleflight.count(tool, "ran")
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        job = Job(tool, fn, self.log_dir(), key)
+        self._jobs[job.id] = job
+        if key is not None:
+            self._keyed[key] = job
+        self._queue.put_nowait(job)
+        self._prune()
+        return job
+
+    def log_dir(self) -> pathlib.Path:
+        if self._log_dir is None:
+            self._log_dir = tempfile.mkdtemp(prefix="mcp-jobs-")
+        path = pathlib.Path(self._log_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def get(self, job_id: str) -> Job:
+        if job_id not in self._jobs:
+            raise NotFound(f"unknown job {job_id}")
+        return self._jobs[job_id]
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        if job.status == QUEUED:
+            self._finish(job, CANCELLED)
+        elif job.status == RUNNING and job.task:
+            job.task.cancel()  # proc.stream kills the child process on cancellation
+        return job
+
+    def logs(self, job_id: str, offset: int = 0, limit: int = 1000, max_bytes: int = 1 << 20) -> dict:
+        job = self.get(job_id)
+        lines, nxt = job.read_log(offset, limit, max_bytes)
+        return {"jobId": job.id, "status": job.status, "offset": offset, "next": nxt, "size": job.log_bytes,
+                "lines": lines}
+
+    def stats(self) -> dict:
+        counts: dict[str, int] = {}
+        for j in self._jobs.values():
+            counts[j.status] = counts.get(j.status, 0) + 1
+        return {"workers": self.workers, **counts}
+
+    def list(self) -> list[dict]:
+        return [{k: v for k, v in j.info().items() if k != "result"} for j in self._jobs.values()]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.status != QUEUED:  # cancelled while waiting
+                continue
+            job.status, job.started = RUNNING, time.time()
+            metrics.JOB_WAIT_SECONDS.observe(job.started - job.created, tool=job.tool)
+            job.task = job.context.run(asyncio.create_task, self._run(job))
+            try:
+                job.result = await job.task
+                self._finish(job, SUCCEEDED if (job.result or {}).get("code", 0) == 0 else FAILED)
+            except asyncio.CancelledError:
+                self._finish(job, CANCELLED)
+            except Exception as e:
+                job.error = str(e)
+                self._finish(job, FAILED)
+
+    async def _run(self, job: Job):
+        with tracing.span(f"job {job.tool}", **{"job.id": job.id}):
+            return await job.fn(job)
+
+    def _finish(self, job: Job, status: str):
+        job.status, job.finished = status, time.time()
+        job.close_log()
+        if job.started is not None:
+            metrics.JOB_SECONDS.observe(job.finished - job.started, tool=job.tool, status=status)
+        job.done.set()
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.finished is not None]
+        for j in sorted(finished, key=lambda j: j.finished)[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[j.id]
+            if self._keyed.get(j.key) is j:
+                del self._keyed[j.key]
+            j.log_path.unlink(missing_ok=True)
+
+
+def register_job_tools(registry, jobs: JobQueue):
+    """job_status / job_logs / cancel_job / list_jobs on a server's tool registry."""
+
+    @registry.tool("job_status", JobRef, inline=True)
+    def job_status(i: JobRef):
+        return jobs.get(i.jobId).info()
+
+    @registry.tool("job_logs", JobLogs, inline=True)
+    def job_logs(i: JobLogs):
+        return jobs.logs(i.jobId, i.offset, i.limit, i.maxBytes)
+
+    @registry.tool("cancel_job", JobRef, inline=True)
+    def cancel_job(i: JobRef):
+        return jobs.cancel(i.jobId).info()
+
+    @registry.tool("list_jobs", inline=True)
+    def list_jobs(i: dict):
+        return {"jobs": jobs.list(), **jobs.stats()}
+
+    @metrics.REGISTRY.collect
+    def job_counts():
+        stats = jobs.stats()
+        yield "mcp_job_workers", "Job worker tasks.", "gauge", {}, stats.pop("workers")
+        for state in (QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED):
+            yield ("mcp_jobs", "Jobs by state (finished jobs until pruned).", "gauge", {"state": state},
+                   stats.get(state, 0))
+
+
+async def submit(jobs: JobQueue, tool: str, fn, wait: bool = False, key: str | None = None) -> dict:
+    """Queue a job for a run tool; with wait=True behave like the old blocking call and return the final state.
+    `key` (singleflight.key) lets identical submissions share one job."""
+    job = jobs.submit(tool, fn, key)
+    if wait:
+        await job.done.wait()
+        return job.info()
+    return {"jobId": job.id, "status": job.status}
+
+
+def follow(jobs: JobQueue, job_id: str, offset: int = 0, poll: float = 0.5):
+    """job_logs as a stream: {"line": ...} for each log line from byte `offset` as it is written, then the job's
+    final job_status once it has finished and its log is drained. An unknown id raises NotFound right away."""
+    job = jobs.get(job_id)
+
+    async def items():
+        nonlocal offset
+        while True:
+            finished = job.done.is_set()
+            lines, offset = job.read_log(offset, 1000, 1 << 20)
+            for line in lines:
+                yield {"line": line}
+            if lines:
+                continue
+            if finished:
+                yield job.info()
+                return
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(job.done.wait(), poll)
+    return items()
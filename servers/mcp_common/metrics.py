@@ -0,0 +1,181 @@
+# servers/mcp_common/metrics.py
+# Minimal Prometheus instrumentation (text exposition format 0.0.4), no client library needed.
+#
+# Counters, gauges and histograms live in one process-wide REGISTRY and are updated from the dispatcher, the
+# job queue and the subprocess helper. State that already exists elsewhere (browser pool, render cache, job
+# counts) is read at scrape time through collect() callbacks instead of being mirrored on every change.
+import math, threading
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# seconds; covers inline renders (sub-ms) up to long test runs
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labels)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)  # buckets..., count, sum
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += 1
+            counts[-1] += value
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        out = []
+        for key, counts in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = _labels(self.labelnames, key, 'le="%s"' % _num(bound))
+                out.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.labelnames, key, 'le="+Inf"')
+            out.append(f"{self.name}_bucket{le} {counts[-2]}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, key)} {counts[-2]}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(counts[-1])}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors = []
+
+    def _add(self, metric: _Metric) -> _Metric:
+        # idempotent, so module reloads and repeated setup keep one series per name
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def collect(self, fn):
+        """Register fn() -> iterable of (name, help, kind, labels dict, value), evaluated on every scrape."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics.values():
+            samples = m.samples()
+            if samples:
+                lines += m.header() + samples
+        seen = set()
+        for fn in self._collectors:
+            try:
+                rows = list(fn())
+            except Exception:  # a broken collector must not take /metrics down
+                continue
+            for name, help, kind, labels, value in rows:
+                if name not in seen:
+                    seen.add(name)
+                    lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+TOOL_CALLS = REGISTRY.counter("mcp_tool_calls_total", "Tool calls by outcome (ok, error, not_found, invalid).",
+                              ("tool", "outcome"))
+TOOL_SECONDS = REGISTRY.histogram("mcp_tool_duration_seconds", "Tool call latency including lane wait.", ("tool",))
+TOOL_IN_FLIGHT = REGISTRY.gauge("mcp_tool_in_flight", "Tool calls currently executing.", ("tool",))
+LANE_WAITING = REGISTRY.gauge("mcp_lane_waiting", "Tool calls queued for a lane slot.", ("lane",))
+JOB_WAIT_SECONDS = REGISTRY.histogram("mcp_job_queue_seconds", "Time jobs spent queued before a worker took them.",
+                                      ("tool",))
+JOB_SECONDS = REGISTRY.histogram("mcp_job_duration_seconds", "Job run time by final status.", ("tool", "status"))
+PROC_SECONDS = REGISTRY.histogram("mcp_subprocess_duration_seconds", "Subprocess wall time.", ("command",))
+PROC_CPU = REGISTRY.counter("mcp_subprocess_cpu_seconds_total",
+                            "Subprocess user+system CPU time (Linux; includes the children it waited for).",
+                            ("command",))
+PROC_EXITS = REGISTRY.counter("mcp_subprocess_exits_total", "Subprocess exits by code.", ("command", "code"))
+
+
+@REGISTRY.collect
+def _children_cpu():
+    # exact total over every reaped child, next to the per-command samples above
+    if resource is None:
+        return []
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    help = "CPU time of all finished subprocesses."
+    return [("mcp_children_cpu_seconds_total", help, "counter", {"mode": "user"}, ru.ru_utime),
+            ("mcp_children_cpu_seconds_total", help, "counter", {"mode": "system"}, ru.ru_stime)]
@@ -0,0 +1,118 @@
+# servers/mcp_common/proc.py
+# Non-blocking subprocess helper: npm / npx / gradle run via asyncio.create_subprocess_exec so a long
+# command only holds its lane slot, never an event-loop or threadpool worker.
+# Each run is timed into mcp_subprocess_* metrics (and a span) under a short `label` such as "gradle test".
+import asyncio, os, pathlib, shutil, time
+from mcp_common import metrics, tracing
+
+LINE_LIMIT = 1 << 20  # longer output lines (minified JSON, huge stack traces) are handed on in pieces of this size
+
+try:
+    _TICKS = os.sysconf("SC_CLK_TCK")
+except (AttributeError, ValueError, OSError):
+    _TICKS = None
+
+
+def resolve(cmd: list[str]) -> list[str]:
+    """Resolve the executable through PATH/PATHEXT (npx -> npx.cmd on Windows) without going through a shell."""
+    exe = shutil.which(cmd[0]) or cmd[0]
+    return [exe, *cmd[1:]]
+
+
+def _label(cmd: list[str], label: str | None) -> str:
+    return label or pathlib.Path(cmd[0]).stem
+
+
+def _cpu_seconds(pid: int) -> float | None:
+    """utime+stime (+ waited-for children) from /proc; read once the output pipes close, i.e. at or just
+    before exit, so it can miss the last moments of a process. None where /proc is unavailable."""
+    if _TICKS is None:
+        return None
+    try:
+        stat = pathlib.Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    fields = stat[stat.rfind(")") + 2:].split()
+    return sum(int(f) for f in fields[11:15]) / _TICKS  # utime, stime, cutime, cstime
+
+
+class _Measure:
+    def __init__(self, label: str):
+        self.label = label
+        self.start = time.perf_counter()
+        self.cpu: float | None = None
+
+    def sample(self, proc):
+        self.cpu = _cpu_seconds(proc.pid)
+
+    def done(self, code):
+        metrics.PROC_SECONDS.observe(time.perf_counter() - self.start, command=self.label)
+        metrics.PROC_EXITS.inc(command=self.label, code="killed" if code is None else str(code))
+        if self.cpu is not None:
+            metrics.PROC_CPU.inc(self.cpu, command=self.label)
+
+
+async def run(cmd: list[str], cwd: str | None = None, env: dict | None = None, label: str | None = None) -> dict:
+    m = _Measure(_label(cmd, label))
+    with tracing.span(f"exec {m.label}", **{"process.command": cmd[0]}):
+        proc = await asyncio.create_subprocess_exec(
+            *resolve(cmd), cwd=cwd, env=env,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        try:
+            out, err = await asyncio.gather(proc.stdout.read(), proc.stderr.read())
+            m.sample(proc)
+            await proc.wait()
+        except asyncio.CancelledError:
+            proc.kill()
+            await proc.wait()
+            raise
+        finally:
+            m.done(proc.returncode)
+    return {"code": proc.returncode,
+            "stdout": out.decode("utf-8", "replace"),
+            "stderr": err.decode("utf-8", "replace")}
+
+
+async def stream(cmd: list[str], on_line, cwd: str | None = None, env: dict | None = None,
+                 label: str | None = None) -> int:
+    """Run a command, handing each stdout/stderr line to `on_line(stream, line)` as it is produced.
+
+    Output is not collected here; the callback decides where lines go. A line longer than LINE_LIMIT arrives as
+    several calls. Cancelling the awaiting task kills the child process.
+    """
+    m = _Measure(_label(cmd, label))
+    with tracing.span(f"exec {m.label}", **{"process.command": cmd[0]}):
+        proc = await asyncio.create_subprocess_exec(
+            *resolve(cmd), cwd=cwd, env=env, limit=LINE_LIMIT,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+
+        def emit(name, raw: bytes):
+            on_line(name, raw.decode("utf-8", "replace").rstrip("\r\n"))
+
+        async def pump(reader, name):
+            cut = False  # the last piece ended inside a line
+            while True:
+                try:
+                    raw = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:  # EOF, possibly after a last line without a newline
+                    if e.partial:
+                        emit(name, e.partial)
+                    return
+                except asyncio.LimitOverrunError as e:  # no newline within the limit: pass on what is buffered
+                    emit(name, await reader.readexactly(e.consumed))
+                    cut = True
+                    continue
+                if not (cut and raw.strip(b"\r\n") == b""):  # not just the end of a line already passed on
+                    emit(name, raw)
+                cut = False
+
+        try:
+            await asyncio.gather(pump(proc.stdout, "stdout"), pump(proc.stderr, "stderr"))
+            m.sample(proc)
+            return await proc.wait()
+        except asyncio.CancelledError:
+            proc.kill()
+            await proc.wait()
+            raise
+        finally:
+            m.done(proc.returncode)
@@ -0,0 +1,128 @@
+# servers/mcp_common/publisher.py
+# Incremental git publishing for generated test projects.
+#
+# Instead of `add -A` + delete/recreate origin + `push --force` on every call, only the paths a generation step
+# reported are staged, several generations can be staged before a single commit, the remote is updated in place,
+# and pushes are fast-forward only (or --force-with-lease when explicitly forced). Repo objects are cached per
+# project root, and a lock per root keeps one publish's stage/commit/push from interleaving with another's (the
+# registry's project lock only covers calls made through it). remoteUrl may be any git URL, including a local bare
+# repository path.
+#
+# GitPython is imported on first use: importing it runs `git version`, which render-only servers never need.
+import contextlib, os, pathlib, threading
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class GitPush(BaseModel):
+    projectRoot: str
+    remoteUrl: Optional[str] = None
+    branch: str = "main"
+    paths: Optional[List[str]] = None  # files reported by generation; None stages the whole tree (old behaviour)
+    commit: bool = True  # False: only stage, so several generations end up in one commit
+    push: bool = True
+    force: bool = False  # --force-with-lease instead of fast-forward only
+    message: Optional[str] = None
+    remote: str = "origin"
+
+
+class Publisher:
+    def __init__(self, default_message: str = "chore: add generated tests"):
+        self.default_message = default_message
+        self._repos: dict[str, "Repo"] = {}
+        self._roots: dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+
+    def repo(self, root: str) -> "Repo":
+        from git import Repo
+        key = os.path.realpath(root)
+        with self._lock:
+            if key not in self._repos:
+                self._repos[key] = Repo(key) if (pathlib.Path(key) / ".git").exists() else Repo.init(key)
+            return self._repos[key]
+
+    @contextlib.contextmanager
+    def locked(self, root: str):
+        """Hold the root's lock (reentrant: publish holds it around stage/commit/push, which take it too)."""
+        key = os.path.realpath(root)
+        with self._lock:
+            lock = self._roots.setdefault(key, threading.RLock())
+        with lock:
+            yield
+
+    def stage(self, root: str, paths: List[str] | None) -> dict:
+        """Stage `paths` (absolute or relative to root); deleted files are staged as removals. Paths that resolve
+        outside the working tree (through `..` or a symlinked directory) stage nothing and return an error."""
+        with self.locked(root):
+            repo = self.repo(root)
+            if paths is None:
+                repo.git.add(A=True)
+            else:
+                base = pathlib.Path(repo.working_tree_dir)
+                rel = sorted({_relpath(base, p) for p in paths})
+                outside = [p for p in rel if p == os.pardir or p.startswith(os.pardir + os.sep)]
+                if outside:
+                    return {"staged": 0, "error": f"paths outside the working tree {base}: {', '.join(outside)}"}
+                present = [p for p in rel if (base / p).exists()]
+                missing = [p for p in rel if not (base / p).exists()]
+                if present:
+                    repo.git.add("-A", "--", *present)
+                if missing:
+                    repo.git.rm("--cached", "--ignore-unmatch", "-q", "--", *missing)
+            return {"staged": len(self.staged(repo))}
+
+    def staged(self, repo: "Repo") -> list[str]:
+        out = repo.git.diff("--cached", "--name-only")
+        return out.splitlines() if out else []
+
+    def commit(self, root: str, message: str | None = None) -> str | None:
+        with self.locked(root):
+            repo = self.repo(root)
+            if not self.staged(repo):
+                return None
+            return repo.index.commit(message or self.default_message).hexsha
+
+    def push(self, root: str, url: str | None, branch: str, remote: str = "origin", force: bool = False) -> dict:
+        with self.locked(root):
+            return self._push(self.repo(root), url, branch, remote, force)
+
+    def _push(self, repo: "Repo", url: str | None, branch: str, remote: str, force: bool) -> dict:
+        if not repo.head.is_valid():
+            return {"pushed": False, "error": "nothing committed yet"}
+        names = [r.name for r in repo.remotes]
+        if remote not in names:
+            if not url:
+                return {"pushed": False, "error": f"no remote {remote!r} and no remoteUrl given"}
+            repo.create_remote(remote, url)
+        elif url and url not in repo.remote(remote).urls:
+            repo.remote(remote).set_url(url)
+        args = [remote, f"HEAD:refs/heads/{branch}"]
+        if force:
+            args.insert(0, f"--force-with-lease={branch}")
+        from git import GitCommandError
+        try:
+            repo.git.push(*args)
+        except GitCommandError as e:
+            # rejected non-fast-forward / stale lease: someone else pushed first; nothing is clobbered
+            return {"pushed": False, "rejected": True, "error": (e.stderr or str(e)).strip()}
+        return {"pushed": True}
+
+    def publish(self, i: GitPush) -> dict:
+        with self.locked(i.projectRoot):
+            out = {"ok": True, **self.stage(i.projectRoot, i.paths), "commit": None}
+            if "error" in out:
+                out["ok"] = False
+                return out
+            if i.commit:
+                out["commit"] = self.commit(i.projectRoot, i.message)
+            if i.push:
+                out.update(self.push(i.projectRoot, i.remoteUrl, i.branch, i.remote, i.force))
+                out["ok"] = out.get("pushed", False)
+            return out
+
+
+def _relpath(base: pathlib.Path, path: str) -> str:
+    """`path` relative to `base`, with `..` and symlinked directories resolved (the file itself may be a link, or
+    gone)."""
+    full = base / path
+    return os.path.relpath(os.path.join(os.path.realpath(full.parent), full.name), base)
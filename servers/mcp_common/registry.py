@@ -0,0 +1,223 @@
+# servers/mcp_common/registry.py
+# Registry-based async dispatcher for the /tool endpoint.
+#
+# Tools register with a typed input model and a lane. Each lane has its own concurrency limit, so long
+# test runs (lane "run") can never starve cheap render calls (lane "fast", no limit).
+# Sync tool functions either run inline on the event loop (inline=True: pure rendering, microseconds)
+# or in a worker thread (file and git I/O); async tool functions are awaited directly.
+# Tools registered with `writes="<root field>"` change files under that project root and hold its exclusive lock
+# (mcp_common.workspace) while they run, after their lane slot.
+# Tools registered with `coalesce=<ttl>` share one execution between identical concurrent calls, which then take no
+# lane slot of their own (mcp_common.singleflight); only tools whose effect is the same however often they run opt in.
+# Every call is counted and timed per tool (mcp_common.metrics) and wrapped in a span when tracing is on.
+# Streamed calls (the NDJSON endpoints) go through accept() and stream(), which apply the same checks and hold the
+# same lane slot, project lock and in-flight count for as long as the stream runs.
+import asyncio, contextlib, inspect, json, time
+from dataclasses import dataclass
+from fastapi import HTTPException
+from starlette.concurrency import iterate_in_threadpool
+from pydantic import BaseModel, ValidationError
+from mcp_common import metrics, singleflight, tracing
+
+
+class NotFound(KeyError):
+    """Raised by tools for unknown ids (browser session, job); surfaced as HTTP 404."""
+
+
+@dataclass
+class Tool:
+    name: str
+    fn: object
+    model: type[BaseModel] | None
+    lane: str
+    inline: bool
+    writes: str | None = None
+    coalesce: float | None = None  # seconds a result is reused; 0 shares only while in flight; None never
+
+
+class ToolRegistry:
+    def __init__(self, lanes: dict[str, int] | None = None, workspaces=None):
+        """`lanes` maps lane name -> max concurrent calls; lanes not listed are unbounded. `workspaces` (a
+        mcp_common.workspace.Workspaces) provides the project locks for `writes` tools."""
+        self._tools: dict[str, Tool] = {}
+        self.workspaces = workspaces
+        self._disabled: dict[str, str] = {}  # name -> reason, for tools switched off by server mode
+        self._limits = dict(lanes or {})
+        self._sems: dict[str, asyncio.Semaphore] = {}
+        self.flights = singleflight.Flights()
+        self.in_flight = 0  # executing tool calls, reported on /health
+        self.waiting = 0  # calls queued for a lane slot
+
+    def tool(self, name: str, model: type[BaseModel] | None = None, lane: str = "fast", inline: bool = False,
+             writes: str | None = None, coalesce: float | None = None):
+        def deco(fn):
+            self._tools[name] = Tool(name, fn, model, lane, inline, writes, coalesce)
+            return fn
+        return deco
+
+    def disable(self, *names: str, reason: str):
+        """Unregister tools this server instance does not offer; calls get an error naming `reason`."""
+        for name in names:
+            if self._tools.pop(name, None) is not None:
+                self._disabled[name] = reason
+
+    def names(self) -> list[str]:
+        return sorted(self._tools)
+
+    def parse(self, name: str, payload: dict | None):
+        """Validate a tool input against its model; returns (tool, args)."""
+        t = self._tools.get(name)
+        if t is None:
+            return None, None
+        try:
+            args = t.model(**(payload or {})) if t.model else (payload or {})
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors())
+        return t, args
+
+    async def dispatch(self, name: str, payload: dict | None):
+        label = name if name in self._tools else "unknown"
+        outcome, start = "error", time.perf_counter()
+        try:
+            with tracing.span(f"tool {label}", **{"tool.name": name}):
+                t, args = self.parse(name, payload)
+                if t is None:
+                    if name in self._disabled:
+                        outcome = "disabled"
+                        return {"error": f"tool {name} is disabled: {self._disabled[name]}"}
+                    outcome = "unknown"
+                    return {"error": f"unknown tool {name}"}
+                if t.coalesce is None:
+                    out = await self._acquire_and_invoke(t, args)
+                else:
+                    out = await self.flights.do(t.name, singleflight.key(t.name, args),
+                                                lambda: self._acquire_and_invoke(t, args), t.coalesce)
+                outcome = "ok"
+                return out
+        except NotFound as e:
+            outcome = "not_found"
+            raise HTTPException(status_code=404, detail=e.args[0])
+        except HTTPException:
+            outcome = "invalid"
+            raise
+        finally:
+            metrics.TOOL_CALLS.inc(tool=label, outcome=outcome)
+            metrics.TOOL_SECONDS.observe(time.perf_counter() - start, tool=label)
+
+    def accept(self, name: str, payload: dict | None):
+        """(tool, args) for a streamed call, or (None, {"error": ...}) for an unknown or disabled tool; bad input
+        raises the same 422 as dispatch. Refused calls are counted like refused /tool calls."""
+        try:
+            t, args = self.parse(name, payload)
+        except HTTPException:
+            metrics.TOOL_CALLS.inc(tool=name, outcome="invalid")
+            raise
+        if t is not None:
+            return t, args
+        if name in self._disabled:
+            metrics.TOOL_CALLS.inc(tool="unknown", outcome="disabled")
+            return None, {"error": f"tool {name} is disabled: {self._disabled[name]}"}
+        metrics.TOOL_CALLS.inc(tool="unknown", outcome="unknown")
+        return None, {"error": f"unknown tool {name}"}
+
+    def stream(self, t: Tool, args, items):
+        """NDJSON lines of `items(args)` (an iterable, run in a worker thread, or an async iterable) for an accepted
+        call. `items` is called right away, so an unknown id still fails with a 404 before a response is started;
+        the iteration holds the call's lane slot and project lock, counts as in flight and is counted and timed as
+        one call of the tool."""
+        try:
+            source = items(args)
+        except NotFound as e:
+            metrics.TOOL_CALLS.inc(tool=t.name, outcome="not_found")
+            raise HTTPException(status_code=404, detail=e.args[0])
+        if not hasattr(source, "__aiter__"):
+            source = iterate_in_threadpool(iter(source))
+
+        async def lines():
+            async with self.held(t, args):
+                async for item in source:
+                    yield json.dumps(item) + "\n"
+        return lines()
+
+    @contextlib.asynccontextmanager
+    async def held(self, t: Tool, args):
+        """What a /tool call of `t` holds while it runs (lane slot, project lock, in-flight count, span, metrics),
+        for endpoints that do the work themselves (a streamed upload)."""
+        outcome, start = "error", time.perf_counter()
+        try:
+            with tracing.span(f"tool {t.name}", **{"tool.name": t.name}):
+                async with self._lane(t), self._locked(t, args), self._in_flight(t):
+                    yield
+            outcome = "ok"
+        finally:
+            metrics.TOOL_CALLS.inc(tool=t.name, outcome=outcome)
+            metrics.TOOL_SECONDS.observe(time.perf_counter() - start, tool=t.name)
+
+    async def dispatch_many(self, calls: list[tuple[str, dict | None]], parallel: bool = False) -> list[dict]:
+        """Run several tool calls for /tools/batch: in order, or concurrently (each still bound by its lane).
+
+        Every call gets its own envelope, so one failure does not hide the others' results.
+        """
+        async def one(name, payload):
+            try:
+                out = await self.dispatch(name, payload)
+            except HTTPException as e:
+                return {"ok": False, "status": e.status_code, "error": e.detail}
+            except Exception as e:
+                return {"ok": False, "status": 500, "error": str(e)}
+            if isinstance(out, dict) and "error" in out and len(out) == 1:
+                return {"ok": False, "status": 400, "error": out["error"]}
+            return {"ok": True, "result": out}
+
+        if parallel:
+            return list(await asyncio.gather(*(one(n, p) for n, p in calls)))
+        return [await one(n, p) for n, p in calls]
+
+    async def _acquire_and_invoke(self, t: Tool, args):
+        async with self._lane(t), self._locked(t, args), self._in_flight(t):
+            if inspect.iscoroutinefunction(t.fn):
+                return await t.fn(args)
+            if t.inline:
+                return t.fn(args)
+            return await asyncio.to_thread(t.fn, args)
+
+    @contextlib.asynccontextmanager
+    async def _lane(self, t: Tool):
+        sem = self._semaphore(t.lane)
+        if sem is None:
+            yield
+            return
+        metrics.LANE_WAITING.inc(lane=t.lane)
+        self.waiting += 1
+        try:
+            await sem.acquire()
+        finally:
+            self.waiting -= 1
+            metrics.LANE_WAITING.dec(lane=t.lane)
+        try:
+            yield
+        finally:
+            sem.release()
+
+    def _locked(self, t: Tool, args):
+        if t.writes and self.workspaces is not None:
+            return self.workspaces.locked(getattr(args, t.writes))
+        return contextlib.nullcontext()
+
+    @contextlib.asynccontextmanager
+    async def _in_flight(self, t: Tool):
+        metrics.TOOL_IN_FLIGHT.inc(tool=t.name)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            metrics.TOOL_IN_FLIGHT.dec(tool=t.name)
+
+    def _semaphore(self, lane: str) -> asyncio.Semaphore | None:
+        limit = self._limits.get(lane)
+        if not limit:
+            return None
+        if lane not in self._sems:
+            self._sems[lane] = asyncio.Semaphore(limit)
+        return self._sems[lane]
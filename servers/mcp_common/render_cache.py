@@ -0,0 +1,182 @@
+# servers/mcp_common/render_cache.py
+# Content-addressed caching for generated sources.
+#
+# RenderCache maps sha256(kind + canonical spec JSON) -> rendered text with LRU eviction, so re-rendering an
+# unchanged spec is a dict lookup. Manifest records what was last written under a project root (relpath ->
+# sha256/size/mtime, kept outside the project by mcp_common.state) so unchanged outputs skip the write entirely and
+# keep their mtimes; Gradle and Playwright then only recompile what actually changed. Files are written to a temp
+# file next to the target and renamed into place, so readers (and a crashed upload) never see a half-written file.
+import hashlib, json, os, pathlib, threading, uuid
+from collections import OrderedDict
+from mcp_common import state
+
+MANIFEST_NAME = ".render-manifest.json"  # in the project root before the manifest moved to mcp_common.state
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def spec_key(kind: str, spec) -> str:
+    """Stable hash of a spec (pydantic model or plain JSON data)."""
+    if hasattr(spec, "model_dump"):
+        spec = spec.model_dump()
+    return digest(f"{kind}\0{json.dumps(spec, sort_keys=True, default=str)}".encode("utf-8"))
+
+
+class RenderCache:
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, kind: str, spec, fn) -> str:
+        """fn(spec) on a miss; the cached text on a hit."""
+        key = spec_key(kind, spec)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+        content = fn(spec)
+        with self._lock:
+            self.misses += 1
+            self._items[key] = content
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return content
+
+    def stats(self) -> dict:
+        return {"size": len(self._items), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def samples(self):
+        """Rows for metrics.REGISTRY.collect."""
+        yield "mcp_render_cache_entries", "Rendered sources held in the cache.", "gauge", {}, len(self._items)
+        yield "mcp_render_cache_hits_total", "Render cache hits.", "counter", {}, self.hits
+        yield "mcp_render_cache_misses_total", "Render cache misses.", "counter", {}, self.misses
+
+
+class Manifest:
+    def __init__(self, root):
+        self.root = pathlib.Path(root)
+        self.path = state.project_dir(root, "state") / "render-manifest.json"
+        try:
+            self.entries: dict[str, dict] = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+        self._dirty = False
+
+    def write(self, rel: str, content: str, overwrite: bool = True) -> bool:
+        """Write `content` to root/rel unless the file already holds exactly these bytes; True if written."""
+        data = content.encode("utf-8")
+        h = digest(data)
+        fp = self._path(rel)
+        if self._unchanged(rel, fp, h, len(data), overwrite):
+            return False
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        tmp = _tmp_name(fp)
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, fp)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        self._record(rel, h, fp.stat())
+        return True
+
+    def open(self, rel: str, overwrite: bool = True) -> "PendingWrite":
+        """Streamed counterpart of write(): append chunks, then commit() (or abort())."""
+        return PendingWrite(self, rel, overwrite)
+
+    def _path(self, rel: str) -> pathlib.Path:
+        fp = (self.root / rel).resolve()
+        if not fp.is_relative_to(self.root.resolve()):
+            raise ValueError(f"path {rel!r} escapes the project root")
+        return fp
+
+    def _unchanged(self, rel: str, fp: pathlib.Path, h: str, size: int, overwrite: bool) -> bool:
+        """Whether fp (already checked by _path) can be left alone."""
+        try:
+            st = fp.stat()
+        except FileNotFoundError:
+            return False
+        if not overwrite:
+            return True
+        entry = self.entries.get(rel)
+        if entry and entry["sha256"] == h and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return True
+        if st.st_size == size and _file_digest(fp) == h:
+            self._record(rel, h, st)  # identical file written by someone else: adopt it
+            return True
+        return False
+
+    def file_digest(self, rel: str) -> str:
+        """sha256 of root/rel: from the manifest while size and mtime match, else read, hashed and recorded."""
+        fp = self._path(rel)
+        st = fp.stat()
+        entry = self.entries.get(rel)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["sha256"]
+        h = _file_digest(fp)
+        self._record(rel, h, st)
+        return h
+
+    def save(self):
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(self.entries, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def _record(self, rel: str, h: str, st):
+        self.entries[rel] = {"sha256": h, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        self._dirty = True
+
+
+class PendingWrite:
+    """A file being received in chunks: written to a temp file beside the target and hashed on the way."""
+
+    def __init__(self, manifest: Manifest, rel: str, overwrite: bool = True):
+        self.manifest, self.rel, self.overwrite = manifest, rel, overwrite
+        self.path = manifest._path(rel)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp = _tmp_name(self.path)
+        self._fh = open(self.tmp, "wb")
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def append(self, data: bytes):
+        self._fh.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def commit(self) -> bool:
+        """Rename into place unless the target already holds these bytes; True if written."""
+        self._fh.close()
+        h = self._hash.hexdigest()
+        if self.manifest._unchanged(self.rel, self.path, h, self.size, self.overwrite):
+            self.tmp.unlink(missing_ok=True)
+            return False
+        os.replace(self.tmp, self.path)
+        self.manifest._record(self.rel, h, self.path.stat())
+        return True
+
+    def abort(self):
+        self._fh.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+def _tmp_name(fp: pathlib.Path) -> pathlib.Path:
+    return fp.with_name(f".{fp.name}.{uuid.uuid4().hex[:12]}.tmp")
+
+
+def _file_digest(fp: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with open(fp, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
@@ -0,0 +1,142 @@
+# servers/mcp_common/run_cache.py
+# Test-run results keyed on everything the result depends on, so unchanged tests are not run again.
+#
+# A unit is what a runner can select on its own: a Playwright spec file, a TestNG class. Its fingerprint is a sha256
+# over the unit's source, every other input file of the project (page objects, build and config files), the
+# toolchain, the target app's fingerprint (build id / ETag, sent by the router) and the run options. Results are
+# stored per fingerprint in the project's state directory (mcp_common.state). With reuse "passed" a unit whose
+# fingerprint has a green result is not run and its stored result is returned; "stable" only reuses units that passed
+# on the first attempt STABLE_RUNS times in a row; "never" (the default) always runs and only records. Failed units
+# always run again.
+import hashlib, json, os, pathlib, threading, time
+from mcp_common import metrics, state
+from mcp_common.render_cache import MANIFEST_NAME, Manifest
+
+RESULTS_NAME = ".run-results.json"  # in the project root before results moved to mcp_common.state
+POLICIES = ("never", "passed", "stable")
+STABLE_RUNS = 2
+KEEP = 4  # fingerprints remembered per unit
+# build output, dependencies and reports are not inputs
+SKIP_DIRS = {".git", ".gradle", "build", "node_modules", "test-results", "playwright-report", ".pw-reports"}
+SKIP_FILES = {MANIFEST_NAME, RESULTS_NAME}  # left behind by older versions
+
+UNITS = metrics.REGISTRY.counter("mcp_run_cache_units_total", "Test units by outcome (reused, ran).",
+                                 ("tool", "outcome"))
+_lock = threading.Lock()
+
+
+def fingerprint(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def scan(root) -> dict[str, str]:
+    """{relpath: sha256} of the project's input files. Hashes come from the render manifest while size and
+    mtime match, so an unchanged tree costs one stat per file."""
+    root = pathlib.Path(root)
+    manifest = Manifest(root)
+    out = {}
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            if name in SKIP_FILES or name.endswith(".tmp"):
+                continue
+            rel = os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/")
+            try:
+                out[rel] = manifest.file_digest(rel)
+            except OSError:
+                continue  # vanished while walking
+    manifest.save()
+    return out
+
+
+def plan(files: dict[str, str], units: dict[str, str], context) -> dict[str, str]:
+    """{unit: fingerprint}; `units` maps unit name -> relpath, `context` is toolchain + app + options."""
+    own = set(units.values())
+    shared = fingerprint(sorted((rel, h) for rel, h in files.items() if rel not in own))
+    return {unit: fingerprint(files[rel], shared, context) for unit, rel in units.items()}
+
+
+def unit_status(tests: list[dict], retried) -> tuple[str, bool]:
+    """(status, first_try) of a unit from its test entries; `retried(test)` says whether a test needed retries."""
+    if any(t["status"] == "failed" for t in tests):
+        return "failed", False
+    first_try = not any(retried(t) for t in tests)
+    return ("passed" if first_try else "flaky"), first_try
+
+
+class RunCache:
+    def __init__(self, root, tool: str):
+        self.tool = tool
+        self.path = state.project_dir(root, "state") / "run-results.json"
+        self.entries = self._load()
+        self._new: dict[str, dict] = {}
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def reusable(self, fingerprints: dict[str, str], policy: str) -> dict[str, dict]:
+        """{unit: stored entry} for the units the policy lets skip."""
+        if policy == "never":
+            return {}
+        hits = {}
+        for unit, fp in fingerprints.items():
+            entry = self.entries.get(fp)
+            if entry is None or entry["status"] == "failed":
+                continue
+            if policy == "stable" and entry["streak"] < STABLE_RUNS:
+                continue
+            hits[unit] = entry
+        UNITS.inc(len(hits), tool=self.tool, outcome="reused")
+        return hits
+
+    def record_run(self, fingerprints: dict[str, str], tests: list[dict], unit_of, summarize, retried):
+        """Record the units of a finished run: `tests` grouped by `unit_of(test)`; units without tests in the
+        result (not run, or failed before reporting) are left out."""
+        by_unit: dict[str, list[dict]] = {}
+        for t in tests:
+            unit = unit_of(t)
+            if unit in fingerprints:
+                by_unit.setdefault(unit, []).append(t)
+        for unit, unit_tests in by_unit.items():
+            self.record(unit, fingerprints[unit], unit_tests, summarize(unit_tests), *unit_status(unit_tests, retried))
+        UNITS.inc(len(by_unit), tool=self.tool, outcome="ran")
+        self.save()
+
+    def record(self, unit: str, fp: str, tests: list[dict], summary: dict, status: str, first_try: bool):
+        prev = self.entries.get(fp)
+        streak = ((prev["streak"] if prev and prev["status"] == "passed" else 0) + 1) if first_try else 0
+        self._new[fp] = {"unit": unit, "status": status, "streak": streak, "at": time.time(), "summary": summary,
+                         "tests": tests}
+
+    def save(self):
+        """Merge this run's entries into the file (re-read first, so concurrent runs on other units survive) and
+        keep the newest KEEP fingerprints per unit."""
+        if not self._new:
+            return
+        with _lock:
+            entries = {**self._load(), **self._new}
+            per_unit: dict[str, list[tuple[float, str]]] = {}
+            for fp, e in entries.items():
+                per_unit.setdefault(e["unit"], []).append((e["at"], fp))
+            for items in per_unit.values():
+                for _, fp in sorted(items, reverse=True)[KEEP:]:
+                    del entries[fp]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(entries, indent=1, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self.entries, self._new = entries, {}
+
+
+def merge(result: dict, hits: dict[str, dict]) -> dict:
+    """Add the reused units' tests (marked cached) and summary counts to a runner result."""
+    summary = dict(result.get("summary") or {})
+    for entry in hits.values():
+        for k, v in entry["summary"].items():
+            if isinstance(v, (int, float)):
+                summary[k] = round(summary.get(k, 0) + v, 3)
+    tests = list(result.get("tests") or []) + [{**t, "cached": True} for e in hits.values() for t in e["tests"]]
+    return {**result, "summary": summary, "tests": tests, "cached": sorted(hits)}
@@ -0,0 +1,92 @@
+# servers/mcp_common/singleflight.py
+# Identical concurrent calls share one execution.
+#
+# When several routers fan out the same work, the same expensive call arrives several times at once. Examples are
+# a navigation of one session to one URL, or a test run or toolchain install for one root. Calls are keyed on the
+# tool name plus a sha256 of the validated input (defaults filled in, keys sorted), so inputs that differ only in
+# spelling share a key. The first call with a key runs. Calls that arrive while it runs await the same result
+# ("joined"). Tools registered with a TTL also hand a successful result to identical calls for that many seconds
+# afterwards ("reused"). Errors are shared with the calls already waiting but never reused.
+#
+# The registry (coalesce=<ttl> on a tool) applies this to calls. The job queue applies it to jobs: an identical
+# submission gets the queued or running job's id instead of a new job, or for TTL seconds a job that succeeded.
+# Run keys include the root's write generation (workspace.Workspaces.generation), so a call never joins or reuses
+# a run that predates a write to its root.
+import asyncio, hashlib, json, os, threading, time
+from pydantic import BaseModel
+from mcp_common import metrics
+
+TTL = float(os.getenv("MCP_COALESCE_TTL", "2"))  # seconds a finished job or result is handed to identical calls
+MAX_RECENT = 1024
+
+CALLS = metrics.REGISTRY.counter("mcp_coalesce_calls_total",
+                                 "Calls of coalescing tools and jobs by outcome (ran, joined, reused).",
+                                 ("tool", "outcome"))
+_counts: dict[str, dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def key(tool: str, args, exclude=(), **extra) -> str:
+    """Coalescing key of a call: `args` is the tool's input model (or dict); `exclude` drops fields that do not
+    change the outcome (e.g. run tools' `wait`); `extra` adds state the input does not show (a root's generation)."""
+    if isinstance(args, BaseModel):
+        data = args.model_dump(exclude=set(exclude))
+    else:
+        data = {k: v for k, v in (args or {}).items() if k not in exclude}
+    raw = json.dumps([tool, data, extra], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def count(tool: str, outcome: str):
+    CALLS.inc(tool=tool, outcome=outcome)
+    with _lock:
+        per_tool = _counts.setdefault(tool, {"ran": 0, "joined": 0, "reused": 0})
+        per_tool[outcome] += 1
+
+
+def stats() -> dict:
+    """{tool: {ran, joined, reused}}; joined + reused is the work that was not done again."""
+    with _lock:
+        return {tool: dict(c) for tool, c in _counts.items()}
+
+
+class Flights:
+    def __init__(self):
+        self._running: dict[str, asyncio.Future] = {}
+        self._recent: dict[str, tuple[float, object]] = {}  # key -> (expires, result)
+
+    async def do(self, tool: str, k: str, fn, ttl: float = 0):
+        """Result of `fn()` (a coroutine function), run once per key however many callers wait for it."""
+        hit = self._recent.get(k)
+        if hit is not None:
+            if hit[0] > time.monotonic():
+                count(tool, "reused")
+                return hit[1]
+            del self._recent[k]
+        task = self._running.get(k)
+        if task is None:
+            task = self._running[k] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._landed(k, t, ttl))
+            count(tool, "ran")
+        else:
+            count(tool, "joined")
+        # one caller going away (client disconnect) must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _landed(self, k: str, task: asyncio.Future, ttl: float):
+        self._running.pop(k, None)
+        if task.cancelled() or task.exception() is not None or ttl <= 0:
+            return
+        result = task.result()
+        if isinstance(result, dict) and "error" in result:
+            return
+        now = time.monotonic()
+        if len(self._recent) >= MAX_RECENT:
+            self._recent = {other: hit for other, hit in self._recent.items() if hit[0] > now}
+        if len(self._recent) < MAX_RECENT:
+            self._recent[k] = (now + ttl, result)
+
+    def samples(self):
+        """Rows for metrics.REGISTRY.collect."""
+        yield ("mcp_coalesce_in_flight", "Coalescing calls executing (each shared by all its callers).", "gauge", {},
+               len(self._running))
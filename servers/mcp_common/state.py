@@ -0,0 +1,14 @@
+# servers/mcp_common/state.py
+# Where the servers keep what they write for themselves about a project: render manifests, run results and scratch
+# workspaces. All of it lives under MCP_CACHE_DIR (default ~/.cache/mcp), one directory per project root and kind,
+# never in or next to the root, so git_push and test discovery only ever see the project's own files.
+import hashlib, os, pathlib
+
+CACHE_DIR = pathlib.Path(os.getenv("MCP_CACHE_DIR", pathlib.Path.home() / ".cache" / "mcp"))
+
+
+def project_dir(root, kind: str) -> pathlib.Path:
+    """CACHE_DIR/<kind>/<root name>-<hash of its real path>; not created here."""
+    root = os.path.realpath(root)
+    tag = hashlib.sha1(root.encode("utf-8")).hexdigest()[:8]
+    return CACHE_DIR / kind / f"{os.path.basename(root)}-{tag}"
@@ -0,0 +1,162 @@
+# servers/mcp_common/templating.py
+# Precompiled code templates for the generators.
+#
+# Templates use string.Template syntax (${name}, $$ for a literal $), which keeps Java/TS braces readable. Each one
+# is compiled once, at startup, into a function evaluating a single f-string (literal text is embedded with repr(),
+# fields are plain names), so rendering costs what a hand-written f-string does. Per-step fragments are looked up
+# in a dict by action and appended to one buffer that is joined once, instead of if/elif chains.
+#
+# A TemplateSet is built from the server's built-in templates and an optional override directory: <name>.tmpl
+# replaces the built-in of that name, or adds a new one (e.g. a fragment for a new step verb). Overrides may only
+# use fields the built-in they replace uses (or, for a group given in `vocabulary`, any field of that group's
+# vocabulary); this is checked at load time, not on the first render.
+import functools, keyword, pathlib, re
+from string import Template
+
+OVERRIDE_SUFFIX = ".tmpl"
+
+
+class TemplateError(ValueError):
+    pass
+
+
+class CompiledTemplate:
+    __slots__ = ("name", "source", "fields", "fn", "_expr")
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        parts, fields = [], []
+        pos = 0
+        for m in Template.pattern.finditer(source):
+            parts.append(source[pos:m.start()].replace("{", "{{").replace("}", "}}"))
+            pos = m.end()
+            if m["escaped"] is not None:
+                parts.append("$")
+            elif m["invalid"] is not None:
+                raise TemplateError(f"template {name!r}: stray '$' at offset {m.start()}")
+            else:
+                field = m["named"] or m["braced"]
+                if keyword.iskeyword(field) or field == "_":
+                    raise TemplateError(f"template {name!r}: field name {field!r} is reserved")
+                parts.append(f"{{{field}}}")
+                if field not in fields:
+                    fields.append(field)
+        parts.append(source[pos:].replace("{", "{{").replace("}", "}}"))
+        self.fields = tuple(fields)
+        self._expr = f"f{''.join(parts)!r}"
+        # fn(**values): keyword-only fields, extra keywords ignored
+        self.fn = eval(f"lambda {', '.join((['*', *fields] if fields else []) + ['**_'])}: {self._expr}", {})
+
+    def render(self, values: dict) -> str:
+        try:
+            return self.fn(**values)
+        except TypeError as e:
+            raise TemplateError(f"template {self.name!r}: {e}") from None
+
+    def bind(self, *params: str):
+        """Positional render function over a fixed vocabulary, for hot per-step fragments."""
+        unknown = [f for f in self.fields if f not in params]
+        if unknown:
+            raise TemplateError(f"template {self.name!r} uses unknown fields {unknown}; allowed: {list(params)}")
+        return eval(f"lambda {', '.join(params)}: {self._expr}", {})
+
+
+class TemplateSet:
+    def __init__(self, builtins: dict[str, str], override_dir: str | None = None,
+                 vocabulary: dict[str, tuple[str, ...]] | None = None):
+        self._templates = {name: CompiledTemplate(name, src) for name, src in builtins.items()}
+        self.vocabulary = vocabulary or {}  # name prefix -> fields any template of that group may use
+        self.overridden: list[str] = []
+        if override_dir:
+            self._load_overrides(pathlib.Path(override_dir))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+    def get(self, name: str) -> CompiledTemplate | None:
+        return self._templates.get(name)
+
+    def render(self, name: str, **values) -> str:
+        return self._templates[name].render(values)
+
+    def group(self, prefix: str) -> dict[str, CompiledTemplate]:
+        """Templates named <prefix><key>, keyed by <key> (e.g. every "ui.step." fragment by action)."""
+        return {n[len(prefix):]: t for n, t in self._templates.items() if n.startswith(prefix)}
+
+    def names(self) -> list[str]:
+        return sorted(self._templates)
+
+    def _load_overrides(self, root: pathlib.Path):
+        if not root.is_dir():
+            raise TemplateError(f"template override dir {root} does not exist")
+        for path in sorted(root.glob(f"*{OVERRIDE_SUFFIX}")):
+            name = path.name[:-len(OVERRIDE_SUFFIX)]
+            src = path.read_text(encoding="utf-8")
+            base = self._templates.get(name)
+            # editors add a final newline; keep the built-in's (new templates are one-line step fragments)
+            if src.endswith("\n") and not (base is not None and base.source.endswith("\n")):
+                src = src[:-1]
+            tpl = CompiledTemplate(name, src)
+            allowed = next((v for p, v in self.vocabulary.items() if name.startswith(p)), base and base.fields)
+            if allowed is not None and not set(tpl.fields) <= set(allowed):
+                extra = sorted(set(tpl.fields) - set(allowed))
+                raise TemplateError(f"override {path} uses unknown fields {extra}; allowed: {list(allowed)}")
+            self._templates[name] = tpl
+            self.overridden.append(name)
+
+
+_JAVA_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_TS_ESCAPES = {**_JAVA_ESCAPES, "'": "\\'", "`": "\\`", "${": "\\${", "\v": "\\v", " ": "\\u2028", " ": "\\u2029"}
+_JAVA_SPECIAL = re.compile(r'[\\"\x00-\x1f\x7f]')
+_TS_SPECIAL = re.compile(r"\$\{|[\\\"'`\x00-\x1f\x7f  ]")
+_NEWLINES = re.compile(r"[\r\n  ]+")
+
+
+def _escaper(special: re.Pattern, table: dict, fallback):
+    # memoized: targets and values repeat a lot across the steps of a scenario
+    @functools.lru_cache(maxsize=1 << 16)
+    def escape(s) -> str:
+        s = str(s)
+        return special.sub(lambda m: table.get(m[0]) or fallback(m[0]), s) if special.search(s) else s
+    return escape
+
+
+# contents of a "..." literal; the caller supplies the quotes. Other control characters become 3-digit octal
+# escapes: javac decodes \uXXXX before lexing, so "\u000a" would end the literal.
+java_string = _escaper(_JAVA_SPECIAL, _JAVA_ESCAPES, lambda c: f"\\{ord(c):03o}")
+# contents of a '...', "..." or `...` literal (every quote style is escaped, and ${ so a template literal does not
+# interpolate)
+ts_string = _escaper(_TS_SPECIAL, _TS_ESCAPES, lambda c: f"\\u{ord(c):04x}")
+
+
+_MILLIS = re.compile(r"\s*\d+\s*")
+_CAMEL_BREAK = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_JAVA_KEYWORDS = frozenset("""abstract assert boolean break byte case catch char class const continue default do double
+else enum extends final finally float for goto if implements import instanceof int interface long native new package
+private protected public return short static strictfp super switch synchronized this throw throws transient try void
+volatile while true false null var record yield""".split())
+
+
+def wait_ms(value) -> int | None:
+    """A wait step's duration as whole milliseconds, or None when it is not one ("2s" from a hand-written step)."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value if value >= 0 else None
+    return int(value) if isinstance(value, str) and _MILLIS.fullmatch(value) else None
+
+
+@functools.lru_cache(maxsize=1 << 12)
+def java_identifier(s) -> str:
+    """camelCase Java identifier for an element name or step target ("Sign in" -> signIn, "2fa" -> e2fa). Names
+    that already are camelCase identifiers are kept, so POM fields and the steps using them always agree."""
+    words = _NON_ALNUM.sub(" ", _CAMEL_BREAK.sub(" ", str(s)).lower()).split() or ["element"]
+    name = words[0] + "".join(w.capitalize() for w in words[1:])
+    if name[0].isdigit():
+        return f"e{name}"
+    return f"{name}Element" if name in _JAVA_KEYWORDS else name
+
+
+def line_comment(s) -> str:
+    """Text that is safe inside a // comment (no line breaks)."""
+    return _NEWLINES.sub(" ", str(s))
@@ -0,0 +1,83 @@
+# servers/mcp_common/tracing.py
+# Request ids and optional OpenTelemetry spans.
+#
+# RequestContext (ASGI middleware) takes X-Request-Id from the caller (the router sends <run id>-<n>) or makes
+# one up, keeps it in a contextvar for the duration of the request and echoes it on the response. Jobs copy the
+# context when they are submitted, so the tool call, its queued job and the job's subprocesses share one id.
+#
+# Spans are only recorded when opentelemetry-api is installed; otherwise span() is a no-op. Incoming W3C
+# traceparent headers are honoured, so router and server spans join one trace. setup() installs the SDK with an
+# OTLP exporter when OTEL_EXPORTER_OTLP_ENDPOINT is set and the SDK packages are available.
+import contextlib, contextvars, os, uuid
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+except ImportError:  # tracing is optional
+    trace = None
+
+REQUEST_ID_HEADER = "x-request-id"
+request_id: contextvars.ContextVar[str | None] = contextvars.ContextVar("request_id", default=None)
+
+
+def setup(service_name: str) -> bool:
+    """Export spans over OTLP if configured; returns whether an exporter was installed."""
+    if trace is None or not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return False
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        return False
+    provider = TracerProvider(resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    return True
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """A span tagged with the current request id (no-op without opentelemetry)."""
+    if trace is None:
+        yield None
+        return
+    with trace.get_tracer("mcp").start_as_current_span(name) as s:
+        rid = request_id.get()
+        if rid:
+            s.set_attribute("request.id", rid)
+        for k, v in attributes.items():
+            if v is not None:
+                s.set_attribute(k, v)
+        yield s
+
+
+class RequestContext:
+    """ASGI middleware: request id contextvar, X-Request-Id response header and the caller's trace context.
+
+    Tool, job and subprocess spans are children of the incoming traceparent; the HTTP server span itself is
+    left to FastAPI/ASGI instrumentation so it is not recorded twice.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        rid = headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex[:16]
+        token = request_id.set(rid)
+        otel_token = otel_context.attach(propagate.extract(headers)) if trace is not None else None
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER.encode(), rid.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if otel_token is not None:
+                otel_context.detach(otel_token)
+            request_id.reset(token)
@@ -0,0 +1,105 @@
+# servers/mcp_common/uploads.py
+# Streamed file uploads: an NDJSON request body written to disk as it arrives.
+#
+# Each line is {"path", "content", "overwrite"?, "more"?}. A large file can be split over several lines with the
+# same path, all but the last marked "more": true; lines of different files may interleave. Chunks go straight to
+# a temp file beside the target (render_cache.PendingWrite), which is renamed into place when the last chunk lands,
+# so the server holds at most `concurrency` chunks at a time however big the project is. Chunk writes run in
+# worker threads, in parallel across files and in order within a file; unchanged files are left untouched.
+import asyncio, json
+from concurrent.futures import ThreadPoolExecutor
+from mcp_common.render_cache import Manifest
+
+MAX_LINE = 32 << 20  # one chunk; split bigger files with "more"
+
+
+async def ndjson(chunks):
+    """Parse an async iterable of byte chunks (a request body) into one object per non-empty line."""
+    buf = bytearray()
+    async for chunk in chunks:
+        buf += chunk
+        start = 0
+        while (end := buf.find(b"\n", start)) >= 0:
+            if end > start:
+                yield json.loads(buf[start:end])
+            start = end + 1
+        del buf[:start]
+        if len(buf) > MAX_LINE:
+            raise ValueError(f"upload line longer than {MAX_LINE} bytes; split the file into chunks with \"more\"")
+    if buf.strip():
+        yield json.loads(buf)
+
+
+class _File:
+    def __init__(self, rel: str, overwrite: bool):
+        self.rel, self.overwrite = rel, overwrite
+        self.pending = None  # PendingWrite, opened by the first chunk
+        self.tail: asyncio.Task | None = None  # last queued chunk; the next one waits for it
+        self.error: str | None = None
+
+
+async def write_stream(manifest: Manifest, items, concurrency: int = 8):
+    """Write the files described by `items` (async iterable of upload lines); yields {path, written} or
+    {path, error} per file as each one completes."""
+    slots = asyncio.Semaphore(max(1, concurrency))
+    open_files: dict[str, _File] = {}
+    finals: list[asyncio.Task] = []
+
+    async def step(f: _File, prev, data: bytes, last: bool):
+        try:
+            if prev is not None:
+                await prev
+            if f.error is None:
+                if f.pending is None:
+                    f.pending = await asyncio.to_thread(manifest.open, f.rel, f.overwrite)
+                if data:
+                    await asyncio.to_thread(f.pending.append, data)
+                if last:
+                    return {"path": f.rel, "written": await asyncio.to_thread(f.pending.commit)}
+        except Exception as e:
+            f.error = str(e)
+        finally:
+            slots.release()
+        if not last:
+            return None
+        if f.pending is not None:
+            await asyncio.to_thread(f.pending.abort)
+        return {"path": f.rel, "error": f.error}
+
+    try:
+        async for item in items:
+            rel = item["path"]
+            f = open_files.get(rel)
+            if f is None:
+                f = open_files[rel] = _File(rel, item.get("overwrite", True))
+            last = not item.get("more")
+            await slots.acquire()  # backpressure: stop reading the body while `concurrency` chunks are pending
+            f.tail = asyncio.create_task(step(f, f.tail, (item.get("content") or "").encode("utf-8"), last))
+            if last:
+                finals.append(open_files.pop(rel).tail)
+            while finals and finals[0].done():
+                yield finals.pop(0).result()
+        for f in open_files.values():
+            f.error = "upload ended before the file's last chunk"
+            await slots.acquire()
+            finals.append(asyncio.create_task(step(f, f.tail, b"", True)))
+        for task in finals:
+            yield await task
+    finally:
+        # the body broke off (malformed line, client gone) or the caller stopped reading: queued chunk writes finish
+        # without writing more, then files that never got their last chunk lose their temp files
+        for f in open_files.values():
+            f.error = f.error or "upload aborted"
+        await asyncio.gather(*finals, *(f.tail for f in open_files.values() if f.tail), return_exceptions=True)
+        for f in open_files.values():
+            if f.pending is not None:
+                await asyncio.to_thread(f.pending.abort)
+
+
+def write_all(manifest: Manifest, files, concurrency: int = 8) -> list[bool]:
+    """Manifest.write for (path, content, overwrite) triples on `concurrency` threads; written flags in order."""
+    files = list(files)
+    if len(files) < 2 or concurrency < 2:
+        return [manifest.write(*f) for f in files]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(files))) as pool:
+        return list(pool.map(lambda f: manifest.write(*f), files))
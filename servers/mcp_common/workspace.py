@@ -0,0 +1,253 @@
+# servers/mcp_common/workspace.py
+# Per-project coordination for tools that touch a testsRoot / projectRoot.
+#
+# Every root has a reader/writer lock. Calls that change the tree (writing generated files, git staging and commits)
+# hold it exclusively. A test run holds it shared only while its scratch workspace is synced: a mirror of the root
+# built from hard links, under MCP_SCRATCH_DIR (default: the server's cache, mcp_common.state). The run then works in
+# that directory, so several runs of one project proceed side by side and writes to the root wait for a sync, not for
+# a whole suite.
+#
+# Hard links share bytes, so the mirror is only a snapshot because nothing rewrites a file in place: generated files
+# are written to a temp file and renamed (render_cache), which gives the root a new inode while the workspace keeps
+# the old one. Files a run changes in its workspace must be replaced the same way. Where linking fails (another
+# filesystem than the root's) files are copied, and kept while their size and mtime match. Workspaces are kept per
+# root and slot and re-synced on the next run, so their build output (OUTPUTS: Gradle's build/ and .gradle/,
+# Playwright reports) stays warm. A workspace is only used by one run at a time; concurrent runs get further slots.
+#
+# Every exclusive hold bumps the root's generation, which the run tools put in their coalescing keys
+# (mcp_common.singleflight): identical runs share one job only while nothing was written in between.
+#
+# MCP_RUN_WORKSPACE=inplace runs in the root itself instead, holding its lock exclusively for the whole run.
+# Locks live in the server process; the router sends all work on one root to one node (router/nodes.py). That
+# stops holding with the router's opt-in spill-over (ROUTER_STICKY_SLACK) and several routers: each one may then
+# pick another node for a busy root, and runs on those nodes are not serialised against each other.
+import asyncio, contextlib, hashlib, itertools, os, pathlib, shutil, stat, time, uuid
+from collections import deque
+from mcp_common import metrics, state
+
+SCRATCH_DIR = os.getenv("MCP_SCRATCH_DIR")
+RUN_MODE = os.getenv("MCP_RUN_WORKSPACE", "scratch")  # scratch | inplace
+# written by runs, never mirrored from the root nor removed from a workspace
+OUTPUTS = {".git", ".gradle", "build", "test-results", "playwright-report", ".pw-reports"}
+KEEP_LINKS = {"node_modules"}  # top-level symlinks a run creates itself (toolchain.link)
+
+LOCK_WAIT = metrics.REGISTRY.histogram("mcp_workspace_lock_wait_seconds", "Time calls waited for a project lock.",
+                                       ("mode",))
+SYNC_SECONDS = metrics.REGISTRY.histogram("mcp_workspace_sync_seconds",
+                                          "Time to bring a scratch workspace in line with its root.")
+
+
+class RWLock:
+    """Many shared holders or one exclusive holder, granted in arrival order (a waiting writer holds off later
+    readers, and the other way round). asyncio only: every holder runs on the server's event loop."""
+
+    def __init__(self):
+        self.readers = 0
+        self.writer = False
+        self._waiters: deque[tuple[bool, asyncio.Future]] = deque()
+
+    def _free(self, exclusive: bool) -> bool:
+        return not self.writer and not (exclusive and self.readers)
+
+    def _take(self, exclusive: bool):
+        if exclusive:
+            self.writer = True
+        else:
+            self.readers += 1
+
+    async def acquire(self, exclusive: bool):
+        if not self._waiters and self._free(exclusive):
+            self._take(exclusive)
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append((exclusive, fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release(exclusive)  # granted just as the caller was cancelled
+            else:
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove((exclusive, fut))
+                self._wake()
+            raise
+
+    def release(self, exclusive: bool):
+        if exclusive:
+            self.writer = False
+        else:
+            self.readers -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            exclusive, fut = self._waiters[0]
+            if fut.done():
+                self._waiters.popleft()
+                continue
+            if not self._free(exclusive):
+                return
+            self._waiters.popleft()
+            self._take(exclusive)
+            fut.set_result(None)
+            if exclusive:
+                return
+
+    @property
+    def waiting(self) -> int:
+        return sum(not f.done() for _, f in self._waiters)
+
+
+class Workspaces:
+    def __init__(self, scratch_dir: str | None = SCRATCH_DIR, mode: str = RUN_MODE):
+        self.scratch_dir, self.mode = scratch_dir, mode
+        self._locks: dict[str, RWLock] = {}
+        self._busy: dict[str, set[int]] = {}  # root -> workspace slots in use
+        self._generations: dict[str, int] = {}  # root -> exclusive holds so far
+
+    def lock(self, root) -> RWLock:
+        return self._locks.setdefault(os.path.realpath(root), RWLock())
+
+    def generation(self, root) -> int:
+        """Bumped whenever a writer takes the root's lock: equal generations mean no tool wrote in between."""
+        return self._generations.get(os.path.realpath(root), 0)
+
+    @contextlib.asynccontextmanager
+    async def locked(self, root, exclusive: bool = True):
+        lock, start = self.lock(root), time.perf_counter()
+        await lock.acquire(exclusive)
+        LOCK_WAIT.observe(time.perf_counter() - start, mode="exclusive" if exclusive else "shared")
+        if exclusive:  # on taking the lock: a run started before this write must not be joined after it
+            key = os.path.realpath(root)
+            self._generations[key] = self._generations.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            lock.release(exclusive)
+
+    def scratch_path(self, root: str, slot: int) -> pathlib.Path:
+        if not self.scratch_dir:
+            return state.project_dir(root, "scratch") / str(slot)
+        root = pathlib.Path(root)
+        tag = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:8]
+        return pathlib.Path(self.scratch_dir) / f"{root.name}-{tag}" / str(slot)
+
+    @contextlib.asynccontextmanager
+    async def for_run(self, root, log):
+        """The directory a run works in: a freshly synced scratch workspace of `root`, or (inplace mode) the root
+        itself, locked for the whole run."""
+        if self.mode == "inplace":
+            async with self.locked(root):
+                yield str(root)
+            return
+        key = os.path.realpath(root)
+        busy = self._busy.setdefault(key, set())
+        slot = next(k for k in itertools.count() if k not in busy)
+        busy.add(slot)
+        try:
+            path = self.scratch_path(key, slot)
+            async with self.locked(root, exclusive=False):
+                start = time.perf_counter()
+                counts = await asyncio.to_thread(sync, key, path)
+                SYNC_SECONDS.observe(time.perf_counter() - start)
+            log("workspace", f"{path}: {counts['linked']} linked, {counts['copied']} copied, "
+                             f"{counts['removed']} removed, {counts['kept']} unchanged")
+            yield str(path)
+        finally:
+            busy.discard(slot)
+
+    def samples(self):
+        """Rows for metrics.REGISTRY.collect."""
+        locks = list(self._locks.values())
+        yield ("mcp_workspace_locks_held", "Project locks held, by mode.", "gauge", {"mode": "shared"},
+               sum(lock.readers for lock in locks))
+        yield ("mcp_workspace_locks_held", "Project locks held, by mode.", "gauge", {"mode": "exclusive"},
+               sum(lock.writer for lock in locks))
+        yield ("mcp_workspace_lock_waiting", "Calls waiting for a project lock.", "gauge", {},
+               sum(lock.waiting for lock in locks))
+        yield ("mcp_workspace_runs", "Runs working in a scratch workspace.", "gauge", {},
+               sum(len(s) for s in self._busy.values()))
+
+
+def sync(root, dest) -> dict:
+    """Make `dest` a hard-linked mirror of `root` (OUTPUTS excepted); returns counts of linked, copied, removed and
+    unchanged files."""
+    root, dest = pathlib.Path(root), pathlib.Path(dest)
+    counts = {"linked": 0, "copied": 0, "removed": 0, "kept": 0}
+    _ensure_dir(dest)
+    seen = set()
+    for dirpath, dirs, files in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root)
+        dirs[:] = [d for d in dirs if d not in OUTPUTS]
+        for name in list(dirs):
+            if os.path.islink(os.path.join(dirpath, name)):
+                dirs.remove(name)
+                files.append(name)  # mirrored as a link, not descended into
+        for name in dirs:
+            _ensure_dir(dest / rel_dir / name)
+            seen.add(os.path.normpath(os.path.join(rel_dir, name)))
+        for name in files:
+            if name.endswith(".tmp"):
+                continue  # a write in progress
+            rel = os.path.normpath(os.path.join(rel_dir, name))
+            try:
+                counts[_mirror(os.path.join(dirpath, name), dest / rel)] += 1
+            except FileNotFoundError:
+                continue  # vanished while walking
+            seen.add(rel)
+    for dirpath, dirs, files in os.walk(dest, topdown=True):
+        rel_dir = os.path.relpath(dirpath, dest)
+        dirs[:] = [d for d in dirs if d not in OUTPUTS]
+        for name in dirs + files:
+            rel = os.path.normpath(os.path.join(rel_dir, name))
+            path = dest / rel
+            if rel in seen or (rel_dir == "." and name in KEEP_LINKS and path.is_symlink()):
+                continue
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path)
+                dirs.remove(name)
+            else:
+                path.unlink()
+            counts["removed"] += 1
+    return counts
+
+
+def _ensure_dir(path: pathlib.Path):
+    if path.is_symlink() or (path.exists() and not path.is_dir()):
+        path.unlink()  # e.g. a toolchain link where the root now has a real node_modules
+    path.mkdir(parents=True, exist_ok=True)
+
+
+def _mirror(src: str, dst: pathlib.Path) -> str:
+    st = os.lstat(src)
+    try:
+        have = os.lstat(dst)
+    except FileNotFoundError:
+        have = None
+    if stat.S_ISLNK(st.st_mode):
+        target = os.readlink(src)
+        if have is not None and stat.S_ISLNK(have.st_mode) and os.readlink(dst) == target:
+            return "kept"
+        if have is not None and stat.S_ISDIR(have.st_mode):
+            shutil.rmtree(dst)
+        tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:12]}.tmp")
+        os.symlink(target, tmp)
+        os.replace(tmp, dst)
+        return "linked"
+    if have is not None:
+        if (have.st_ino, have.st_dev) == (st.st_ino, st.st_dev):
+            return "kept"
+        if stat.S_ISREG(have.st_mode) and have.st_nlink == 1 and (have.st_size, have.st_mtime_ns) == (
+                st.st_size, st.st_mtime_ns):
+            return "kept"  # an earlier copy (copy2 keeps the mtime)
+        if stat.S_ISDIR(have.st_mode):
+            shutil.rmtree(dst)
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:12]}.tmp")
+    try:
+        os.link(src, tmp)
+        outcome = "linked"
+    except OSError:
+        shutil.copy2(src, tmp)
+        outcome = "copied"
+    os.replace(tmp, dst)  # never in place: the old inode may still be linked from the root
+    return outcome
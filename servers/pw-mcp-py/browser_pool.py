@@ -0,0 +1,225 @@
+# servers/pw-mcp-py/browser_pool.py
+# Warm pool of Chromium browsers that hands out isolated BrowserContexts keyed by session id.
+#
+# One Playwright driver is started for the lifetime of the server (the old launch_browser started a new
+# driver per call and never stopped it). Browsers are launched up front and shared: every session gets its
+# own BrowserContext + Page, so concurrent router runs no longer stomp on each other's page. A page is only
+# ever handed to the holder of its session id. Browsers are launched outside the pool's condition, so a
+# 1-2 s Chromium start does not hold up sessions being opened or closed on the browsers already running.
+#
+# Playwright objects are bound to the event loop that created them: start() must be awaited on the server's
+# loop (the FastAPI lifespan) and every page tool runs as a coroutine on that same loop. Playwright itself is only
+# imported by start(), so importing the server (or a generator-only server) does not pay for it.
+import asyncio, os, time, uuid
+from mcp_common import metrics
+from mcp_common.registry import NotFound
+
+LAUNCH_SECONDS = metrics.REGISTRY.histogram("mcp_browser_launch_seconds", "Chromium launch time.", ("headless",))
+
+POOL_SIZE = int(os.getenv("PW_POOL_SIZE", "2"))                  # browsers per headless/headed flavour
+MAX_CONTEXTS = int(os.getenv("PW_POOL_MAX_CONTEXTS", "8"))       # concurrent sessions per browser
+RECYCLE_AFTER = int(os.getenv("PW_POOL_RECYCLE_AFTER", "100"))   # contexts served before a browser is replaced
+IDLE_TTL = float(os.getenv("PW_POOL_IDLE_TTL", "300"))           # seconds before an unused session is closed
+ACQUIRE_TIMEOUT = float(os.getenv("PW_POOL_ACQUIRE_TIMEOUT", "30"))
+
+
+class _Slot:
+    __slots__ = ("browser", "headless", "active", "uses", "retiring")
+
+    def __init__(self, browser, headless: bool):
+        self.browser = browser
+        self.headless = headless
+        self.active = 0
+        self.uses = 0
+        self.retiring = False
+
+
+class _Session:
+    __slots__ = ("slot", "context", "page", "last_used")
+
+    def __init__(self, slot: _Slot, context, page):
+        self.slot = slot
+        self.context = context
+        self.page = page
+        self.last_used = time.monotonic()
+
+
+class BrowserPool:
+    def __init__(self, size: int = POOL_SIZE, max_contexts: int = MAX_CONTEXTS,
+                 recycle_after: int = RECYCLE_AFTER, idle_ttl: float = IDLE_TTL):
+        self.size = size
+        self.max_contexts = max_contexts
+        self.recycle_after = recycle_after
+        self.idle_ttl = idle_ttl
+        self._pw = None
+        self._slots: list[_Slot] = []
+        self._sessions: dict[str, _Session] = {}
+        self._launching = {True: 0, False: 0}  # browsers being launched per headless flavour, counted as live
+        self._waiting = 0  # acquire() calls blocked on a full pool
+        self._cond: asyncio.Condition | None = None
+        self._reaper = None
+        self._tasks: set[asyncio.Task] = set()  # background warm-ups, referenced until they finish
+
+    # --- lifecycle -------------------------------------------------------------------------------------
+    async def start(self, prewarm: bool = True):
+        from playwright.async_api import async_playwright
+        self._cond = asyncio.Condition()
+        self._pw = await async_playwright().start()
+        self._reaper = asyncio.create_task(self._reap())
+        if prewarm:
+            await self._warm(self.size)
+
+    async def shutdown(self):
+        if self._reaper:
+            self._reaper.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        for sid in list(self._sessions):
+            await self.release(sid)
+        for slot in self._slots:
+            try:
+                await slot.browser.close()
+            except Exception:
+                pass
+        self._slots.clear()
+        if self._pw:
+            await self._pw.stop()
+            self._pw = None
+
+    # --- sessions --------------------------------------------------------------------------------------
+    async def acquire(self, headless: bool = True) -> str:
+        """Open an isolated context on the least-loaded browser and return its session id."""
+        async with self._cond:
+            self._waiting += 1
+            try:
+                slot = await asyncio.wait_for(self._cond.wait_for(lambda: self._free_slot(headless)), ACQUIRE_TIMEOUT)
+            finally:
+                self._waiting -= 1
+            if slot is True:  # below pool size for this flavour: reserve a launch, run it outside the lock
+                self._launching[headless] += 1
+            else:
+                self._take(slot)
+        if slot is True:
+            slot = await self._launch_reserved(headless, take=True)
+        try:
+            context = await slot.browser.new_context()
+            page = await context.new_page()
+        except Exception:
+            await self._detach(slot)
+            raise
+        sid = uuid.uuid4().hex
+        self._sessions[sid] = _Session(slot, context, page)
+        return sid
+
+    async def release(self, session_id: str):
+        sess = self._sessions.pop(session_id, None)
+        if sess is None:
+            return
+        try:
+            await sess.context.close()
+        except Exception:
+            pass
+        await self._detach(sess.slot)
+
+    def page(self, session_id: str):
+        """Page of a session; never another caller's page, so an unknown or missing id is an error."""
+        sess = self._sessions.get(session_id) if session_id else None
+        if sess is None:
+            raise NotFound(f"unknown browser session {session_id!r}; call launch_browser first")
+        sess.last_used = time.monotonic()
+        return sess.page
+
+    def stats(self) -> dict:
+        return {
+            "browsers": len(self._slots),
+            "sessions": len(self._sessions),
+            "capacity": self.size * self.max_contexts,
+            "waiting": self._waiting,
+            "perBrowser": [{"headless": s.headless, "active": s.active, "uses": s.uses, "retiring": s.retiring}
+                           for s in self._slots],
+        }
+
+    def samples(self):
+        """Pool occupancy rows for metrics.REGISTRY.collect."""
+        yield "mcp_browser_pool_browsers", "Launched browsers.", "gauge", {}, len(self._slots)
+        yield "mcp_browser_pool_sessions", "Open sessions (browser contexts).", "gauge", {}, len(self._sessions)
+        yield "mcp_browser_pool_capacity", "Maximum concurrent sessions.", "gauge", {}, self.size * self.max_contexts
+        yield "mcp_browser_pool_waiting", "launch_browser calls waiting for a free slot.", "gauge", {}, self._waiting
+        yield "mcp_browser_pool_retiring", "Browsers draining before recycle.", "gauge", {}, \
+            sum(s.retiring for s in self._slots)
+
+    # --- internals -------------------------------------------------------------------------------------
+    def _free_slot(self, headless: bool):
+        candidates = [s for s in self._slots
+                      if s.headless == headless and not s.retiring and s.active < self.max_contexts]
+        if candidates:
+            return min(candidates, key=lambda s: s.active)
+        if self._live(headless) < self.size:
+            return True
+        return None
+
+    def _live(self, headless: bool) -> int:
+        return self._launching[headless] + sum(1 for s in self._slots if s.headless == headless and not s.retiring)
+
+    def _take(self, slot: _Slot):
+        slot.active += 1
+        slot.uses += 1
+        if slot.uses >= self.recycle_after:
+            slot.retiring = True
+
+    async def _launch_reserved(self, headless: bool, take: bool = False) -> _Slot:
+        """Launch a browser reserved in _launching (without holding the condition) and add it to the pool;
+        take=True also counts a session on it before anyone else can fill it."""
+        try:
+            start = time.perf_counter()
+            browser = await self._pw.chromium.launch(headless=headless)
+            LAUNCH_SECONDS.observe(time.perf_counter() - start, headless=str(headless).lower())
+        except BaseException:
+            async with self._cond:
+                self._launching[headless] -= 1
+                self._cond.notify_all()
+            raise
+        slot = _Slot(browser, headless)
+        async with self._cond:
+            self._launching[headless] -= 1
+            self._slots.append(slot)
+            if take:
+                self._take(slot)
+            self._cond.notify_all()
+        return slot
+
+    async def _detach(self, slot: _Slot):
+        async with self._cond:
+            slot.active -= 1
+            if slot.retiring and slot.active == 0:
+                self._slots.remove(slot)
+                try:
+                    await slot.browser.close()
+                except Exception:
+                    pass
+            self._cond.notify_all()
+        # keep the headless flavour warm after a recycle
+        if slot.retiring and slot.headless and slot not in self._slots:
+            task = asyncio.create_task(self._warm(1))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _warm(self, n: int):
+        async with self._cond:
+            n = max(0, min(n, self.size - self._live(True)))
+            self._launching[True] += n
+        for k in range(n):
+            try:
+                await self._launch_reserved(True)
+            except BaseException:
+                async with self._cond:
+                    self._launching[True] -= n - k - 1  # the launches not started yet
+                    self._cond.notify_all()
+                raise
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_ttl / 4))
+            cutoff = time.monotonic() - self.idle_ttl
+            for sid in [sid for sid, s in self._sessions.items() if s.last_used < cutoff]:
+                await self.release(sid)
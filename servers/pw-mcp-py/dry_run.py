@@ -0,0 +1,92 @@
+# servers/pw-mcp-py/dry_run.py
+# Execute router steps directly on a pooled page, so a wrong selector is caught in milliseconds instead of by a
+# full `playwright test` run.
+#
+# Each step runs with a short timeout (navigation gets a longer one) and the same selector the spec would use
+# (`selector` from resolve_locators, else "#<target>"). The first failure stops the run by default: later steps
+# usually depend on it and would only fail on their own timeouts. Steps that would render as step.unknown (no
+# dry-run action, missing target or value) are skipped, not failed, since the generated spec skips them too.
+import time
+from mcp_common import metrics
+from mcp_common.templating import wait_ms
+
+STEPS = metrics.REGISTRY.counter("mcp_dry_run_steps_total", "dry_run_steps steps by outcome.", ("action", "outcome"))
+
+
+def selector(step: dict) -> str:
+    return step.get("selector") or f"#{step.get('target')}"
+
+
+async def _open(page, s, timeout, nav_timeout):
+    await page.goto(s["value"], timeout=nav_timeout)
+
+
+async def _click(page, s, timeout, nav_timeout):
+    await page.click(selector(s), timeout=timeout)
+
+
+async def _type(page, s, timeout, nav_timeout):
+    await page.fill(selector(s), str(s["value"]), timeout=timeout)
+
+
+async def _assert_text(page, s, timeout, nav_timeout):
+    from playwright.async_api import expect
+    await expect(page.locator(selector(s))).to_contain_text(str(s["value"]), timeout=timeout)
+
+
+async def _select(page, s, timeout, nav_timeout):
+    await page.select_option(selector(s), str(s["value"]), timeout=timeout)
+
+
+async def _hover(page, s, timeout, nav_timeout):
+    await page.hover(selector(s), timeout=timeout)
+
+
+async def _wait(page, s, timeout, nav_timeout):
+    await page.wait_for_timeout(min(wait_ms(s["value"]), timeout))  # a fixed pause proves nothing; keep it short
+
+
+async def _wait_for(page, s, timeout, nav_timeout):
+    await page.locator(selector(s)).wait_for(timeout=timeout)
+
+
+# action -> (runner, needs target, needs value); mirrors the step.* templates in ts_templates.py
+ACTIONS = {
+    "open": (_open, False, True), "click": (_click, True, False), "type": (_type, True, True),
+    "asserttext": (_assert_text, True, True), "select": (_select, True, True), "hover": (_hover, True, False),
+    "wait": (_wait, False, True), "waitfor": (_wait_for, True, False),
+}
+
+
+async def run_steps(page, steps: list[dict], timeout_ms: int, nav_timeout_ms: int, stop_on_failure: bool = True
+                    ) -> dict:
+    """Run `steps` on `page`; returns { ok, passed, failed, skipped, ms, failedAt, steps: [per-step result] }."""
+    results, failed_at, start = [], None, time.perf_counter()
+    for idx, s in enumerate(steps):
+        action = (s.get("action") or "").lower()
+        res = {"index": idx, "action": s.get("action"), "target": s.get("target")}
+        entry = ACTIONS.get(action)
+        if entry is not None and entry[1]:
+            res["selector"] = selector(s)
+        if failed_at is not None and stop_on_failure:
+            res.update(status="skipped", reason="after failure")
+        elif entry is None or (entry[1] and not s.get("target")) or (entry[2] and s.get("value") in (None, "")):
+            res.update(status="skipped", reason="not executable" if entry is None else "missing target or value")
+        elif action == "wait" and wait_ms(s["value"]) is None:
+            res.update(status="skipped", reason="duration is not in milliseconds")
+        else:
+            t0 = time.perf_counter()
+            try:
+                await entry[0](page, s, timeout_ms, nav_timeout_ms)
+                res["status"] = "passed"
+            except Exception as e:
+                res.update(status="failed", error=str(e).split("\n", 1)[0])
+                if failed_at is None:
+                    failed_at = idx
+            res["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        STEPS.inc(action=action if entry is not None else "unknown", outcome=res["status"])
+        results.append(res)
+    count = lambda status: sum(r["status"] == status for r in results)
+    return {"ok": failed_at is None, "passed": count("passed"), "failed": count("failed"),
+            "skipped": count("skipped"), "ms": round((time.perf_counter() - start) * 1000, 1), "failedAt": failed_at,
+            "steps": results}
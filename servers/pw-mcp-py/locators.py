@@ -0,0 +1,236 @@
+# servers/pw-mcp-py/locators.py
+# Resolve scenario targets ("username", "Sign in", "search box") to selectors on the live page.
+#
+# One page.evaluate snapshots every interactive or labelled element with its test id, id, name, label, aria-label,
+# placeholder, title/alt, input type and short visible text, plus a selector that is unique on the page (CSS when
+# possible, otherwise a text or positional XPath). LocatorIndex maps the normalised keys to those elements, and resolve()
+# matches a whole list of targets against it in one pass: exact key first, then token overlap.
+#
+# Indexes are cached per (url, DOM hash). The hash is a cheap in-page digest of the serialised DOM, so a page that
+# has not changed since the last scenario skips the snapshot and the index build.
+import re, threading
+from collections import OrderedDict
+from mcp_common.templating import java_identifier  # POM field names, as the Selenium server renders them
+
+# FNV-1a over the serialised DOM: one string walk in the page, no structured data crosses the wire
+HASH_JS = """() => {
+  const s = document.documentElement ? document.documentElement.outerHTML : '';
+  let h = 0x811c9dc5;
+  for (let i = 0; i < s.length; i++) { h ^= s.charCodeAt(i); h = Math.imul(h, 0x01000193); }
+  return location.href + '#' + (h >>> 0).toString(16) + ':' + s.length;
+}"""
+
+SNAPSHOT_JS = """(limit) => {
+  const SEL = 'a,button,input,select,textarea,summary,label,h1,h2,h3,h4,h5,h6,header,nav,main,form,[role],' +
+              '[id],[name],[data-testid],[data-test],[data-qa],[aria-label],[placeholder],[contenteditable]';
+  const norm = (s) => (s || '').replace(/\\s+/g, ' ').trim();
+  const unique = (css) => { try { return document.querySelectorAll(css).length === 1; } catch (e) { return false; } };
+  const attr = (name, v) => `[${name}="${CSS.escape(v)}"]`;
+  const position = (el) => {
+    const parts = [];
+    for (; el && el.nodeType === 1; el = el.parentElement) {
+      let i = 1;
+      for (let s = el.previousElementSibling; s; s = s.previousElementSibling) if (s.tagName === el.tagName) i++;
+      parts.unshift(`${el.tagName.toLowerCase()}[${i}]`);
+    }
+    return '/' + parts.join('/');
+  };
+  const out = [];
+  for (const el of document.querySelectorAll(SEL)) {
+    if (out.length >= limit) break;
+    const tag = el.tagName.toLowerCase();
+    const testid = el.getAttribute('data-testid') || el.getAttribute('data-test') || el.getAttribute('data-qa');
+    const labels = el.labels ? Array.from(el.labels, (l) => norm(l.innerText)).join(' ') : '';
+    const labelledBy = (el.getAttribute('aria-labelledby') || '').split(/\\s+/)
+      .map((id) => id && document.getElementById(id)).filter(Boolean).map((n) => norm(n.innerText)).join(' ');
+    const text = ['input', 'select', 'textarea', 'form', 'main', 'nav'].includes(tag) ? '' : norm(el.innerText);
+    const keys = {
+      testid: testid || '', id: el.id || '', name: el.getAttribute('name') || '',
+      label: labels || labelledBy, aria: el.getAttribute('aria-label') || '',
+      placeholder: el.getAttribute('placeholder') || '',
+      title: el.getAttribute('title') || el.getAttribute('alt') || '',
+      text: text.length <= 80 ? text : '', type: ['input', 'button'].includes(tag) ? el.getAttribute('type') || '' : '',
+      tag: tag,
+    };
+    let css = null;
+    for (const c of [testid && attr(el.hasAttribute('data-testid') ? 'data-testid' :
+                                     el.hasAttribute('data-test') ? 'data-test' : 'data-qa', testid),
+                     el.id && '#' + CSS.escape(el.id),
+                     keys.name && tag + attr('name', keys.name),
+                     keys.aria && tag + attr('aria-label', keys.aria),
+                     keys.placeholder && tag + attr('placeholder', keys.placeholder)]) {
+      if (c && unique(c)) { css = c; break; }
+    }
+    let xpath = null;
+    if (!css) {
+      if (keys.text && !keys.text.includes('"')) {
+        const x = `//${tag}[normalize-space()="${keys.text}"]`;
+        if (document.evaluate(`count(${x})`, document, null, XPathResult.NUMBER_TYPE, null).numberValue === 1) xpath = x;
+      }
+      xpath = xpath || position(el);
+    }
+    out.push({tag, role: el.getAttribute('role') || '', type: el.getAttribute('type') || '', css, xpath, keys});
+  }
+  return out;
+}"""
+
+SNAPSHOT_LIMIT = 5000
+
+# how much a match on each key is trusted; ids and test ids are chosen by developers for exactly this purpose
+_WEIGHTS = {"testid": 1.0, "id": 0.95, "name": 0.9, "label": 0.9, "aria": 0.9, "placeholder": 0.85,
+            "text": 0.8, "title": 0.7, "type": 0.6, "tag": 0.5}
+_FIELDS = {"input", "textarea", "select"}
+_CLICKABLE = {"a", "button", "summary", "input", "label"}
+# step action -> element tags that suit it, used to break ties ("type ... into email" prefers the input)
+_ACTION_TAGS = {"type": _FIELDS, "select": {"select"}, "click": _CLICKABLE, "hover": _CLICKABLE}
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+_FILLER = {"the", "a", "an", "field", "button", "btn", "input", "box", "link", "on", "of"}
+MIN_SCORE = 0.5
+
+
+def normalize(s: str) -> str:
+    """"submitButton", "Submit_button", " Submit  button " -> "submit button"."""
+    return _NON_WORD.sub(" ", _CAMEL.sub(" ", s or "").lower()).strip()
+
+
+def _tokens(s: str) -> set[str]:
+    words = set(normalize(s).split())
+    return (words - _FILLER) or words
+
+
+class LocatorIndex:
+    def __init__(self, elements: list[dict]):
+        self.elements = elements
+        self._exact: dict[str, list[tuple[float, int]]] = {}
+        self._tokens: dict[str, list[tuple[float, int, int]]] = {}
+        for n, el in enumerate(elements):
+            for key, value in el["keys"].items():
+                if not value:
+                    continue
+                weight, norm = _WEIGHTS[key], normalize(value)
+                # "user name", "userName" and "username" are the same key
+                self._exact.setdefault(norm.replace(" ", ""), []).append((weight, n))
+                toks = _tokens(value)
+                for t in toks:
+                    self._tokens.setdefault(t, []).append((weight, n, len(toks)))
+
+    def __len__(self):
+        return len(self.elements)
+
+    def match(self, target: str, action: str | None = None) -> dict | None:
+        """Best element for one target, or None when nothing scores MIN_SCORE."""
+        preferred = _ACTION_TAGS.get((action or "").lower(), ())
+        scores: dict[int, float] = {}
+        for weight, n in self._exact.get(normalize(target).replace(" ", ""), ()):
+            scores[n] = max(scores.get(n, 0.0), weight)
+        if not scores:
+            wanted = _tokens(target)
+            overlap: dict[tuple[int, float, int], int] = {}
+            for t in wanted:
+                for weight, n, size in self._tokens.get(t, ()):
+                    overlap[(n, weight, size)] = overlap.get((n, weight, size), 0) + 1
+            for (n, weight, size), hits in overlap.items():
+                # share of the target's words found, discounted for extra words on the element; below any exact hit
+                score = weight * 0.9 * hits / len(wanted) * (0.5 + 0.5 * hits / size)
+                scores[n] = max(scores.get(n, 0.0), score)
+        best, best_score = None, 0.0
+        for n, score in scores.items():
+            el = self.elements[n]
+            if el["tag"] in preferred:
+                score += 0.05
+            if score > best_score:
+                best, best_score = el, score
+        if best is None or best_score < MIN_SCORE:
+            return None
+        return _locator(target, best, best_score)
+
+    def resolve(self, targets: list[tuple[str, str | None]]) -> dict[str, dict | None]:
+        """Match (target, action) pairs in one pass; each distinct target is looked up once."""
+        out: dict[str, dict | None] = {}
+        for target, action in targets:
+            if target not in out:
+                out[target] = self.match(target, action)
+        return out
+
+
+def _locator(target: str, el: dict, score: float) -> dict:
+    css, xpath = el["css"], el["xpath"]
+    loc = {"target": target, "field": java_identifier(target), "score": round(min(score, 1.0), 3), "tag": el["tag"],
+           "matchedBy": next((k for k in _WEIGHTS if el["keys"].get(k) and
+                              normalize(el["keys"][k]).replace(" ", "") == normalize(target).replace(" ", "")),
+                             "tokens")}
+    if css is not None:
+        id_only = css.startswith("#") and re.fullmatch(r"#[A-Za-z][\w-]*", css)
+        loc.update(selector=css, locatorType="id" if id_only else "css", locatorValue=css[1:] if id_only else css)
+    else:
+        loc.update(selector=f"xpath={xpath}", locatorType="xpath", locatorValue=xpath)
+    return loc
+
+
+class IndexCache:
+    """LRU of LocatorIndex by (url, DOM hash)."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[str, LocatorIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> LocatorIndex | None:
+        with self._lock:
+            index = self._items.get(key)
+            if index is None:
+                self.misses += 1
+            else:
+                self._items.move_to_end(key)
+                self.hits += 1
+            return index
+
+    def put(self, key: str, index: LocatorIndex):
+        with self._lock:
+            self._items[key] = index
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._items), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def samples(self):
+        """Rows for metrics.REGISTRY.collect."""
+        yield "mcp_locator_index_entries", "Cached page locator indexes.", "gauge", {}, len(self._items)
+        yield "mcp_locator_index_hits_total", "resolve_locators calls served from a cached index.", "counter", {}, \
+            self.hits
+        yield "mcp_locator_index_misses_total", "resolve_locators calls that snapshotted the page.", "counter", {}, \
+            self.misses
+
+
+async def index_for(page, cache: IndexCache) -> tuple[str, LocatorIndex, bool]:
+    """(dom key, index, cached) for the page as it is now."""
+    key = await page.evaluate(HASH_JS)
+    index = cache.get(key)
+    if index is not None:
+        return key, index, True
+    index = LocatorIndex(await page.evaluate(SNAPSHOT_JS, SNAPSHOT_LIMIT))
+    cache.put(key, index)
+    return key, index, False
+
+
+def annotate(steps: list[dict], locators: dict[str, dict | None]) -> list[dict]:
+    """Copies of `steps` with `selector` set wherever the target resolved."""
+    out = []
+    for s in steps:
+        loc = locators.get(s.get("target") or "")
+        out.append({**s, "selector": loc["selector"]} if loc else s)
+    return out
+
+
+def pom_elements(locators: dict[str, dict | None]) -> list[dict]:
+    """generate_pom_ui `elements` for the resolved targets, one field per distinct name."""
+    seen, out = set(), []
+    for loc in locators.values():
+        if loc and loc["field"] not in seen:
+            seen.add(loc["field"])
+            out.append({"name": loc["field"], "locatorType": loc["locatorType"], "locatorValue": loc["locatorValue"]})
+    return out
@@ -0,0 +1,128 @@
+# servers/pw-mcp-py/pw_runner.py
+# Playwright test execution: CLI options, local sharding across several processes, and merging of the
+# JSON reporter output into one structured result (per-test status, duration, flakiness).
+import asyncio, json, os, pathlib, re
+from mcp_common import proc
+
+REPORT_DIR = ".pw-reports"
+SPEC = re.compile(r".*\.(spec|test)\.[cm]?[jt]sx?$")  # Playwright's default testMatch
+
+
+def is_spec(rel: str) -> bool:
+    return bool(SPEC.match(rel))
+
+
+def spec_of(specs):
+    """Map a report's `file` (relative to testDir) back to one of `specs` (relative to testsRoot)."""
+    def unit(file: str | None):
+        if file in specs:
+            return file
+        return next((s for s in specs if file and s.endswith("/" + file)), None)
+    return unit
+
+
+def file_filter(rel: str) -> str:
+    """A positional CLI filter selecting exactly the spec `rel` (relative to testsRoot). Playwright reads positional
+    arguments as regular expressions over the absolute path, so a bare login.spec.ts also picks admin-login.spec.ts
+    and a.b.spec.ts matches aXb.spec.ts."""
+    sep = r"[\\/]"
+    return f"(^|{sep})" + sep.join(re.escape(part) for part in re.split(sep, rel)) + "$"
+
+
+def cli_args(workers=None, shard: str | None = None, grep: str | None = None, project: str | None = None) -> list[str]:
+    args = []
+    if workers:
+        args.append(f"--workers={workers}")
+    if shard:
+        args.append(f"--shard={shard}")
+    if grep:
+        args.append(f"--grep={grep}")
+    if project:
+        args.append(f"--project={project}")
+    return args
+
+
+async def run_sharded(cli: list[str], tests_root: str, env: dict, log, shards: int = 1, workers=None,
+                      shard: str | None = None, grep: str | None = None, project: str | None = None,
+                      files: list[str] | None = None) -> dict:
+    """Run the suite (or only the spec `files`) as `shards` local processes (--shard=k/N each) and merge their JSON
+    reports.
+
+    With shards == 1 a single process runs, optionally restricted to an externally assigned `shard`.
+    Each process gets its own report file and output dir so parallel processes never write to the same place.
+    """
+    report_dir = pathlib.Path(tests_root) / REPORT_DIR
+    report_dir.mkdir(parents=True, exist_ok=True)
+    if shards > 1 and not workers:
+        workers = max(1, (os.cpu_count() or 2) // shards)
+    plan = [f"{k}/{shards}" for k in range(1, shards + 1)] if shards > 1 else [shard]
+
+    async def one(n: int, part: str | None):
+        report = report_dir / f"report-{n}.json"
+        report.unlink(missing_ok=True)
+        cmd = cli + ["test", "--reporter=line,json", f"--output=test-results/run-{n}"]
+        cmd += cli_args(workers, part, grep, project) + [file_filter(f) for f in files or []]
+        code = await proc.stream(cmd, lambda stream, line: log(f"{stream}:{n}", line), cwd=tests_root,
+                                 env={**env, "PLAYWRIGHT_JSON_OUTPUT_NAME": str(report)}, label="playwright test")
+        return code, report
+
+    outcomes = await asyncio.gather(*(one(n, part) for n, part in enumerate(plan, 1)))
+    codes = [code for code, _ in outcomes]
+    merged = merge_reports([load_report(report) for _, report in outcomes])
+    return {"code": next((c for c in codes if c), 0), "shards": plan if shards > 1 else None, **merged}
+
+
+def load_report(path: pathlib.Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _walk(suite: dict, titles: list[str], file_level: bool = False):
+    """Yield (spec, test, title path); top-level suites are files and do not contribute a title."""
+    path = titles if file_level else titles + [suite.get("title", "")]
+    for spec in suite.get("specs", []):
+        for t in spec.get("tests", []):
+            yield spec, t, path + [spec.get("title", "")]
+    for child in suite.get("suites", []):
+        yield from _walk(child, path)
+
+
+_STATUS = {"expected": "passed", "unexpected": "failed", "flaky": "flaky", "skipped": "skipped"}
+
+
+def merge_reports(reports: list[dict]) -> dict:
+    """One result from the shards' reports; a shard without tests (or without a report) adds nothing, and a test
+    found in more than one report is counted once."""
+    tests, seen = [], set()
+    for report in reports:
+        for suite in report.get("suites", []):
+            for spec, t, titles in _walk(suite, [], file_level=True):
+                key = (spec.get("file"), spec.get("line"), t.get("projectName"), tuple(titles))
+                if key in seen:
+                    continue
+                seen.add(key)
+                results = t.get("results", [])
+                status = _STATUS.get(t.get("status"), t.get("status"))
+                tests.append({
+                    "title": " › ".join(x for x in titles if x),
+                    "file": spec.get("file"),
+                    "line": spec.get("line"),
+                    "project": t.get("projectName"),
+                    "status": status,
+                    "duration": sum(r.get("duration", 0) for r in results),
+                    "retries": max(0, len(results) - 1),
+                    "flaky": status == "flaky",
+                    "error": next((r["error"].get("message") for r in results if r.get("error")), None)
+                             if status == "failed" else None,
+                })
+    return {"summary": summarize(tests), "tests": tests}
+
+
+def summarize(tests: list[dict]) -> dict:
+    summary = {"total": len(tests), "passed": 0, "failed": 0, "flaky": 0, "skipped": 0}
+    for t in tests:
+        summary[t["status"]] = summary.get(t["status"], 0) + 1
+    summary["duration"] = sum(t["duration"] for t in tests)
+    return summary
@@ -1,122 +1,375 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from playwright.sync_api import sync_playwright
-import subprocess, json, pathlib, shutil, os
-from git import Repo
+from typing import List, Literal, Optional
+import asyncio, json, pathlib, os, re, sys
 
-app = FastAPI()
-_state = {"browser": None, "context": None, "page": None}
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))  # servers/mcp_common
+from browser_pool import BrowserPool
+from toolchain import Toolchain
+import dry_run, locators, pw_runner, ts_templates
+from mcp_common import health, metrics, proc, run_cache, singleflight, tracing
+from mcp_common.jobs import JobQueue, follow, register_job_tools, submit
+from mcp_common.publisher import GitPush, Publisher
+from mcp_common.registry import ToolRegistry
+from mcp_common.render_cache import Manifest, RenderCache, spec_key
+from mcp_common.templating import TemplateSet, line_comment, ts_string, wait_ms
+from mcp_common.workspace import Workspaces
+
+# MCP_GENERATOR_ONLY=1: render and write tools only. No browsers are launched and the browser, run and git tools are
+# switched off, so Playwright and GitPython are never imported (both are loaded on first use otherwise)
+GENERATOR_ONLY = os.getenv("MCP_GENERATOR_ONLY") == "1"
+_pool = BrowserPool()
+metrics.REGISTRY.collect(_pool.samples)
+_toolchain = Toolchain()
+# per-testsRoot locks; runs work in hard-linked scratch copies of the root (mcp_common/workspace.py)
+_workspaces = Workspaces()
+metrics.REGISTRY.collect(_workspaces.samples)
+
+# per-lane concurrency limits; the "fast" render lane is unbounded and runs inline on the event loop
+registry = ToolRegistry(lanes={
+    "browser": int(os.getenv("PW_BROWSER_CONCURRENCY", "32")),
+    "git": int(os.getenv("PW_GIT_CONCURRENCY", "1")),
+}, workspaces=_workspaces)
+metrics.REGISTRY.collect(registry.flights.samples)
+# test runs are queued jobs; PW_RUN_CONCURRENCY caps how many suites run side by side
+jobs = JobQueue(workers=int(os.getenv("PW_RUN_CONCURRENCY", "2")))
+register_job_tools(registry, jobs)
+_renders = RenderCache(int(os.getenv("RENDER_CACHE_SIZE", "4096")))
+metrics.REGISTRY.collect(_renders.samples)
+_locators = locators.IndexCache(int(os.getenv("PW_LOCATOR_CACHE_SIZE", "256")))
+metrics.REGISTRY.collect(_locators.samples)
+_publisher = Publisher("chore: add generated PW tests")
+_DRY_RUN_TIMEOUT_MS = int(os.getenv("PW_DRY_RUN_TIMEOUT_MS", "2000"))  # per dry-run step
+_DRY_RUN_NAV_TIMEOUT_MS = int(os.getenv("PW_DRY_RUN_NAV_TIMEOUT_MS", "10000"))  # per open step
+# built-in spec templates, compiled once; PW_TEMPLATE_DIR/<name>.tmpl overrides or adds templates
+_STEP_FIELDS = ("target", "selector", "value", "ms")
+_templates = TemplateSet(ts_templates.BUILTINS, os.getenv("PW_TEMPLATE_DIR"), vocabulary={"step.": _STEP_FIELDS})
+_STEPS = _templates.group("step.")
+_STEP_UNKNOWN = _STEPS.pop("unknown")
+_STEPS = {a: (t.bind(*_STEP_FIELDS), bool({"target", "selector"} & set(t.fields)), "value" in t.fields,
+              "ms" in t.fields)
+          for a, t in _STEPS.items()}
+
+@asynccontextmanager
+async def lifespan(app):
+    # start the Playwright driver once and pre-launch PW_POOL_SIZE browsers before serving requests
+    if GENERATOR_ONLY:
+        yield
+        return
+    await _pool.start(prewarm=os.getenv("PW_POOL_PREWARM", "1") != "0")
+    yield
+    await _pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(tracing.RequestContext)  # X-Request-Id from the router, spans if OpenTelemetry is installed
+tracing.setup("pw-mcp")
 
 class ToolCall(BaseModel):
     tool: str
     input: dict | None = None
 
+class ToolBatch(BaseModel):
+    calls: List[ToolCall]
+    parallel: bool = False  # False: in order, so later calls may rely on earlier ones
+
+class LaunchBrowser(BaseModel):
+    headless: bool = True
+
+class Goto(BaseModel):
+    url: str
+    sessionId: Optional[str] = None  # required; Optional so that a missing id gets a tool error, not a 422
+
+class Session(BaseModel):
+    sessionId: str
+
+class ResolveLocators(BaseModel):
+    sessionId: Optional[str] = None  # omitted: a fresh pooled context for this call only (needs url)
+    url: Optional[str] = None  # navigate first; otherwise the session's current page is used
+    targets: List[str] = []
+    steps: List[dict] = []  # router steps; returned with `selector` filled in where the target resolved
+
+class DryRunSteps(BaseModel):
+    sessionId: Optional[str] = None  # omitted: a fresh pooled context for this run only
+    url: Optional[str] = None  # opened before the steps
+    steps: List[dict] = []
+    timeoutMs: int = _DRY_RUN_TIMEOUT_MS
+    navigationTimeoutMs: int = _DRY_RUN_NAV_TIMEOUT_MS
+    stopOnFailure: bool = True
+    headless: bool = True
+
+class SpecScenario(BaseModel):
+    name: Optional[str] = None  # test title; defaults to the scenario text
+    scenario: Optional[str] = None
+    steps: List[dict] = []
+
+class GenerateTest(BaseModel):
+    testsRoot: str
+    name: Optional[str] = None
+    scenario: Optional[str] = None  # the describe title when `scenarios` is given
+    steps: List[dict] = []  # structured steps from router
+    scenarios: List[SpecScenario] = []  # one test() per scenario in one file (suite template); replaces steps
+
+class BatchItem(BaseModel):
+    name: Optional[str] = None
+    scenario: Optional[str] = None
+    steps: List[dict] = []
+    scenarios: List[SpecScenario] = []
+
+class GenerateBatch(BaseModel):
+    testsRoot: str
+    items: List[BatchItem] = []
+
+class RunTests(BaseModel):
+    testsRoot: str
+    wait: bool = False  # block until the job finishes (old behaviour) instead of returning a job id
+    workers: Optional[int | str] = None  # per-process workers, e.g. 8 or "50%"
+    shard: Optional[str] = None  # externally assigned shard, e.g. "2/8"
+    shards: int = 1  # split the suite across this many local processes and merge the results
+    grep: Optional[str] = None
+    project: Optional[str] = None
+    reuse: Literal["never", "passed", "stable"] = "never"  # skip specs with a matching green result (run_cache)
+    appFingerprint: Optional[str] = None  # build id / ETag of the app under test, part of the fingerprint
+
+def _step_line(s: dict) -> str:
+    # selectors come from resolve_locators; unresolved targets are taken as element ids. Values land in "..."
+    entry = _STEPS.get((s.get("action") or "").lower())
+    if entry is not None:
+        tpl, needs_target, needs_value, needs_ms = entry
+        tgt, val = s.get("target"), s.get("value")
+        ms = wait_ms(val) if needs_ms else None
+        if not ((needs_target and not tgt) or (needs_value and val is None) or (needs_ms and ms is None)):
+            return tpl(needs_target and ts_string(tgt), needs_target and ts_string(dry_run.selector(s)),
+                       needs_value and ts_string(val), ms)
+    return _STEP_UNKNOWN.fn(step=line_comment(s))
+
+def _render_spec(scenario: str | None, steps: list) -> str:
+    body = "\n  ".join(map(_step_line, steps)) or _templates.render("empty")
+    return _templates.render("spec", title=ts_string(scenario or "Generated scenario"), body=body)
+
+def _ensure_package_json(tests_root: pathlib.Path):
+    pkg = tests_root / "package.json"
+    if not pkg.exists():
+        pkg.write_text(json.dumps({
+            "name": "pw-tests",
+            "private": True,
+            "scripts": {"test": "playwright test"},
+            "devDependencies": {"@playwright/test": _toolchain.version}
+        }, indent=2))
+
+def _render_suite(title: str | None, scenarios: list[dict]) -> str:
+    tests, seen = [], {}
+    for s in scenarios:
+        name = s["name"] or s["scenario"] or "Generated scenario"
+        seen[name] = seen.get(name, 0) + 1  # Playwright rejects two tests with one title in a file
+        if seen[name] > 1:
+            name = f"{name} ({seen[name]})"
+        body = "\n    ".join(map(_step_line, s["steps"])) or _templates.render("empty")
+        tests.append(_templates.render("test", title=ts_string(name), body=body))
+    return _templates.render("suite", title=ts_string(title or "Generated scenarios"), tests="".join(tests))
+
+def _spec_name(scenario: str | None, steps: list) -> str:
+    """Default file name: a slug of the scenario plus a hash of it, so scenarios never share a file and
+    regenerating a scenario replaces its own spec."""
+    words = re.findall(r"[a-z0-9]+", (scenario or "").lower())[:5] or ["generated"]
+    return "-".join(words + [spec_key("name", scenario or steps)[:8]]) + ".spec.ts"
+
+def _write_spec(manifest: Manifest, name: str, scenario: str | None, steps: list, scenarios=()) -> dict:
+    """Render (cached by spec hash) and write a spec, or a suite of `scenarios`; identical bytes on disk are left
+    untouched."""
+    if scenarios:
+        code = _renders.render("playwright.suite", {"title": scenario, "scenarios": [s.model_dump() for s in scenarios]},
+                               lambda s: _render_suite(s["title"], s["scenarios"]))
+    else:
+        code = _renders.render("playwright", {"scenario": scenario, "steps": steps},
+                               lambda s: _render_spec(s["scenario"], s["steps"]))
+    changed = manifest.write(name, code)
+    _ensure_package_json(manifest.root)
+    return {"path": str(manifest.root / name), "changed": changed}
+
+def _iter_batch(b: GenerateBatch):
+    """Render and write every item of a generate_batch call, yielding one result per scenario."""
+    manifest = Manifest(b.testsRoot)
+    try:
+        for idx, item in enumerate(b.items):
+            name = item.name or _spec_name(item.scenario, item.steps or [s.model_dump() for s in item.scenarios])
+            try:
+                yield {"index": idx, "name": name, **_write_spec(manifest, name, item.scenario, item.steps,
+                                                                 item.scenarios)}
+            except Exception as e:
+                yield {"index": idx, "name": name, "error": str(e)}
+    finally:
+        manifest.save()
+
+# --- tools ---------------------------------------------------------------------------------------------
+
+@registry.tool("launch_browser", LaunchBrowser, lane="browser")
+async def launch_browser(i: LaunchBrowser):
+    # hands out an isolated context on a warm pooled browser; pass sessionId to the page tools
+    sid = await _pool.acquire(i.headless)
+    return {"ok": True, "sessionId": sid}
+
+# identical page calls on one session (same URL, steps) run once while in flight; page state moves on, so results
+# are never reused afterwards
+@registry.tool("goto", Goto, lane="browser", coalesce=0)
+async def goto(i: Goto):
+    if not i.sessionId:
+        return {"error": "sessionId required"}
+    await _pool.page(i.sessionId).goto(i.url)
+    return {"ok": True}
+
+@registry.tool("resolve_locators", ResolveLocators, lane="browser", coalesce=0)
+async def resolve_locators(i: ResolveLocators):
+    """Match step targets against the live page (index cached per URL + DOM hash)."""
+    if not i.sessionId and not i.url:
+        return {"error": "sessionId required (or a url to resolve on a fresh page)"}
+    sid = i.sessionId or await _pool.acquire()
+    try:
+        page = _pool.page(sid)
+        if i.url:
+            await page.goto(i.url)
+        key, index, cached = await locators.index_for(page, _locators)
+        url = page.url
+    finally:
+        if i.sessionId is None:
+            await _pool.release(sid)
+    wanted = [(t, None) for t in i.targets] + [(s["target"], s.get("action")) for s in i.steps if s.get("target")]
+    found = index.resolve(wanted)
+    return {"url": url, "domKey": key, "cached": cached, "indexed": len(index), "locators": found,
+            "unresolved": [t for t, loc in found.items() if loc is None],
+            "elements": locators.pom_elements(found), "steps": locators.annotate(i.steps, found)}
+
+@registry.tool("dry_run_steps", DryRunSteps, lane="browser", coalesce=0)
+async def dry_run_steps(i: DryRunSteps):
+    """Execute steps on a pooled page with short timeouts; per-step pass/fail and timing (see dry_run.py)."""
+    sid = i.sessionId or await _pool.acquire(i.headless)
+    try:
+        steps = ([{"action": "open", "value": i.url}] if i.url else []) + i.steps
+        return await dry_run.run_steps(_pool.page(sid), steps, i.timeoutMs, i.navigationTimeoutMs, i.stopOnFailure)
+    finally:
+        if i.sessionId is None:
+            await _pool.release(sid)
+
+@registry.tool("close_session", Session, lane="browser")
+async def close_session(i: Session):
+    await _pool.release(i.sessionId)
+    return {"ok": True}
+
+@registry.tool("pool_stats", inline=True)
+def pool_stats(i: dict):
+    return _pool.stats()
+
+@registry.tool("cache_stats", inline=True)
+def cache_stats(i: dict):
+    return {**_renders.stats(), "locators": _locators.stats(), "coalesced": singleflight.stats()}
+
+@registry.tool("generate_playwright_test", GenerateTest, writes="testsRoot")
+def generate_playwright_test(i: GenerateTest):
+    manifest = Manifest(i.testsRoot)
+    name = i.name or _spec_name(i.scenario, i.steps or [s.model_dump() for s in i.scenarios])
+    out = _write_spec(manifest, name, i.scenario, i.steps, i.scenarios)
+    manifest.save()
+    return out
+
+@registry.tool("generate_batch", GenerateBatch, writes="testsRoot")
+def generate_batch(i: GenerateBatch):
+    return {"results": list(_iter_batch(i))}
+
+async def _run_playwright(i: RunTests, job):
+    async with _workspaces.for_run(i.testsRoot, job.log) as ws:
+        return await _run_playwright_in(i, ws, job)
+
+async def _run_playwright_in(i: RunTests, ws: str, job):
+    """Run in `ws`, the scratch workspace of i.testsRoot (or the root itself); results are recorded for the root."""
+    _ensure_package_json(pathlib.Path(ws))
+    cache, todo, hits = None, {}, {}
+    if i.reuse != "never" and not i.shard:  # an external shard's share of the specs is not known here
+        files = await asyncio.to_thread(run_cache.scan, ws)
+        specs = {rel: rel for rel in files if pw_runner.is_spec(rel)}
+        fps = run_cache.plan(files, specs, {"toolchain": _toolchain.version, "app": i.appFingerprint,
+                                            "options": [i.grep, i.project]})
+        cache = run_cache.RunCache(i.testsRoot, "run_tests")
+        hits = cache.reusable(fps, i.reuse)
+        todo = {s: fp for s, fp in fps.items() if s not in hits}
+        if hits:
+            job.log("runner", f"{len(hits)} of {len(specs)} specs have a matching green result; reusing it")
+        if not todo:
+            return run_cache.merge({"code": 0, "shards": None, "summary": pw_runner.summarize([]), "tests": []}, hits)
+    # shared @playwright/test + Chromium: installed once per version, then only the stamp file is checked
+    await _toolchain.ensure(job.log)
+    cli = _toolchain.link(ws)
+    result = await pw_runner.run_sharded(cli, ws, _toolchain.env(), job.log, shards=max(1, i.shards),
+                                         workers=i.workers, shard=i.shard, grep=i.grep, project=i.project,
+                                         files=sorted(todo) if hits else None)
+    if cache is None:
+        return result
+    unit_of = pw_runner.spec_of(todo)
+    await asyncio.to_thread(cache.record_run, todo, result["tests"], lambda t: unit_of(t["file"]), pw_runner.summarize,
+                            lambda t: t["retries"] > 0)
+    return run_cache.merge(result, hits)
+
+@registry.tool("run_tests", RunTests)
+async def run_tests(i: RunTests):
+    # identical runs of an unchanged root share one job (mcp_common/singleflight.py)
+    key = singleflight.key("run_tests", i, exclude={"wait"}, tree=_workspaces.generation(i.testsRoot))
+    return await submit(jobs, "run_tests", lambda job: _run_playwright(i, job), i.wait, key)
+
+@registry.tool("toolchain_status", inline=True)
+def toolchain_status(i: dict):
+    return _toolchain.status()
+
+@registry.tool("prepare_toolchain")
+async def prepare_toolchain(i: dict):
+    """Install the shared toolchain ahead of the first run_tests (queued like a run)."""
+    async def prepare(job):
+        await _toolchain.ensure(job.log)
+        return {"code": 0, **_toolchain.status()}
+    return await submit(jobs, "prepare_toolchain", prepare, key=singleflight.key("prepare_toolchain", i))
+
+@registry.tool("git_push", GitPush, lane="git", writes="projectRoot")
+def git_push(i: GitPush):
+    # stages only `paths` (when given), fast-forward push; commit=False batches generations into one commit
+    return _publisher.publish(i)
+
+if GENERATOR_ONLY:
+    registry.disable("launch_browser", "goto", "resolve_locators", "dry_run_steps", "close_session", "run_tests",
+                     "prepare_toolchain", "git_push", reason="generator-only server (MCP_GENERATOR_ONLY=1)")
+
+# --- endpoints -----------------------------------------------------------------------------------------
+
+# tools offered on /tool/stream: input -> the results to send, one NDJSON line each
+_STREAMS = {"generate_batch": _iter_batch, "job_logs": lambda i: follow(jobs, i.jobId, i.offset)}
+
+@app.post("/tool/stream")
+async def tool_stream(call: ToolCall):
+    """NDJSON variant of /tool: generate_batch sends one result line per scenario as soon as it is rendered;
+    job_logs follows the job's log ({ line } objects) and ends with its final job_status. Calls go through the
+    registry like /tool calls (disabled tools, lane, project lock, in-flight count and metrics)."""
+    t, args = registry.accept(call.tool, call.input)
+    if t is None:
+        return args
+    if t.name not in _STREAMS:
+        return {"error": f"tool {t.name} does not stream"}
+    return StreamingResponse(registry.stream(t, args, _STREAMS[t.name]), media_type="application/x-ndjson")
+
 @app.post("/tool")
-def tool(call: ToolCall):
-    i = call.input or {}
-    t = call.tool
-
-    if t == "launch_browser":
-        headless = i.get("headless", True)
-        if _state["browser"]:
-            try: _state["browser"].close()
-            except: pass
-        p = sync_playwright().start()
-        browser = p.chromium.launch(headless=headless)
-        context = browser.new_context()
-        page = context.new_page()
-        _state.update({"p": p, "browser": browser, "context": context, "page": page})
-        return {"ok": True}
-
-    if t == "goto":
-        _state["page"].goto(i["url"])
-        return {"ok": True}
-
-    if t == "generate_playwright_test":
-        tests_root = pathlib.Path(i["testsRoot"])
-        tests_root.mkdir(parents=True, exist_ok=True)
-        name = i.get("name") or "generated.spec.ts"
-        scenario = (i.get("scenario") or "Generated scenario").replace("'", "\\'")
-        steps = i.get("steps") or []  # NEW: structured steps from router
-
-        # Render simple steps to Playwright code (assumes targets are element IDs)
-        body_lines = []
-        for s in steps:
-            a = (s.get("action") or "").lower()
-            tgt = s.get("target")
-            val = s.get("value")
-            if a == "open" and val:
-                body_lines.append(f'await page.goto("{val}");')
-            elif a == "click" and tgt:
-                body_lines.append(f'await page.click("#{tgt}");')
-            elif a == "type" and tgt and val is not None:
-                body_lines.append(f'await page.fill("#{tgt}", "{val}");')
-            elif a == "asserttext" and tgt and val is not None:
-                body_lines.append(f'await expect(page.locator("#{tgt}")).toContainText("{val}");')
-            else:
-                body_lines.append(f'// TODO: unsupported step: {s}')
-
-        body = "\n  ".join(body_lines) or "// TODO: derive concrete steps from scenario"
-        code = f"""import {{ test, expect }} from '@playwright/test';
-
-    test('{scenario}', async ({{ page }}) => {{
-      {body}
-    }});
-    """
-        spec_path = tests_root / name
-        spec_path.write_text(code, encoding="utf-8")
-
-        pkg = tests_root / "package.json"
-        if not pkg.exists():
-            pkg.write_text(json.dumps({
-                "name": "pw-tests",
-                "private": True,
-                "scripts": {"test": "playwright test"},
-                "devDependencies": {"playwright": "^1.48.0"}
-            }, indent=2))
-        return {"path": str(spec_path)}
-
-
-    if t == "run_tests":
-        tests_root = i["testsRoot"]
-    # Ensure Node Playwright exists in testsRoot (Windows-friendly)
-        import os, shutil
-        has_node_modules = os.path.exists(os.path.join(tests_root, "node_modules"))
-        # 1) npm init (if package.json missing)
-        pkg_json = os.path.join(tests_root, "package.json")
-        if not os.path.exists(pkg_json):
-            subprocess.run(["npm", "init", "-y"], cwd=tests_root, capture_output=True, text=True, shell=True)
-        # 2) install @playwright/test if missing
-        pw_cli = os.path.join(tests_root, "node_modules", ".bin", "playwright.cmd" if os.name == "nt" else "playwright")
-        if not os.path.exists(pw_cli):
-            subprocess.run(["npm", "i", "-D", "@playwright/test@^1.48.0"],
-                           cwd=tests_root, capture_output=True, text=True, shell=True)
-        # 3) install browsers (chromium is enough for most)
-        subprocess.run(["npx", "playwright", "install", "chromium"],
-                       cwd=tests_root, capture_output=True, text=True, shell=True)
-
-        # 4) run tests
-        proc = subprocess.run(["npx", "playwright", "test"],
-                              cwd=tests_root, capture_output=True, text=True, shell=True)
-        return {"code": proc.returncode, "stdout": proc.stdout, "stderr": proc.stderr}
-
-
-
-    if t == "git_push":
-        project_root = i["projectRoot"]
-        remote = i["remoteUrl"]
-        branch = i.get("branch", "main")
-        if not (pathlib.Path(project_root) / ".git").exists():
-            Repo.init(project_root)
-        repo = Repo(project_root)
-        repo.git.add(A=True)
-        try: repo.index.commit("chore: add generated PW tests")
-        except: pass
-        try: repo.delete_remote("origin")
-        except: pass
-        repo.create_remote("origin", remote)
-        repo.git.push("-u", "origin", branch, "--force")
-        return {"ok": True}
-
-    return {"error": f"unknown tool {t}"}
+async def tool(call: ToolCall):
+    return await registry.dispatch(call.tool, call.input)
+
+@app.post("/tools/batch")
+async def tools_batch(batch: ToolBatch):
+    """Several tool calls in one round trip; results come back in call order as { ok, result | status, error }."""
+    return {"results": await registry.dispatch_many([(c.tool, c.input) for c in batch.calls], batch.parallel)}
+
+@app.get("/health")
+def health_endpoint():
+    """Liveness and load (in-flight calls, queued/running jobs, CPU, browser sessions) for the router's scheduler."""
+    stats = _pool.stats()
+    return health.snapshot(registry, jobs, generatorOnly=GENERATOR_ONLY, sessions=stats["sessions"],
+                           capacity=stats["capacity"])
 
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text format: per-tool latency/in-flight, lane queues, jobs, subprocesses, browser pool."""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,107 @@
+# servers/pw-mcp-py/toolchain.py
+# Shared, versioned Node toolchain for run_tests.
+#
+# @playwright/test and its Chromium build are installed once per version into
+#   $PW_TOOLCHAIN_DIR/playwright-<version>/{node_modules,browsers,ready.json}
+# and every testsRoot links its node_modules to that copy. Readiness is a stamp file, so the per-run setup is a
+# couple of stat() calls instead of npm init / npm i / playwright install subprocesses.
+import asyncio, json, os, pathlib, shutil, sys, time
+from mcp_common import proc
+
+PW_TEST_VERSION = os.getenv("PW_TEST_VERSION", "1.48.2")
+TOOLCHAIN_DIR = pathlib.Path(os.getenv("PW_TOOLCHAIN_DIR", pathlib.Path.home() / ".cache" / "pw-mcp" / "toolchain"))
+
+
+class Toolchain:
+    def __init__(self, version: str = PW_TEST_VERSION, cache_dir: pathlib.Path = TOOLCHAIN_DIR):
+        self.version = version
+        self.home = pathlib.Path(cache_dir) / f"playwright-{version}"
+        self.node_modules = self.home / "node_modules"
+        self.browsers = self.home / "browsers"
+        self.stamp = self.home / "ready.json"
+        self._lock = asyncio.Lock()
+
+    def ready(self) -> bool:
+        return self.stamp.exists() and (self.node_modules / "@playwright" / "test" / "cli.js").exists()
+
+    def status(self) -> dict:
+        info = json.loads(self.stamp.read_text(encoding="utf-8")) if self.stamp.exists() else {}
+        return {"ready": self.ready(), "version": self.version, "home": str(self.home), **info}
+
+    def env(self) -> dict:
+        return {**os.environ, "PLAYWRIGHT_BROWSERS_PATH": str(self.browsers)}
+
+    def cli(self) -> list[str]:
+        return ["node", str(self.node_modules / "@playwright" / "test" / "cli.js")]
+
+    async def ensure(self, log):
+        """Install the toolchain if this version has no ready stamp yet; concurrent callers wait for one install."""
+        if await asyncio.to_thread(self.ready):
+            return
+        async with self._lock:
+            if await asyncio.to_thread(self.ready):
+                return
+            # install into a private directory and rename it into place, so other server processes sharing
+            # the cache never see a half-installed toolchain; the file work runs off the event loop
+            staging = self.home.with_name(f"{self.home.name}.tmp-{os.getpid()}")
+            await asyncio.to_thread(self._stage, staging)
+            env = {**os.environ, "PLAYWRIGHT_BROWSERS_PATH": str(staging / "browsers")}
+            steps = [
+                ("npm install", ["npm", "i", "--no-audit", "--no-fund", f"@playwright/test@{self.version}"]),
+                ("playwright install", ["node", str(staging / "node_modules" / "@playwright" / "test" / "cli.js"),
+                                        "install", "chromium"]),
+            ]
+            for label, cmd in steps:
+                code = await proc.stream(cmd, log, cwd=str(staging), env=env, label=label)
+                if code != 0:
+                    await asyncio.to_thread(shutil.rmtree, staging, ignore_errors=True)
+                    raise RuntimeError(f"toolchain install failed: {' '.join(cmd)} exited with {code}")
+            node = await proc.run(["node", "--version"], label="node version")
+            await asyncio.to_thread(self._publish, staging, node["stdout"].strip())
+            if not await asyncio.to_thread(self.ready):
+                raise RuntimeError(f"toolchain at {self.home} is not ready after install")
+
+    def _stage(self, staging: pathlib.Path):
+        shutil.rmtree(staging, ignore_errors=True)
+        if self.home.exists():  # broken earlier install (stamp or CLI missing)
+            shutil.rmtree(self.home, ignore_errors=True)
+        staging.mkdir(parents=True)
+        (staging / "package.json").write_text(json.dumps({"name": "pw-toolchain", "private": True}), encoding="utf-8")
+
+    def _publish(self, staging: pathlib.Path, node: str):
+        (staging / "ready.json").write_text(json.dumps({
+            "installed": time.time(), "node": node, "platform": sys.platform,
+        }), encoding="utf-8")
+        try:
+            os.replace(staging, self.home)
+        except OSError:  # another process finished first: keep theirs
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def link(self, tests_root: str) -> list[str]:
+        """Point testsRoot/node_modules at the shared install and return the Playwright CLI to run there.
+
+        A real node_modules directory (a project managing its own dependencies) is left alone and its own
+        @playwright/test CLI is used, so specs never load two copies of the test runner.
+        """
+        target = pathlib.Path(tests_root) / "node_modules"
+        if target.is_symlink() or _is_junction(target):
+            if pathlib.Path(os.path.realpath(target)) == pathlib.Path(os.path.realpath(self.node_modules)):
+                return self.cli()
+            if target.is_symlink():
+                target.unlink()
+            else:
+                os.rmdir(target)
+        elif target.exists():
+            return ["node", str(target / "@playwright" / "test" / "cli.js")]
+        try:
+            os.symlink(self.node_modules, target, target_is_directory=True)
+        except OSError:
+            if os.name != "nt":
+                raise
+            import _winapi  # symlinks need privileges on Windows; junctions do not
+            _winapi.CreateJunction(str(self.node_modules), str(target))
+        return self.cli()
+
+
+def _is_junction(p: pathlib.Path) -> bool:
+    return hasattr(os.path, "isjunction") and os.path.isjunction(p)
@@ -0,0 +1,37 @@
+# servers/pw-mcp-py/ts_templates.py
+# Built-in templates for generated Playwright specs (string.Template syntax, see mcp_common/templating.py).
+#
+# spec is the whole file; ${title} is escaped for a '...' literal. suite is a file holding several scenarios, one
+# `test` each, in a describe block (the tests share the file's worker and browser). step.<action> fragments are one statement per
+# step: ${selector} is the step's Playwright selector (from resolve_locators, else "#<target>"), ${target} the raw
+# target text; both and ${value} are escaped for "..." literals, ${ms} is the wait step's duration. An override
+# directory can add fragments for new verbs; steps without a fragment render step.unknown.
+
+BUILTINS = {
+    "spec": """import { test, expect } from '@playwright/test';
+
+    test('${title}', async ({ page }) => {
+      ${body}
+    });
+    """,
+    "suite": """import { test, expect } from '@playwright/test';
+
+test.describe('${title}', () => {
+${tests}});
+""",
+    "test": """
+  test('${title}', async ({ page }) => {
+    ${body}
+  });
+""",
+    "step.open": 'await page.goto("${value}");',
+    "step.click": 'await page.click("${selector}");',
+    "step.type": 'await page.fill("${selector}", "${value}");',
+    "step.asserttext": 'await expect(page.locator("${selector}")).toContainText("${value}");',
+    "step.select": 'await page.selectOption("${selector}", "${value}");',
+    "step.hover": 'await page.hover("${selector}");',
+    "step.wait": "await page.waitForTimeout(${ms});",
+    "step.waitfor": 'await page.locator("${selector}").waitFor();',
+    "step.unknown": "// TODO: unsupported step: ${step}",
+    "empty": "// TODO: derive concrete steps from scenario",
+}
@@ -0,0 +1,142 @@
+# servers/sel-testng-rest-py/gradle_runner.py
+# Gradle invocation for generated projects: warm daemon, build/configuration cache, --tests filters for the
+# classes that were actually regenerated, and structured results parsed from the test-results XML.
+#
+# The Tooling API is JVM-only, so daemon reuse goes through the CLI: every run passes --daemon and the project's
+# gradle.properties keeps the daemon alive (long idle timeout) with caching on, so after the first run a
+# projectRoot pays neither JVM startup nor configuration again.
+import fnmatch, os, pathlib, re, shutil
+import xml.etree.ElementTree as ET
+
+GRADLE_PROPERTIES = {
+    "org.gradle.daemon": "true",
+    "org.gradle.daemon.idletimeout": "10800000",  # 3 h
+    "org.gradle.caching": "true",
+    "org.gradle.configuration-cache": "true",
+    "org.gradle.parallel": "true",
+}
+TEST_SOURCES = "src/test/java/"
+
+
+def ensure_gradle_properties(root: str):
+    """Add the daemon/cache settings to gradle.properties, keeping any value the project already sets."""
+    props = pathlib.Path(root) / "gradle.properties"
+    existing = props.read_text(encoding="utf-8") if props.exists() else ""
+    keys = {line.split("=", 1)[0].strip() for line in existing.splitlines() if "=" in line}
+    missing = [f"{k}={v}" for k, v in GRADLE_PROPERTIES.items() if k not in keys]
+    if missing:
+        sep = "" if not existing or existing.endswith("\n") else "\n"
+        # replaced, not rewritten in place: the old file may be hard-linked into a scratch workspace
+        tmp = props.with_name(f".{props.name}.{os.getpid()}.tmp")
+        tmp.write_text(existing + sep + "\n".join(missing) + "\n", encoding="utf-8")
+        os.replace(tmp, props)
+
+
+def gradle_cmd(root: str) -> list[str]:
+    gradlew = pathlib.Path(root) / "gradlew"
+    return [str(gradlew)] if gradlew.exists() else ["gradle"]
+
+
+def _class_name(rel: str) -> str:
+    return rel[len(TEST_SOURCES):-len(".java")].replace("/", ".")
+
+
+def test_filters(root: str, changed_files: list[str]) -> list[str] | None:
+    """Map written paths to --tests class filters: the changed test classes, plus the tests that use a changed
+    page object or helper (by class name, through helpers that use it too). None when a changed source is gone
+    (run everything)."""
+    filters, helpers = set(), []
+    for path in changed_files:
+        p = path.replace("\\", "/").removeprefix("./")
+        if not (p.startswith(TEST_SOURCES) and p.endswith(".java")):
+            continue  # build files etc. are covered by Gradle's own up-to-date checks
+        source = pathlib.Path(root) / p
+        if not source.exists():
+            return None
+        if "@Test" in source.read_text(encoding="utf-8"):
+            filters.add(_class_name(p))
+        else:
+            helpers.append(_class_name(p))
+    if helpers:
+        sources = {}
+        for path in (pathlib.Path(root) / TEST_SOURCES).rglob("*.java"):
+            rel = path.relative_to(root).as_posix()
+            sources[_class_name(rel)] = path.read_text(encoding="utf-8", errors="replace")
+        seen = set(helpers)
+        while helpers:
+            simple = helpers.pop().rsplit(".", 1)[-1]
+            used = re.compile(rf"\b{re.escape(simple)}\b")
+            for cls, text in sources.items():
+                if cls in seen or not used.search(text):
+                    continue
+                seen.add(cls)
+                if "@Test" in text:
+                    filters.add(cls)
+                else:
+                    helpers.append(cls)
+    return sorted(filters)
+
+
+def selected(cls: str, filters: list[str]) -> bool:
+    """Whether --tests `filters` select test class `cls`: class or class.method patterns, fully qualified or
+    simple names, * wildcards (as Gradle matches them)."""
+    simple = cls.rsplit(".", 1)[-1]
+    return any(fnmatch.fnmatchcase(name, pattern) for f in filters for pattern in (f, f.rsplit(".", 1)[0])
+               for name in (cls, simple))
+
+
+def test_command(root: str, filters: list[str] | None = None) -> list[str]:
+    cmd = gradle_cmd(root) + ["test", "--daemon", "--build-cache", "--configuration-cache"]
+    for f in filters or []:
+        cmd += ["--tests", f]
+    return cmd
+
+
+def parse_results(root: str) -> dict:
+    """Summarise build/test-results/test/TEST-*.xml (Gradle writes the TestNG results in JUnit XML format)."""
+    tests, summary = [], {"tests": 0, "failures": 0, "errors": 0, "skipped": 0, "time": 0.0}
+    for xml_file in sorted((pathlib.Path(root) / "build" / "test-results" / "test").glob("TEST-*.xml")):
+        try:
+            suite = ET.parse(xml_file).getroot()
+        except ET.ParseError:
+            continue
+        for key in ("tests", "failures", "errors", "skipped"):
+            summary[key] += int(suite.get(key, 0))
+        summary["time"] += float(suite.get("time", 0) or 0)
+        for case in suite.iter("testcase"):
+            status, message = "passed", None
+            for tag in ("failure", "error", "skipped"):
+                node = case.find(tag)
+                if node is not None:
+                    status = "skipped" if tag == "skipped" else "failed"
+                    message = node.get("message")
+                    break
+            tests.append({"class": case.get("classname"), "name": case.get("name"),
+                          "status": status, "time": float(case.get("time", 0) or 0), "message": message})
+    summary["time"] = round(summary["time"], 3)
+    return {"summary": summary, "tests": tests}
+
+
+def summarize(tests: list[dict]) -> dict:
+    """parse_results-style summary for a subset of tests (errors are counted as failures)."""
+    return {"tests": len(tests), "failures": sum(t["status"] == "failed" for t in tests), "errors": 0,
+            "skipped": sum(t["status"] == "skipped" for t in tests), "time": round(sum(t["time"] for t in tests), 3)}
+
+
+def test_classes(root: str, files: dict[str, str]) -> dict[str, str]:
+    """{class name: relpath} of the TestNG classes among a project's files (sources containing @Test)."""
+    out = {}
+    for rel in files:
+        if rel.startswith(TEST_SOURCES) and rel.endswith(".java"):
+            if "@Test" in (pathlib.Path(root) / rel).read_text(encoding="utf-8", errors="replace"):
+                out[rel[len(TEST_SOURCES):-len(".java")].replace("/", ".")] = rel
+    return out
+
+
+def toolchain_id(root: str) -> dict:
+    """What identifies the Gradle and Java in use without starting them: resolved paths (versioned install dirs)
+    and JAVA_HOME. The wrapper's properties and the build files are project inputs already."""
+    gradle = gradle_cmd(root)[0]
+    gradle = shutil.which(gradle) or gradle
+    return {"gradle": os.path.realpath(gradle), "java": os.path.realpath(shutil.which("java") or ""),
+            "javaHome": os.getenv("JAVA_HOME")}
@@ -0,0 +1,190 @@
+# servers/sel-testng-rest-py/java_templates.py
+# Built-in templates for the Java/Gradle generators (string.Template syntax, see mcp_common/templating.py).
+#
+# Whole files: pom, ui_test, api_test, build_gradle, settings_gradle, and ui_suite / api_suite for several
+# scenarios in one class (one ui.test / api.test method each, sharing the class's driver or RequestSpecification).
+# Fragments are one line each:
+#   pom.field.<locatorType>   a public @FindBy field (pom.field.css is used for unknown locator types); tests in
+#                             another package use it as page.<name>
+#   ui.step.<action>          one test statement per step; ${target} is the element (page.<field>, or
+#                             driver.findElement(By.id(...)) when the test has no page object), ${value} is escaped
+#                             for a "..." literal, ${ms} is the wait step's duration. An override directory can
+#                             add fragments for new verbs; steps without a fragment render ui.step.unknown.
+#   api.header / api.query / api.body / api.json   RestAssured chain links for one request
+#   api.spec_request          a request in an api_suite: starts from the shared spec, ${path} is relative to it
+# Values substituted into "..." literals are already escaped with java_string.
+
+BUILTINS = {
+    "pom": """    package ${packageName};
+
+import org.openqa.selenium.*;
+import org.openqa.selenium.support.*;
+
+public class ${className}${extends} {
+    private WebDriver driver;
+${fields}
+
+    public ${className}(WebDriver driver) {
+        this.driver = driver;
+        PageFactory.initElements(driver, this);
+    }${openMethod}
+}
+""",
+    "pom.field.id": '    @FindBy(id = "${locator}")\n    public WebElement ${name};',
+    "pom.field.xpath": '    @FindBy(xpath = "${locator}")\n    public WebElement ${name};',
+    "pom.field.css": '    @FindBy(css = "${locator}")\n    public WebElement ${name};',
+    "pom.open": """
+
+    public ${className} open() {
+        driver.get("${url}");
+        return this;
+    }
+    """,
+
+    "ui_test": """    package ${packageName};
+
+import org.testng.annotations.*;
+import org.openqa.selenium.*;
+import org.openqa.selenium.chrome.ChromeDriver;
+import io.github.bonigarcia.wdm.WebDriverManager;
+${imports}
+
+public class ${className} {
+    protected WebDriver driver;
+
+    @BeforeClass
+    public void setUp() {
+        WebDriverManager.chromedriver().setup();
+        driver = new ChromeDriver();
+    }
+
+    @AfterClass
+    public void tearDown() {
+        if (driver != null) driver.quit();
+    }
+
+    @Test ${groups}
+    public void scenario() {
+        ${body}
+    }
+}
+""",
+    "ui_suite": """    package ${packageName};
+
+import org.testng.annotations.*;
+import org.openqa.selenium.*;
+import org.openqa.selenium.chrome.ChromeDriver;
+import io.github.bonigarcia.wdm.WebDriverManager;
+${imports}
+
+public class ${className} {
+    protected WebDriver driver;
+
+    @BeforeClass
+    public void setUp() {
+        WebDriverManager.chromedriver().setup();
+        driver = new ChromeDriver();
+    }
+
+    @BeforeMethod
+    public void clearSession() {
+        driver.manage().deleteAllCookies();
+    }
+
+    @AfterClass
+    public void tearDown() {
+        if (driver != null) driver.quit();
+    }
+${tests}}
+""",
+    "ui.test": """
+    @Test${attributes}
+    public void ${methodName}() {
+        ${body}
+    }
+""",
+    "ui.page": "${pageClass} page = new ${pageClass}(driver);",
+    "ui.step.open": 'driver.get("${value}");',
+    "ui.step.click": "${target}.click();",
+    "ui.step.type": '${target}.clear(); ${target}.sendKeys("${value}");',
+    "ui.step.asserttext": 'org.testng.Assert.assertTrue(${target}.getText().contains("${value}"));',
+    "ui.step.select": 'new org.openqa.selenium.support.ui.Select(${target}).selectByVisibleText("${value}");',
+    "ui.step.hover": "new org.openqa.selenium.interactions.Actions(driver).moveToElement(${target}).perform();",
+    "ui.step.wait": "try { Thread.sleep(${ms}); } catch (InterruptedException e) { Thread.currentThread().interrupt(); }",
+    "ui.step.waitfor": "new org.openqa.selenium.support.ui.WebDriverWait(driver, java.time.Duration.ofSeconds(10))"
+                       ".until(org.openqa.selenium.support.ui.ExpectedConditions.visibilityOf(${target}));",
+    "ui.step.unknown": "// TODO: step not recognized",
+    "ui.empty": "// TODO: add steps",
+
+    "api_test": """    package ${packageName};
+
+import org.testng.annotations.*;
+import static io.restassured.RestAssured.*;
+
+public class ${className} {
+    @Test
+    public void apiFlow() {
+${body}
+    }
+}
+""",
+    "api_suite": """    package ${packageName};
+
+import org.testng.annotations.*;
+import io.restassured.builder.RequestSpecBuilder;
+import io.restassured.specification.RequestSpecification;
+import static io.restassured.RestAssured.*;
+
+public class ${className} {
+    private RequestSpecification spec;
+
+    @BeforeClass
+    public void setUp() {
+        spec = new RequestSpecBuilder().setBaseUri("${baseUrl}").build();
+    }
+${tests}}
+""",
+    "api.test": """
+    @Test${attributes}
+    public void ${methodName}() {
+${body}
+    }
+""",
+    "api.spec_request": """            io.restassured.RestAssured
+            .given().spec(spec)${headers}${query}${requestBody}
+            .when().${method}("${path}")
+            .then().statusCode(${status})${asserts};
+        """,
+    "api.request": """            io.restassured.RestAssured
+            .given()${headers}${query}${requestBody}
+            .when().${method}("${url}")
+            .then().statusCode(${status})${asserts};
+        """,
+    "api.header": '.header("${key}", "${value}")',
+    "api.query": '.queryParam("${key}", "${value}")',
+    "api.body": '.body("${value}")',
+    "api.json": '.body("${path}", org.hamcrest.Matchers.equalTo("${value}"))',
+
+    "build_gradle": """    plugins {
+    id 'java'
+}
+
+group = '${group}'
+version = '${version}'
+
+repositories { mavenCentral() }
+
+dependencies {
+    testImplementation 'org.testng:testng:7.10.2'
+    implementation 'org.seleniumhq.selenium:selenium-java:4.23.0'
+    implementation 'io.github.bonigarcia:webdrivermanager:5.9.2'
+    testImplementation 'io.rest-assured:rest-assured:5.4.0'
+    testImplementation 'org.assertj:assertj-core:3.25.3'
+}
+
+test {
+    useTestNG()
+}
+""",
+    "settings_gradle": "rootProject.name = '${artifact}'\n",
+}
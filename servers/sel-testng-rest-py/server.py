@@ -1,15 +1,60 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-import os, pathlib, subprocess
-from git import Repo
+from typing import List, Literal, Optional
+import asyncio, os, pathlib, json, re, sys
+import gradle_runner, java_templates
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))  # servers/mcp_common
+from mcp_common import health, metrics, proc, run_cache, singleflight, tracing
+from mcp_common.jobs import JobQueue, follow, register_job_tools, submit
+from mcp_common.publisher import GitPush, Publisher
+from mcp_common.registry import ToolRegistry
+from mcp_common.render_cache import Manifest, RenderCache
+from mcp_common.templating import TemplateSet, java_identifier, java_string, wait_ms
+from mcp_common.uploads import ndjson, write_all, write_stream
+from mcp_common.workspace import Workspaces
+
+# MCP_GENERATOR_ONLY=1: render and write tools only; Gradle runs and git are switched off and GitPython (loaded on
+# first use otherwise) is never imported
+GENERATOR_ONLY = os.getenv("MCP_GENERATOR_ONLY") == "1"
 
 app = FastAPI()
+app.add_middleware(tracing.RequestContext)  # X-Request-Id from the router, spans if OpenTelemetry is installed
+tracing.setup("sel-testng-rest")
+
+# per-projectRoot locks; runs work in hard-linked scratch copies of the root (mcp_common/workspace.py)
+_workspaces = Workspaces()
+metrics.REGISTRY.collect(_workspaces.samples)
+# per-lane concurrency limits; the "fast" render lane is unbounded and runs inline on the event loop
+registry = ToolRegistry(lanes={
+    "git": int(os.getenv("SEL_GIT_CONCURRENCY", "1")),
+}, workspaces=_workspaces)
+metrics.REGISTRY.collect(registry.flights.samples)
+# Gradle runs are queued jobs; SEL_RUN_CONCURRENCY caps how many suites run side by side
+jobs = JobQueue(workers=int(os.getenv("SEL_RUN_CONCURRENCY", "2")))
+register_job_tools(registry, jobs)
+_renders = RenderCache(int(os.getenv("RENDER_CACHE_SIZE", "4096")))
+metrics.REGISTRY.collect(_renders.samples)
+_publisher = Publisher("chore: add generated tests")
+_WRITE_CONCURRENCY = int(os.getenv("SEL_WRITE_CONCURRENCY", "8"))  # parallel file writes per write_files call
+# built-in Java/Gradle templates, compiled once; SEL_TEMPLATE_DIR/<name>.tmpl overrides or adds templates
+_templates = TemplateSet(java_templates.BUILTINS, os.getenv("SEL_TEMPLATE_DIR"))
+_POM_FIELDS = _templates.group("pom.field.")
+_UI_STEPS = _templates.group("ui.step.")
+_UI_UNKNOWN = _UI_STEPS.pop("unknown").render({})
+_UI_STEPS = {a: (t.bind("target", "value", "ms"), "target" in t.fields, "value" in t.fields, "ms" in t.fields)
+             for a, t in _UI_STEPS.items()}
+_API = _templates.group("api.")
 
 class ToolCall(BaseModel):
     tool: str
     input: dict | None = None
 
+class ToolBatch(BaseModel):
+    calls: List[ToolCall]
+    parallel: bool = False  # False: in order, so later calls may rely on earlier ones
+
 class Element(BaseModel):
     name: str
     locatorType: str
@@ -28,13 +73,19 @@ class Step(BaseModel):
     value: Optional[str] = None
     by: Optional[str] = None
 
+class UiScenario(BaseModel):
+    name: str
+    description: Optional[str] = None  # scenario text for the @Test description; defaults to name
+    steps: List[Step] = []
+
 class GenerateUiTest(BaseModel):
     packageName: str
     className: str
     imports: List[str] = []
     testGroups: List[str] = []
-    steps: List[Step]
+    steps: List[Step] = []
     pageObjectFqn: Optional[str] = None
+    scenarios: List[UiScenario] = []  # one @Test per scenario, one driver for the class (ui_suite); replaces steps
 
 class ExpectSpec(BaseModel):
     status: int = 200
@@ -49,239 +100,360 @@ class RequestSpec(BaseModel):
     body: Optional[str] = None
     expect: ExpectSpec = ExpectSpec()
 
+class ApiScenario(BaseModel):
+    name: str
+    description: Optional[str] = None
+    requests: List[RequestSpec] = []
+
 class GenerateApiTest(BaseModel):
     packageName: str
     className: str
     baseUrl: str
-    requests: List[RequestSpec]
+    requests: List[RequestSpec] = []
+    scenarios: List[ApiScenario] = []  # one @Test per scenario on a shared RequestSpecification (api_suite)
 
 class FileSpec(BaseModel):
     path: str
     content: str
     overwrite: bool = True
 
+class BatchItem(BaseModel):
+    kind: str  # pom | ui | api
+    spec: dict
+
+class GenerateBatch(BaseModel):
+    items: List[BatchItem] = []
+
+class RunGradleTests(BaseModel):
+    projectRoot: str
+    wait: bool = False  # block until the job finishes (old behaviour) instead of returning a job id
+    changedFiles: Optional[List[str]] = None  # write_files "written"; None runs the whole suite
+    tests: List[str] = []  # explicit --tests filters (these runs bypass the result cache)
+    reuse: Literal["never", "passed", "stable"] = "never"  # skip classes with a matching green result (run_cache)
+    appFingerprint: Optional[str] = None  # build id / ETag of the app under test, part of the fingerprint
+
+class ProjectRoot(BaseModel):
+    projectRoot: str
+
 class WriteFiles(BaseModel):
     projectRoot: str
-    files: List[FileSpec]
+    files: List[FileSpec] = []  # empty in the first line of a POST /files/stream upload
     createBuildIfMissing: bool = True
     groupId: str = "com.example"
     artifactId: str = "ui-tests"
     version: str = "0.1.0"
 
 # Helpers
+def _groovy(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("'", "\\'")
+
 def _ensure_build_gradle(root: str, group: str, artifact: str, version: str):
     rootp = pathlib.Path(root)
     rootp.mkdir(parents=True, exist_ok=True)
     build_gradle = pathlib.Path(root) / "build.gradle"
     settings_gradle = pathlib.Path(root) / "settings.gradle"
     if not build_gradle.exists():
-        build_gradle.write_text(f"""    plugins {{
-    id 'java'
-}}
-
-group = '{group}'
-version = '{version}'
-
-repositories {{ mavenCentral() }}
-
-dependencies {{
-    testImplementation 'org.testng:testng:7.10.2'
-    implementation 'org.seleniumhq.selenium:selenium-java:4.23.0'
-    implementation 'io.github.bonigarcia:webdrivermanager:5.9.2'
-    testImplementation 'io.rest-assured:rest-assured:5.4.0'
-    testImplementation 'org.assertj:assertj-core:3.25.3'
-}}
-
-test {{
-    useTestNG()
-}}
-""", encoding="utf-8")
+        build_gradle.write_text(_templates.render("build_gradle", group=_groovy(group), version=_groovy(version)),
+                                encoding="utf-8")
     if not settings_gradle.exists():
-        settings_gradle.write_text(f"rootProject.name = '{artifact}'\n", encoding="utf-8")
+        settings_gradle.write_text(_templates.render("settings_gradle", artifact=_groovy(artifact)), encoding="utf-8")
+    gradle_runner.ensure_gradle_properties(root)  # in the root, so it is committed along with the build files
 
 def _java_path(root: str, package_name: str, class_name: str) -> pathlib.Path:
     return pathlib.Path(root) / "src" / "test" / "java" / pathlib.Path(package_name.replace('.', '/')) / f"{class_name}.java"
 
 def _render_pom(input: GeneratePOM) -> str:
-    fields = []
+    fields, names = [], set()
     for e in input.elements:
-        # For brevity we only emit @FindBy(css) here; extend as needed
-        if e.locatorType.lower() == "id":
-            anno = f'@FindBy(id = "{e.locatorValue}")'
-        elif e.locatorType.lower() == "xpath":
-            anno = f'@FindBy(xpath = "{e.locatorValue}")'
-        else:
-            anno = f'@FindBy(css = "{e.locatorValue}")'
-        fields.append(f"    {anno}\n    private WebElement {e.name};")
+        name = java_identifier(e.name)
+        if name in names:
+            continue  # "Sign in" and "signIn" are one field
+        names.add(name)
+        tpl = _POM_FIELDS.get(e.locatorType.lower(), _POM_FIELDS["css"])
+        fields.append(tpl.render({"locator": java_string(e.locatorValue), "name": name}))
     open_method = ""
     if input.url:
-        open_method = f"""
-
-    public {input.className} open() {{
-        driver.get("{input.url}");
-        return this;
-    }}
-    """
-    extends = f" extends {input.baseClass}" if input.baseClass else ""
-    return f"""    package {input.packageName};
-
-import org.openqa.selenium.*;
-import org.openqa.selenium.support.*;
-
-public class {input.className}{extends} {{
-    private WebDriver driver;
-{os.linesep.join(fields)}
-
-    public {input.className}(WebDriver driver) {{
-        this.driver = driver;
-        PageFactory.initElements(driver, this);
-    }}{open_method}
-}}
-"""
-
-def _render_ui_test(input: GenerateUiTest) -> str:
-    imports = "\n".join([f"import {imp};" for imp in input.imports])
-    groups = ""
-    if input.testGroups:
-        gs = ", ".join([f'"{g}"' for g in input.testGroups])
-        groups = f"(groups = {{ {gs} }})"
+        open_method = _templates.render("pom.open", className=input.className, url=java_string(input.url))
+    return _templates.render("pom", packageName=input.packageName, className=input.className,
+                             extends=f" extends {input.baseClass}" if input.baseClass else "",
+                             fields="\n".join(fields), openMethod=open_method)
+
+def _ui_element(target: str, page: bool) -> str:
+    """Java expression for a step target: the page object's field (named like the POM's), or a lookup by id."""
+    if page:
+        return f"page.{java_identifier(target)}"
+    return f'driver.findElement(By.id("{java_string(target)}"))'
+
+def _ui_step(s: Step, page: bool) -> str:
+    # values land inside a "..." literal
+    entry = _UI_STEPS.get((s.action or "").lower())
+    if entry is not None:
+        tpl, needs_target, needs_value, needs_ms = entry
+        tgt, val = s.target, s.value
+        ms = wait_ms(val) if needs_ms else None
+        if not ((needs_target and not tgt) or (needs_value and val is None) or (needs_ms and ms is None)):
+            return tpl(needs_target and _ui_element(tgt, page), needs_value and java_string(val), ms)
+    return _UI_UNKNOWN
+
+def _method_names(names) -> list[str]:
+    """Java method names for scenario names: "test" + the words in PascalCase, numbered when two collide."""
+    out, seen = [], {}
+    for name in names:
+        base = "test" + "".join(w[:1].upper() + w[1:] for w in re.findall(r"[0-9A-Za-z]+", name))
+        seen[base] = seen.get(base, 0) + 1
+        out.append(base if seen[base] == 1 else f"{base}{seen[base]}")
+    return out
+
+def _test_attributes(groups: List[str], description: str | None = None) -> str:
+    attrs = [f'description = "{java_string(description)}"'] if description else []
+    if groups:
+        gs = ", ".join([f'"{java_string(g)}"' for g in groups])
+        attrs.append(f"groups = {{ {gs} }}")
+    return f"({', '.join(attrs)})" if attrs else ""
+
+def _ui_body(input: GenerateUiTest, steps: List[Step]) -> str:
     body_lines = []
     if input.pageObjectFqn:
         _, po_cls = input.pageObjectFqn.rsplit('.', 1)
-        body_lines.append(f"{po_cls} page = new {po_cls}(driver);")
-    for s in input.steps:
-        a = (s.action or "").lower()
-        if a == "open" and s.value:
-            body_lines.append(f'driver.get("{s.value}");')
-        elif a == "click" and s.target:
-            body_lines.append(f'{s.target}.click();')
-        elif a == "type" and s.target and s.value is not None:
-            body_lines.append(f'{s.target}.clear(); {s.target}.sendKeys("{s.value}");')
-        elif a == "asserttext" and s.value and s.target:
-            body_lines.append(f'org.testng.Assert.assertTrue({s.target}.getText().contains("{s.value}"));')
-        else:
-            body_lines.append("// TODO: step not recognized")
-    body = "\n        ".join(body_lines) or "// TODO: add steps"
-
-    return f"""    package {input.packageName};
-
-import org.testng.annotations.*;
-import org.openqa.selenium.*;
-import org.openqa.selenium.chrome.ChromeDriver;
-import io.github.bonigarcia.wdm.WebDriverManager;
-{imports}
-
-public class {input.className} {{
-    protected WebDriver driver;
-
-    @BeforeClass
-    public void setUp() {{
-        WebDriverManager.chromedriver().setup();
-        driver = new ChromeDriver();
-    }}
-
-    @AfterClass
-    public void tearDown() {{
-        if (driver != null) driver.quit();
-    }}
-
-    @Test {groups}
-    public void scenario() {{
-        {body}
-    }}
-}}
-"""
+        body_lines.append(_templates.render("ui.page", pageClass=po_cls))
+    body_lines.extend(_ui_step(s, bool(input.pageObjectFqn)) for s in steps)
+    return "\n        ".join(body_lines) or _templates.render("ui.empty")
 
-def _render_api_test(input: GenerateApiTest) -> str:
-    req_blocks = []
-    for r in input.requests:
-        headers = ''.join([f'.header("{k}", "{v}")' for k, v in (r.headers or {}).items()])
-        query = ''.join([f'.queryParam("{k}", "{v}")' for k, v in (r.query or {}).items()])
-        body = f'.body("""{r.body}""")' if r.body else ''
-        method = r.method.upper()
-        json_asserts = ''.join([f'.body("{jp}", org.hamcrest.Matchers.equalTo("{val}"))' for jp, val in (r.expect.jsonPaths or {}).items()])
-        req_blocks.append(f"""            io.restassured.RestAssured
-            .given(){headers}{query}{body}
-            .when().{method.lower()}("{input.baseUrl}{r.path}")
-            .then().statusCode({r.expect.status}){json_asserts};
-        """)
-    body = "\n".join(req_blocks)
-    return f"""    package {input.packageName};
-
-import org.testng.annotations.*;
-import static io.restassured.RestAssured.*;
-
-public class {input.className} {{
-    @Test
-    public void apiFlow() {{
-{body}
-    }}
-}}
-"""
+def _render_ui_test(input: GenerateUiTest) -> str:
+    imports = "\n".join([f"import {imp};" for imp in input.imports])
+    if input.scenarios:
+        tests = "".join(_templates.render("ui.test", methodName=m, body=_ui_body(input, s.steps),
+                                          attributes=_test_attributes(input.testGroups, s.description or s.name))
+                        for m, s in zip(_method_names(s.name for s in input.scenarios), input.scenarios))
+        return _templates.render("ui_suite", packageName=input.packageName, className=input.className,
+                                 imports=imports, tests=tests)
+    return _templates.render("ui_test", packageName=input.packageName, className=input.className, imports=imports,
+                             groups=_test_attributes(input.testGroups), body=_ui_body(input, input.steps))
+
+def _api_request(r: RequestSpec, base_url: str | None) -> str:
+    """One RestAssured chain: against base_url + path, or (base_url None) from the api_suite's shared spec."""
+    header, query, json_eq = _API["header"], _API["query"], _API["json"]
+    if base_url is None:
+        tpl, target = _API["spec_request"], {"path": java_string(r.path)}
+    else:
+        tpl, target = _API["request"], {"url": java_string(base_url + r.path)}
+    return tpl.render({
+        **target,
+        "headers": "".join([header.render({"key": java_string(k), "value": java_string(v)})
+                            for k, v in (r.headers or {}).items()]),
+        "query": "".join([query.render({"key": java_string(k), "value": java_string(v)})
+                          for k, v in (r.query or {}).items()]),
+        "requestBody": _API["body"].render({"value": java_string(r.body)}) if r.body else "",
+        "method": r.method.lower(),
+        "status": r.expect.status,
+        # RestAssured takes GPath, so the parser's JSONPath-style "$.a.b" becomes "a.b"
+        "asserts": "".join([json_eq.render({"path": java_string(jp.removeprefix("$.")), "value": java_string(val)})
+                            for jp, val in (r.expect.jsonPaths or {}).items()]),
+    })
 
-@app.post("/tool")
-def tool(call: ToolCall):
-    i = call.input or {}
-    t = call.tool
-
-    if t == "generate_pom_ui":
-        spec = GeneratePOM(**i)
-        content = _render_pom(spec)
-        path = f"src/test/java/{spec.packageName.replace('.', '/')}/{spec.className}.java"
-        return {"path": path, "content": content, "overwrite": True}
-
-    if t == "generate_testng_ui_test":
-        spec = GenerateUiTest(**i)
-        content = _render_ui_test(spec)
-        path = _java_path(".", spec.packageName, spec.className).as_posix()
-        return {"path": path, "content": content, "overwrite": True}
-
-    if t == "generate_testng_api_test":
-        spec = GenerateApiTest(**i)
-        content = _render_api_test(spec)
-        path = _java_path(".", spec.packageName, spec.className).as_posix()
-        return {"path": path, "content": content, "overwrite": True}
-
-    if t == "write_files":
-        wf = WriteFiles(**i)
-        root = wf.projectRoot
-        _ensure_build_gradle(root, wf.groupId, wf.artifactId, wf.version)
-        for f in wf.files:
-            fp = pathlib.Path(root) / f["path"]
-            fp.parent.mkdir(parents=True, exist_ok=True)
-            if fp.exists() and not f.get("overwrite", True):
-                continue
-            fp.write_text(f["content"], encoding="utf-8")
-        return {"ok": True}
-
-    if t == "run_gradle_tests":
-        root = i["projectRoot"]
-        gradlew = pathlib.Path(root) / "gradlew"
-        if gradlew.exists():
-            cmd = [str(gradlew), "test"]
-        else:
-            cmd = ["gradle", "test"]
-        proc = subprocess.run(cmd, cwd=root, capture_output=True, text=True)
-        return {"code": proc.returncode, "stdout": proc.stdout, "stderr": proc.stderr}
-
-    if t == "git_push":
-        project_root = i["projectRoot"]
-        remote = i["remoteUrl"]
-        branch = i.get("branch", "main")
-        if not (pathlib.Path(project_root) / ".git").exists():
-            Repo.init(project_root)
-        repo = Repo(project_root)
-        repo.git.add(A=True)
+def _render_api_test(input: GenerateApiTest) -> str:
+    if input.scenarios:
+        tests = "".join(_API["test"].render({
+            "methodName": m, "attributes": _test_attributes([], s.description or s.name),
+            "body": "\n".join([_api_request(r, None) for r in s.requests])})
+            for m, s in zip(_method_names(s.name for s in input.scenarios), input.scenarios))
+        return _templates.render("api_suite", packageName=input.packageName, className=input.className,
+                                 baseUrl=java_string(input.baseUrl), tests=tests)
+    body = "\n".join([_api_request(r, input.baseUrl) for r in input.requests])
+    return _templates.render("api_test", packageName=input.packageName, className=input.className, body=body)
+
+# kind -> (input model, renderer); generate_* tools and generate_batch share this table
+_GENERATORS = {
+    "pom": (GeneratePOM, _render_pom),
+    "ui": (GenerateUiTest, _render_ui_test),
+    "api": (GenerateApiTest, _render_api_test),
+}
+
+def _file_spec(kind: str, spec) -> dict:
+    content = _renders.render(kind, spec, _GENERATORS[kind][1])
+    path = _java_path(".", spec.packageName, spec.className).as_posix()
+    return {"path": path, "content": content, "overwrite": True}
+
+def _iter_batch(b: GenerateBatch):
+    """Render every item of a generate_batch call, yielding one file spec (or error) per scenario."""
+    for idx, item in enumerate(b.items):
         try:
-            repo.index.commit("chore: add generated tests")
-        except Exception:
-            pass
+            spec = _GENERATORS[item.kind][0](**item.spec)
+            yield {"index": idx, **_file_spec(item.kind, spec)}
+        except Exception as e:
+            yield {"index": idx, "error": str(e)}
+
+# --- tools ---------------------------------------------------------------------------------------------
+
+@registry.tool("generate_pom_ui", GeneratePOM, inline=True)
+def generate_pom_ui(spec: GeneratePOM):
+    return _file_spec("pom", spec)
+
+@registry.tool("generate_testng_ui_test", GenerateUiTest, inline=True)
+def generate_testng_ui_test(spec: GenerateUiTest):
+    return _file_spec("ui", spec)
+
+@registry.tool("generate_testng_api_test", GenerateApiTest, inline=True)
+def generate_testng_api_test(spec: GenerateApiTest):
+    return _file_spec("api", spec)
+
+@registry.tool("generate_batch", GenerateBatch)
+def generate_batch(b: GenerateBatch):
+    return {"results": list(_iter_batch(b))}
+
+@registry.tool("cache_stats", inline=True)
+def cache_stats(i: dict):
+    return {**_renders.stats(), "coalesced": singleflight.stats()}
+
+@registry.tool("write_files", WriteFiles, writes="projectRoot")
+def write_files(wf: WriteFiles):
+    root = wf.projectRoot
+    _ensure_build_gradle(root, wf.groupId, wf.artifactId, wf.version)
+    # files whose bytes are unchanged are skipped so their mtimes (and Gradle's up-to-date checks) survive
+    manifest = Manifest(root)
+    written, unchanged = [], []
+    flags = write_all(manifest, ((f.path, f.content, f.overwrite) for f in wf.files), _WRITE_CONCURRENCY)
+    for f, changed in zip(wf.files, flags):
+        (written if changed else unchanged).append(f.path)
+    manifest.save()
+    return {"ok": True, "written": written, "unchanged": unchanged}
+
+async def _run_gradle(i: RunGradleTests, job):
+    async with _workspaces.for_run(i.projectRoot, job.log) as ws:
+        return await _run_gradle_in(i, ws, job)
+
+async def _run_gradle_in(i: RunGradleTests, root: str, job):
+    """Run in `root`, the scratch workspace of i.projectRoot (or the project itself); results are recorded for the
+    project."""
+    filters = list(i.tests)
+    cache, todo, hits = None, {}, {}
+    # before the scan: gradle.properties written after it would change every fingerprint on the next run
+    gradle_runner.ensure_gradle_properties(root)
+    if i.reuse != "never" and not filters:
+        # every test class is checked against the result cache, which supersedes changedFiles
+        files = await asyncio.to_thread(run_cache.scan, root)
+        classes = gradle_runner.test_classes(root, files)
+        fps = run_cache.plan(files, classes, {"toolchain": gradle_runner.toolchain_id(i.projectRoot),
+                                              "app": i.appFingerprint})
+        cache = run_cache.RunCache(i.projectRoot, "run_gradle_tests")
+        hits = cache.reusable(fps, i.reuse)
+        todo = {c: fp for c, fp in fps.items() if c not in hits}
+        if hits:
+            job.log("runner", f"{len(hits)} of {len(classes)} test classes have a matching green result; reusing it")
+        if not todo:
+            return run_cache.merge({"code": 0, "filters": [], "summary": {}, "tests": []}, hits)
+        filters = sorted(todo) if hits else []
+    elif i.changedFiles is not None:
+        changed = gradle_runner.test_filters(root, i.changedFiles)
+        if changed is None:
+            filters = []  # a changed source was removed: run everything
+        elif not changed and not filters:
+            job.log("runner", "no test class is affected by the changed files; nothing to run")
+            return {"code": 0, "skipped": True}
+        else:
+            filters += changed
+    code = await proc.stream(gradle_runner.test_command(root, filters), job.log, cwd=root, label="gradle test")
+    result = {"code": code, "filters": filters, **gradle_runner.parse_results(root)}
+    if filters:  # the reused workspace may still hold XML of classes this run did not select
+        result["tests"] = [t for t in result["tests"] if gradle_runner.selected(t["class"], filters)]
+        result["summary"] = gradle_runner.summarize(result["tests"])
+    if cache is None:
+        return result
+    result["tests"] = [t for t in result["tests"] if t["class"] in todo]  # no stale XML of skipped classes
+    result["summary"] = gradle_runner.summarize(result["tests"])
+    await asyncio.to_thread(cache.record_run, todo, result["tests"], lambda t: t["class"], gradle_runner.summarize,
+                            lambda t: False)
+    return run_cache.merge(result, hits)
+
+@registry.tool("run_gradle_tests", RunGradleTests)
+async def run_gradle_tests(i: RunGradleTests):
+    # identical runs of an unchanged project share one job (mcp_common/singleflight.py)
+    key = singleflight.key("run_gradle_tests", i, exclude={"wait"}, tree=_workspaces.generation(i.projectRoot))
+    return await submit(jobs, "run_gradle_tests", lambda job: _run_gradle(i, job), i.wait, key)
+
+@registry.tool("warm_gradle", ProjectRoot)
+async def warm_gradle(i: ProjectRoot):
+    """Start (or reuse) the Gradle daemon for a project and fill its configuration cache ahead of the first run."""
+    async def warm(job):
+        async with _workspaces.for_run(i.projectRoot, job.log) as ws:  # the workspace the next run will get
+            gradle_runner.ensure_gradle_properties(ws)
+            cmd = gradle_runner.gradle_cmd(ws) + ["testClasses", "--daemon", "--build-cache", "--configuration-cache"]
+            return {"code": await proc.stream(cmd, job.log, cwd=ws, label="gradle testClasses")}
+    key = singleflight.key("warm_gradle", i, tree=_workspaces.generation(i.projectRoot))
+    return await submit(jobs, "warm_gradle", warm, key=key)
+
+@registry.tool("git_push", GitPush, lane="git", writes="projectRoot")
+def git_push(i: GitPush):
+    # stages only `paths` (when given), fast-forward push; commit=False batches generations into one commit
+    return _publisher.publish(i)
+
+if GENERATOR_ONLY:
+    registry.disable("run_gradle_tests", "warm_gradle", "git_push",
+                     reason="generator-only server (MCP_GENERATOR_ONLY=1)")
+
+# --- endpoints -----------------------------------------------------------------------------------------
+
+# tools offered on /tool/stream: input -> the results to send, one NDJSON line each
+_STREAMS = {"generate_batch": _iter_batch, "job_logs": lambda i: follow(jobs, i.jobId, i.offset)}
+
+@app.post("/tool/stream")
+async def tool_stream(call: ToolCall):
+    """NDJSON variant of /tool: generate_batch sends one result line per scenario as soon as it is rendered;
+    job_logs follows the job's log ({ line } objects) and ends with its final job_status. Calls go through the
+    registry like /tool calls (disabled tools, lane, project lock, in-flight count and metrics)."""
+    t, args = registry.accept(call.tool, call.input)
+    if t is None:
+        return args
+    if t.name not in _STREAMS:
+        return {"error": f"tool {t.name} does not stream"}
+    return StreamingResponse(registry.stream(t, args, _STREAMS[t.name]), media_type="application/x-ndjson")
+
+@app.post("/files/stream")
+async def files_stream(request: Request):
+    """Streamed write_files: an NDJSON body whose first line is the write_files input without `files`, followed by
+    one line per file (or per chunk, see mcp_common/uploads.py). Files land on disk as they arrive. The upload is
+    one write_files call to the registry: refused where write_files is, and holding its lane slot and project lock."""
+    lines = ndjson(request.stream())
+    try:
+        t, wf = registry.accept("write_files", await anext(lines))
+    except StopAsyncIteration:
+        return {"error": "empty upload"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"bad upload: {e}")
+    if t is None:
+        return wf
+    root = wf.projectRoot
+    written, unchanged, errors = [], [], []
+    async with registry.held(t, wf):
+        await asyncio.to_thread(_ensure_build_gradle, root, wf.groupId, wf.artifactId, wf.version)
+        manifest = await asyncio.to_thread(Manifest, root)
         try:
-            repo.delete_remote("origin")
-        except Exception:
-            pass
-        repo.create_remote("origin", remote)
-        repo.git.push("-u", "origin", branch, "--force")
-        return {"ok": True}
-
-    return {"error": f"unknown tool {t}"}
+            async for res in write_stream(manifest, lines, _WRITE_CONCURRENCY):
+                if "error" in res:
+                    errors.append(res)
+                else:
+                    (written if res["written"] else unchanged).append(res["path"])
+        except ValueError as e:  # malformed line: files completed so far stay written
+            raise HTTPException(status_code=400, detail=f"bad upload: {e}")
+        finally:
+            await asyncio.to_thread(manifest.save)
+    return {"ok": not errors, "written": written, "unchanged": unchanged, "errors": errors}
+
+@app.post("/tool")
+async def tool(call: ToolCall):
+    return await registry.dispatch(call.tool, call.input)
+
+@app.post("/tools/batch")
+async def tools_batch(batch: ToolBatch):
+    """Several tool calls in one round trip; results come back in call order as { ok, result | status, error }."""
+    return {"results": await registry.dispatch_many([(c.tool, c.input) for c in batch.calls], batch.parallel)}
+
+@app.get("/health")
+def health_endpoint():
+    """Liveness and load (in-flight calls, queued/running jobs, CPU) for the router's node scheduler."""
+    return health.snapshot(registry, jobs, generatorOnly=GENERATOR_ONLY)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text format: per-tool latency/in-flight, lane queues, jobs, subprocesses."""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,21 @@
+# tests/conftest.py
+# The servers, the router and the bench scripts are run from their own directories rather than installed, so the
+# tests put those directories on sys.path the same way. The router comes first: bench has a nodes.py of its own.
+# Both servers' helper modules are importable by name; their server.py modules are loaded with
+# bench/common.load_server, since both are called `server`.
+import pathlib, sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+DIRS = ("router", "servers", "servers/pw-mcp-py", "servers/sel-testng-rest-py", "bench")
+sys.path[:0] = [str(ROOT / d) for d in DIRS if str(ROOT / d) not in sys.path]
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path_factory, monkeypatch):
+    """Keep manifests, run results and scratch workspaces out of ~/.cache/mcp."""
+    from mcp_common import state
+    path = tmp_path_factory.mktemp("mcp-cache")
+    monkeypatch.setattr(state, "CACHE_DIR", path)
+    return path
@@ -0,0 +1,10 @@
+package com.example.pages;
+
+import com.example.support.Waits;
+import org.openqa.selenium.WebDriver;
+
+public abstract class BasePage {
+    protected final WebDriver driver;
+    protected BasePage(WebDriver driver) { this.driver = driver; }
+    public void open() { Waits.forPageLoad(driver); }
+}
@@ -0,0 +1,7 @@
+package com.example.pages;
+
+import org.openqa.selenium.WebDriver;
+
+public class CartPage extends BasePage {
+    public CartPage(WebDriver driver) { super(driver); }
+}
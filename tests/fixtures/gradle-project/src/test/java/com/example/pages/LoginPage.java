@@ -0,0 +1,7 @@
+package com.example.pages;
+
+import org.openqa.selenium.WebDriver;
+
+public class LoginPage extends BasePage {
+    public LoginPage(WebDriver driver) { super(driver); }
+}
@@ -0,0 +1,7 @@
+package com.example.pages;
+
+import org.openqa.selenium.WebDriver;
+
+public class LoginPageV2 extends BasePage {
+    public LoginPageV2(WebDriver driver) { super(driver); }
+}
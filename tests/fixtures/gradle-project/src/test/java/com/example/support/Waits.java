@@ -0,0 +1,7 @@
+package com.example.support;
+
+import org.openqa.selenium.WebDriver;
+
+public final class Waits {
+    public static void forPageLoad(WebDriver driver) { }
+}
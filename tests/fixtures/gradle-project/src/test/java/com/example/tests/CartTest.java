@@ -0,0 +1,11 @@
+package com.example.tests;
+
+import com.example.pages.CartPage;
+import org.testng.annotations.Test;
+
+public class CartTest {
+    @Test
+    public void addsItem() {
+        new CartPage(null).open();
+    }
+}
@@ -0,0 +1,11 @@
+package com.example.tests;
+
+import com.example.pages.LoginPageV2;
+import org.testng.annotations.Test;
+
+public class LoginPageV2Test {
+    @Test
+    public void opens() {
+        new LoginPageV2(null).open();
+    }
+}
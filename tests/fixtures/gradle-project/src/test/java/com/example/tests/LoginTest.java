@@ -0,0 +1,11 @@
+package com.example.tests;
+
+import com.example.pages.LoginPage;
+import org.testng.annotations.Test;
+
+public class LoginTest {
+    @Test
+    public void logsIn() {
+        new LoginPage(null).open();
+    }
+}
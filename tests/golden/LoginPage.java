@@ -0,0 +1,25 @@
+    package com.example.pages;
+
+import org.openqa.selenium.*;
+import org.openqa.selenium.support.*;
+
+public class LoginPage {
+    private WebDriver driver;
+    @FindBy(id = "email")
+    public WebElement email;
+    @FindBy(xpath = "//button[text()=\"Sign in\"]")
+    public WebElement signIn;
+    @FindBy(css = "input.class\\:x")
+    public WebElement classElement;
+
+    public LoginPage(WebDriver driver) {
+        this.driver = driver;
+        PageFactory.initElements(driver, this);
+    }
+
+    public LoginPage open() {
+        driver.get("https://shop.test/login?q=\"x\"");
+        return this;
+    }
+    
+}
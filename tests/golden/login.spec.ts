@@ -0,0 +1,13 @@
+import { test, expect } from '@playwright/test';
+
+    test('Log in with \"quotes\" and \`ticks\`\nsecond line', async ({ page }) => {
+      await page.goto("https://shop.test/login?next=\${home}");
+  await page.fill("#email", "a\"b\\c");
+  await page.fill("textarea[name=\'note\']", "line1\nline2 \`tick\` \'q\'");
+  await page.click("text=Sign in");
+  await page.waitForTimeout(250);
+  // TODO: unsupported step: {'action': 'wait', 'value': '2s'}
+  await expect(page.locator("#banner")).toContainText("Welcome, \${user}!");
+  // TODO: unsupported step: {'action': 'scroll', 'value': 'down\n// */'}
+    });
+    
\ No newline at end of file
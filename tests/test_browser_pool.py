@@ -0,0 +1,96 @@
+# tests/test_browser_pool.py
+# BrowserPool with a fake Playwright driver: sessions only reach their own page, and a slow browser launch does not
+# hold up sessions on the browsers already running.
+import asyncio
+import pytest
+from browser_pool import BrowserPool
+from mcp_common.registry import NotFound
+
+
+class FakeContext:
+    async def new_page(self):
+        return object()
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    async def new_context(self):
+        return FakeContext()
+
+    async def close(self):
+        pass
+
+
+class FakeChromium:
+    def __init__(self, delay: float):
+        self.delay, self.launched = delay, 0
+
+    async def launch(self, headless=True):
+        self.launched += 1
+        await asyncio.sleep(self.delay)
+        return FakeBrowser()
+
+
+class FakePlaywright:
+    def __init__(self, delay: float):
+        self.chromium = FakeChromium(delay)
+
+    async def stop(self):
+        pass
+
+
+def pool(delay: float = 0.0, **kw) -> BrowserPool:
+    """A started pool (start() without importing Playwright and without prewarming)."""
+    p = BrowserPool(**kw)
+    p._cond = asyncio.Condition()
+    p._pw = FakePlaywright(delay)
+    return p
+
+
+def test_page_needs_the_session_id():
+    async def main():
+        p = pool(size=1)
+        a, b = await p.acquire(), await p.acquire()
+        assert p.page(a) is not p.page(b)
+        for missing in (None, "", "nope"):
+            with pytest.raises(NotFound):
+                p.page(missing)
+        await p.release(b)
+        with pytest.raises(NotFound):
+            p.page(b)  # released: never falls back to another session
+        await p.shutdown()
+
+    asyncio.run(main())
+
+
+def test_launch_does_not_block_other_sessions():
+    async def main():
+        p = pool(size=2, max_contexts=1)
+        first = await p.acquire()
+        p._pw.chromium.delay = 0.5
+        launching = asyncio.create_task(p.acquire())  # needs the second browser
+        await asyncio.sleep(0.05)
+        start = asyncio.get_running_loop().time()
+        await p.release(first)
+        again = await p.acquire()  # the first browser is free again
+        assert asyncio.get_running_loop().time() - start < 0.2
+        second = await launching
+        assert p._pw.chromium.launched == 2 and p.stats()["browsers"] == 2
+        assert p.stats()["sessions"] == 2 and {again, second} == set(p._sessions)
+        await p.shutdown()
+
+    asyncio.run(main())
+
+
+def test_concurrent_acquires_stay_within_pool_size():
+    async def main():
+        p = pool(0.05, size=2, max_contexts=2)
+        sids = await asyncio.gather(*(p.acquire() for _ in range(4)))
+        assert len(set(sids)) == 4
+        assert p._pw.chromium.launched == 2
+        assert [s["active"] for s in p.stats()["perBrowser"]] == [2, 2]
+        await p.shutdown()
+
+    asyncio.run(main())
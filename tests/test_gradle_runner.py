@@ -0,0 +1,69 @@
+# tests/test_gradle_runner.py
+# --tests filters from changed files and results parsed from Gradle's TestNG XML, against the checked-in project in
+# tests/fixtures/gradle-project (test sources plus the build/test-results/test/TEST-*.xml of one run).
+import pathlib, shutil
+import pytest
+import gradle_runner
+
+PROJECT = str(pathlib.Path(__file__).parent / "fixtures" / "gradle-project")
+SRC = "src/test/java/com/example/"
+LOGIN, CART, V2 = "com.example.tests.LoginTest", "com.example.tests.CartTest", "com.example.tests.LoginPageV2Test"
+
+
+@pytest.mark.parametrize("changed, filters", [
+    ([SRC + "tests/LoginTest.java"], [LOGIN]),
+    ([SRC + "pages/LoginPage.java"], [LOGIN]),  # not LoginPageV2Test: names match whole words
+    ([SRC + "pages/CartPage.java", SRC + "tests/LoginTest.java"], [CART, LOGIN]),
+    ([SRC + "pages/BasePage.java"], [CART, V2, LOGIN]),  # through the page objects extending it
+    ([SRC + "support/Waits.java"], [CART, V2, LOGIN]),  # through BasePage, then the page objects
+    (["./" + SRC + "tests/CartTest.java"], [CART]),
+    ([(SRC + "tests/CartTest.java").replace("/", "\\")], [CART]),
+    (["build.gradle", "src/main/resources/app.properties"], []),  # Gradle's own up-to-date checks cover these
+    ([SRC + "tests/DeletedTest.java"], None),  # a removed source: run everything
+])
+def test_test_filters(changed, filters):
+    assert gradle_runner.test_filters(PROJECT, changed) == filters
+
+
+def test_parse_results():
+    result = gradle_runner.parse_results(PROJECT)  # TEST-...Interrupted.xml is truncated and skipped
+    assert result["summary"] == {"tests": 5, "failures": 1, "errors": 1, "skipped": 1, "time": 5.465}
+    by_name = {t["name"]: t for t in result["tests"]}
+    assert [t["class"] for t in result["tests"]] == [CART, CART, LOGIN, LOGIN, LOGIN]
+    assert by_name["logsIn"] == {"class": LOGIN, "name": "logsIn", "status": "passed", "time": 1.502, "message": None}
+    assert by_name["rejectsBadPassword"]["status"] == "failed"
+    assert by_name["rejectsBadPassword"]["message"].startswith("java.lang.AssertionError: expected [Invalid password]")
+    assert by_name["checksOut"]["status"] == "failed" and "#pay-now" in by_name["checksOut"]["message"]
+    assert by_name["remembersUser"]["status"] == "skipped"
+    assert gradle_runner.summarize(result["tests"]) == {"tests": 5, "failures": 2, "errors": 0, "skipped": 1,
+                                                        "time": 5.465}
+
+
+def test_parse_results_without_a_run(tmp_path):
+    assert gradle_runner.parse_results(str(tmp_path)) == {
+        "summary": {"tests": 0, "failures": 0, "errors": 0, "skipped": 0, "time": 0.0}, "tests": []}
+
+
+def test_test_classes():
+    files = {rel: "" for rel in (SRC + "tests/LoginTest.java", SRC + "pages/LoginPage.java", "build.gradle")}
+    assert gradle_runner.test_classes(PROJECT, files) == {LOGIN: SRC + "tests/LoginTest.java"}
+
+
+@pytest.mark.parametrize("cls, filters, hit", [
+    (LOGIN, [LOGIN], True), (LOGIN, ["LoginTest"], True), (LOGIN, [LOGIN + ".logsIn"], True),
+    (LOGIN, ["com.example.tests.*"], True), (LOGIN, [CART], False), (V2, ["LoginTest"], False),
+])
+def test_selected(cls, filters, hit):
+    assert gradle_runner.selected(cls, filters) is hit
+
+
+def test_command_and_properties(tmp_path):
+    root = tmp_path / "p"
+    shutil.copytree(PROJECT, root)
+    (root / "gradle.properties").write_text("org.gradle.caching=false")
+    gradle_runner.ensure_gradle_properties(str(root))
+    props = (root / "gradle.properties").read_text().splitlines()
+    assert props[0] == "org.gradle.caching=false" and "org.gradle.daemon=true" in props
+    assert sum(p.startswith("org.gradle.caching=") for p in props) == 1  # the project's own value is kept
+    assert gradle_runner.test_command(str(root), [LOGIN]) == [
+        "gradle", "test", "--daemon", "--build-cache", "--configuration-cache", "--tests", LOGIN]
@@ -0,0 +1,132 @@
+# tests/test_jobs.py
+# Run jobs end to end with real subprocesses: submit -> job_status -> NDJSON log stream -> result, failures,
+# cancellation (queued and running), and proc.stream with lines longer than its buffer limit.
+import asyncio, json, sys, time
+import pytest
+from fastapi import HTTPException
+from common import load_server
+from mcp_common import proc
+from mcp_common.jobs import FAILED, JobQueue, follow, register_job_tools, submit
+from mcp_common.registry import ToolRegistry
+
+CHATTY = "import sys; print('one'); print('two', file=sys.stderr); print('three')"
+SLEEPY = "import time; print('started', flush=True); time.sleep(60)"
+
+
+def python(script: str):
+    """A job function running `python -c script`, as run_tests / run_gradle_tests run their commands."""
+    async def fn(job):
+        return {"code": await proc.stream([sys.executable, "-c", script], job.log, label="python")}
+    return fn
+
+
+def queue(tmp_path, workers=2):
+    jobs, registry = JobQueue(workers=workers, log_dir=str(tmp_path / "logs")), ToolRegistry()
+    register_job_tools(registry, jobs)
+    return jobs, registry
+
+
+async def followed(jobs, job_id, offset=0) -> list[dict]:
+    return [item async for item in follow(jobs, job_id, offset)]
+
+
+def test_lifecycle(tmp_path):
+    async def main():
+        jobs, registry = queue(tmp_path)
+        submitted = await submit(jobs, "run_tests", python(CHATTY))
+        assert submitted["status"] == "queued"
+        status = await registry.dispatch("job_status", {"jobId": submitted["jobId"]})
+        assert status["status"] in ("queued", "running") and status["result"] is None
+
+        items = await followed(jobs, submitted["jobId"])
+        lines, final = [i["line"] for i in items[:-1]], items[-1]
+        assert sorted(lines) == ["[stderr] two", "[stdout] one", "[stdout] three"]
+        assert lines.index("[stdout] one") < lines.index("[stdout] three")
+        assert final["status"] == "succeeded" and final["result"] == {"code": 0} and final["logLines"] == 3
+
+        logs = await registry.dispatch("job_logs", {"jobId": submitted["jobId"], "limit": 2})
+        assert len(logs["lines"]) == 2
+        rest = await registry.dispatch("job_logs", {"jobId": submitted["jobId"], "offset": logs["next"]})
+        assert logs["lines"] + rest["lines"] == lines and rest["next"] == rest["size"]
+        assert [i["line"] for i in (await followed(jobs, submitted["jobId"], logs["next"]))[:-1]] == rest["lines"]
+    asyncio.run(main())
+
+
+def test_failures(tmp_path):
+    async def main():
+        jobs, _ = queue(tmp_path)
+
+        async def broken(job):
+            raise RuntimeError("no gradle on PATH")
+        exit3 = await submit(jobs, "run_tests", python("raise SystemExit(3)"), wait=True)
+        assert exit3["status"] == FAILED and exit3["result"] == {"code": 3}
+        raised = await submit(jobs, "run_tests", broken, wait=True)
+        assert raised["status"] == FAILED and raised["error"] == "no gradle on PATH"
+    asyncio.run(main())
+
+
+def test_cancel_running_job_kills_the_process(tmp_path):
+    async def main():
+        jobs, registry = queue(tmp_path)
+        job_id = (await submit(jobs, "run_tests", python(SLEEPY)))["jobId"]
+        stream = follow(jobs, job_id)
+        assert await anext(stream) == {"line": "[stdout] started"}
+        start = time.monotonic()
+        await registry.dispatch("cancel_job", {"jobId": job_id})
+        final = await anext(stream)
+        assert final["status"] == "cancelled" and time.monotonic() - start < 5
+    asyncio.run(main())
+
+
+def test_cancel_queued_job(tmp_path):
+    async def main():
+        jobs, registry = queue(tmp_path, workers=1)
+        running = (await submit(jobs, "run_tests", python(SLEEPY)))["jobId"]
+        queued = (await submit(jobs, "run_tests", python(CHATTY)))["jobId"]
+        await asyncio.sleep(0.05)
+        cancelled = await registry.dispatch("cancel_job", {"jobId": queued})
+        assert cancelled["status"] == "cancelled" and cancelled["started"] is None
+        assert (await followed(jobs, queued)) == [(await registry.dispatch("job_status", {"jobId": queued}))]
+        await registry.dispatch("cancel_job", {"jobId": running})
+        await jobs.get(running).done.wait()
+        assert jobs.stats() == {"workers": 1, "cancelled": 2}
+    asyncio.run(main())
+
+
+def test_unknown_job(tmp_path):
+    async def main():
+        jobs, registry = queue(tmp_path)
+        with pytest.raises(HTTPException) as e:
+            await registry.dispatch("job_status", {"jobId": "nope"})
+        assert e.value.status_code == 404
+    asyncio.run(main())
+
+
+def test_tool_stream_endpoint_follows_a_job(tmp_path, monkeypatch):
+    sel = load_server("sel-testng-rest-py")
+
+    async def main():
+        jobs, _ = queue(tmp_path)
+        monkeypatch.setattr(sel, "jobs", jobs)
+        job_id = (await submit(jobs, "run_gradle_tests", python(CHATTY)))["jobId"]
+        resp = await sel.tool_stream(sel.ToolCall(tool="job_logs", input={"jobId": job_id}))
+        assert resp.media_type == "application/x-ndjson"
+        items = [json.loads(chunk) async for chunk in resp.body_iterator]
+        assert len(items) == 4 and items[-1]["status"] == "succeeded"
+        with pytest.raises(HTTPException) as e:
+            await sel.tool_stream(sel.ToolCall(tool="job_logs", input={"jobId": "nope"}))
+        assert e.value.status_code == 404
+    asyncio.run(main())
+
+
+def test_lines_longer_than_the_limit_arrive_in_pieces(monkeypatch):
+    monkeypatch.setattr(proc, "LINE_LIMIT", 1000)
+    script = "import sys; sys.stdout.write('x' * 250000 + '\\nafter\\r\\n' + 'y' * 3000 + '\\n\\ntail')"
+    got = []
+
+    async def main():
+        return await proc.stream([sys.executable, "-c", script], lambda name, line: got.append(line))
+    assert asyncio.run(main()) == 0
+    i = got.index("after")
+    assert "".join(got[:i]) == "x" * 250000 and all(got[:i])
+    assert "".join(got[i + 1:-2]) == "y" * 3000 and got[-2:] == ["", "tail"]
@@ -0,0 +1,126 @@
+# tests/test_nodes.py
+# router/nodes.py with fake clients: rendezvous stickiness of roots (also under load, unless spill-over is switched
+# on), load-weighted picks and failover when a node stops answering /health.
+import pytest
+import nodes
+from nodes import NodePool, NoHealthyNode, lease
+
+URLS = ["http://a:1", "http://b:1", "http://c:1"]
+ROOTS = [f"/work/project-{i}" for i in range(60)]
+
+
+class FakeClients:
+    """client_for(url) whose health() returns HEALTH[url], or raises if it is an exception."""
+
+    def __init__(self, **health):
+        self.health = {url: {"busy": 0} for url in URLS}
+        self.health.update({f"http://{k}:1": v for k, v in health.items()})
+
+    def __call__(self, url):
+        fake = self
+
+        class Client:
+            def health(self):
+                h = fake.health[url]
+                if isinstance(h, Exception):
+                    raise h
+                return dict(h)
+
+        return Client()
+
+
+def pool(clients, urls=URLS, **kw) -> NodePool:
+    return NodePool("pw", urls, clients, interval=0, **kw)
+
+
+def owners(p: NodePool) -> dict[str, str]:
+    return {root: p.for_root(root) for root in ROOTS}
+
+
+def test_roots_are_sticky_across_routers_and_spread_over_nodes():
+    clients = FakeClients()
+    first = owners(pool(clients))
+    assert owners(pool(clients)) == first  # a second router process, no shared state
+    assert set(first.values()) == set(URLS)
+
+
+def test_removing_a_node_only_moves_its_roots():
+    clients = FakeClients()
+    before = owners(pool(clients))
+    after = owners(pool(clients, urls=URLS[:2]))
+    moved = {root for root in ROOTS if before[root] != after[root]}
+    assert moved == {root for root in ROOTS if before[root] == URLS[2]}
+
+
+def test_pinned_root_stays_for_the_run():
+    clients = FakeClients()
+    p = pool(clients)
+    url = p.for_root(ROOTS[0])
+    clients.health[url] = {"busy": 100}
+    assert p.for_root(ROOTS[0]) == url
+
+
+def test_root_stays_with_its_owner_under_load():
+    owner = pool(FakeClients()).for_root(ROOTS[0])
+    # two router processes with different views of the load: one sees the owner swamped, the other idle
+    swamped, idle = FakeClients(), FakeClients()
+    swamped.health[owner] = {"busy": 50, "cpu": 4.0}
+    first, second = pool(swamped), pool(idle)
+    with lease(owner), lease(owner):
+        assert first.for_root(ROOTS[0]) == owner
+    assert second.for_root(ROOTS[0]) == owner
+    assert owners(pool(swamped)) == owners(pool(idle))
+
+
+def test_spill_over_is_opt_in():
+    clients = FakeClients()
+    preferred = pool(clients).for_root(ROOTS[0])
+    clients.health[preferred] = {"busy": 3}  # within slack: stays
+    assert pool(clients, slack=4).for_root(ROOTS[0]) == preferred
+    clients.health[preferred] = {"busy": 10}
+    others = [u for u in URLS if u != preferred]
+    clients.health[others[0]] = {"busy": 2}
+    assert pool(clients, slack=4).for_root(ROOTS[0]) == others[1]
+    assert pool(clients).for_root(ROOTS[0]) == preferred  # not switched on
+
+
+def test_pick_weights_busy_cpu_and_open_calls():
+    clients = FakeClients(a={"busy": 2}, b={"busy": 0, "cpu": 1.0}, c={"busy": 1})
+    p = pool(clients)
+    assert p.pick() == "http://c:1"  # b: 0 + CPU_WEIGHT * 1.0
+    with lease("http://c:1"), lease("http://c:1"):
+        assert p.pick() == "http://a:1"
+    assert nodes._by_url["http://c:1"].pending == 0
+    assert p.pick() == "http://c:1"
+
+
+def test_down_node_is_skipped_and_rejoins():
+    clients = FakeClients()
+    p = pool(clients)
+    preferred = pool(clients).for_root(ROOTS[0])
+    clients.health[preferred] = ConnectionError("refused")
+    url = p.for_root(ROOTS[0])
+    assert url != preferred
+    assert preferred not in {p.pick() for _ in range(20)}
+    assert {n["url"]: n["healthy"] for n in p.status()}[preferred] is False
+
+    clients.health[preferred] = {"busy": 0}
+    assert p.for_root(ROOTS[0]) == url  # pinned for this run
+    assert pool(clients).for_root(ROOTS[0]) == preferred  # the next run is back on its node
+
+
+def test_all_nodes_down():
+    clients = FakeClients(a=OSError("down"), b=OSError("down"), c=OSError("down"))
+    with pytest.raises(NoHealthyNode):
+        pool(clients).pick()
+
+
+def test_generator_only_nodes_never_own_roots():
+    clients = FakeClients(a={"busy": 0, "generatorOnly": True}, b={"busy": 5}, c={"busy": 5})
+    p = pool(clients)
+    assert p.pick() == "http://a:1"
+    assert p.pick(generator_ok=False) != "http://a:1"
+    assert "http://a:1" not in set(owners(p).values())
+    clients.health.update({"http://b:1": {"generatorOnly": True}, "http://c:1": {"generatorOnly": True}})
+    with pytest.raises(NoHealthyNode):
+        pool(clients).for_root(ROOTS[0])
@@ -0,0 +1,117 @@
+# tests/test_publisher.py
+# mcp_common.publisher against a local bare remote: only the reported paths are committed, pushes fast-forward, and
+# a push to a remote that moved on is rejected instead of overwriting it; paths outside the project are refused and
+# concurrent publishes on one root run one after the other.
+import subprocess, time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from mcp_common.publisher import GitPush, Publisher
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture(autouse=True)
+def identity(monkeypatch):
+    for who in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{who}_NAME", "Test")
+        monkeypatch.setenv(f"GIT_{who}_EMAIL", "test@example.com")
+
+
+@pytest.fixture
+def remote(tmp_path):
+    path = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", str(path))
+    return path
+
+
+def test_stages_commits_and_fast_forwards(tmp_path, remote):
+    root = tmp_path / "project"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "a.spec.ts").write_text("a\n")
+    (root / "src" / "b.spec.ts").write_text("b\n")
+    (root / "notes.txt").write_text("not generated\n")
+    publisher = Publisher()
+
+    out = publisher.publish(GitPush(projectRoot=str(root), remoteUrl=str(remote), paths=["src/a.spec.ts"]))
+    assert out["ok"] and out["pushed"] and out["staged"] == 1
+    assert git(remote, "ls-tree", "-r", "--name-only", "main").splitlines() == ["src/a.spec.ts"]
+    assert git(remote, "rev-parse", "main") == out["commit"]
+
+    (root / "src" / "a.spec.ts").unlink()
+    out = publisher.publish(GitPush(projectRoot=str(root), paths=[str(root / "src" / "a.spec.ts"),
+                                                                   str(root / "src" / "b.spec.ts")]))
+    assert out["pushed"]
+    assert git(remote, "ls-tree", "-r", "--name-only", "main").splitlines() == ["src/b.spec.ts"]
+    assert git(remote, "rev-parse", "main^") == git(root, "rev-parse", "HEAD^")
+
+
+def test_diverged_remote_is_rejected_not_overwritten(tmp_path, remote):
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "a.spec.ts").write_text("a\n")
+    publisher = Publisher()
+    assert publisher.publish(GitPush(projectRoot=str(root), remoteUrl=str(remote), paths=["a.spec.ts"]))["pushed"]
+
+    # someone else pushes on top of it
+    other = tmp_path / "other"
+    git(tmp_path, "clone", "-q", "-b", "main", str(remote), str(other))
+    (other / "theirs.txt").write_text("theirs\n")
+    git(other, "add", "theirs.txt")
+    git(other, "commit", "-q", "-m", "theirs")
+    git(other, "push", "-q", "origin", "main")
+    theirs = git(remote, "rev-parse", "main")
+
+    (root / "a.spec.ts").write_text("a, regenerated\n")
+    out = publisher.publish(GitPush(projectRoot=str(root), paths=["a.spec.ts"]))
+    assert out["commit"] and not out["ok"]
+    assert out["pushed"] is False and out["rejected"] is True
+    assert git(remote, "rev-parse", "main") == theirs
+
+
+def test_paths_outside_the_working_tree_are_refused(tmp_path):
+    root, elsewhere = tmp_path / "project", tmp_path / "elsewhere"
+    root.mkdir()
+    elsewhere.mkdir()
+    (root / "a.spec.ts").write_text("a\n")
+    (elsewhere / "secret.txt").write_text("not ours\n")
+    (root / "linked").symlink_to(elsewhere, target_is_directory=True)
+    publisher = Publisher()
+
+    for path in ("../elsewhere/secret.txt", str(elsewhere / "secret.txt"), "linked/secret.txt"):
+        out = publisher.publish(GitPush(projectRoot=str(root), paths=["a.spec.ts", path], push=False))
+        assert out["ok"] is False and out["staged"] == 0 and out["commit"] is None
+        assert "outside the working tree" in out["error"]
+    assert git(root, "diff", "--cached", "--name-only") == ""  # nothing was staged, not even a.spec.ts
+
+    out = publisher.publish(GitPush(projectRoot=str(root), paths=["src/../a.spec.ts"], push=False))
+    assert out["ok"] and out["staged"] == 1 and out["commit"]
+
+
+def test_publishes_on_one_root_do_not_interleave(tmp_path, remote, monkeypatch):
+    root = tmp_path / "project"
+    root.mkdir()
+    publisher, stage, push = Publisher(), Publisher.stage, Publisher.push
+    running, overlapped = [], []
+
+    def slow_stage(self, root, paths):
+        overlapped.append(bool(running))
+        running.append(paths)
+        time.sleep(0.05)  # without the root lock, the other publish stages (and commits) its file here
+        return stage(self, root, paths)
+
+    def done_push(self, *args):
+        running.pop()
+        return push(self, *args)
+    monkeypatch.setattr(Publisher, "stage", slow_stage)
+    monkeypatch.setattr(Publisher, "push", done_push)
+
+    def publish(name):
+        (root / name).write_text(name)
+        return publisher.publish(GitPush(projectRoot=str(root), remoteUrl=str(remote), paths=[name], message=name))
+    with ThreadPoolExecutor(2) as pool:
+        results = list(pool.map(publish, ["a.spec.ts", "b.spec.ts"]))
+    assert overlapped == [False, False] and all(r["ok"] and r["staged"] == 1 for r in results)
+    for name, r in zip(["a.spec.ts", "b.spec.ts"], results):
+        assert git(root, "show", "--name-only", "--format=", r["commit"]) == name  # each commit has its own file
@@ -0,0 +1,66 @@
+# tests/test_pw_runner.py
+# Spec file filters (Playwright reads them as regular expressions over the absolute path), merging shard reports,
+# and run_sharded with proc.stream standing in for `npx playwright test`.
+import asyncio, json, pathlib, re
+import pytest
+import pw_runner
+from mcp_common import proc
+
+
+def selects(rel: str, path: str) -> bool:
+    """What Playwright does with a positional filter: new RegExp(filter, "gi").test(absolute path). The filters
+    only use syntax Python's re reads the same way."""
+    return re.search(pw_runner.file_filter(rel), path, re.I) is not None
+
+
+@pytest.mark.parametrize("rel, path, hit", [
+    ("login.spec.ts", "/srv/tests/login.spec.ts", True),
+    ("login.spec.ts", "/srv/tests/admin-login.spec.ts", False),
+    ("login.spec.ts", "/srv/tests/login.spec.ts.orig", False),
+    ("login.spec.ts", "/srv/tests/loginXspec.ts", False),
+    ("auth/login.spec.ts", "/srv/tests/auth/login.spec.ts", True),
+    ("auth/login.spec.ts", "/srv/tests/oauth/login.spec.ts", False),
+    ("auth/login.spec.ts", "C:\\srv\\tests\\auth\\login.spec.ts", True),
+    ("checkout (v2)+[a].spec.ts", "/srv/tests/checkout (v2)+[a].spec.ts", True),
+])
+def test_file_filter_selects_exactly_one_spec(rel, path, hit):
+    assert selects(rel, path) is hit
+
+
+def report(*tests, file="login.spec.ts") -> dict:
+    """A JSON reporter report with one spec per (title, status)."""
+    return {"suites": [{"title": file, "file": file, "specs": [
+        {"title": title, "file": file, "line": n, "tests": [
+            {"projectName": "chromium", "status": status,
+             "results": [{"duration": 100, **({"error": {"message": "boom"}} if status == "unexpected" else {})}]}]}
+        for n, (title, status) in enumerate(tests, 1)]}]}
+
+
+def test_merge_counts_duplicates_once_and_ignores_empty_shards():
+    one = report(("logs in", "expected"), ("rejects a bad password", "unexpected"))
+    two = report(("adds to cart", "flaky"), file="cart.spec.ts")
+    merged = pw_runner.merge_reports([one, {}, {"suites": []}, two, one])
+    assert [t["title"] for t in merged["tests"]] == ["logs in", "rejects a bad password", "adds to cart"]
+    assert merged["summary"] == {"total": 3, "passed": 1, "failed": 1, "flaky": 1, "skipped": 0, "duration": 300}
+    assert merged["tests"][1]["error"] == "boom" and merged["tests"][2]["flaky"]
+    assert pw_runner.merge_reports([{}, {}]) == {"tests": [], "summary": pw_runner.summarize([])}
+
+
+def test_run_sharded_passes_anchored_filters_and_merges(tmp_path, monkeypatch):
+    cmds = []
+
+    async def stream(cmd, log, cwd=None, env=None, label=None):
+        cmds.append(cmd)
+        shard = next(a for a in cmd if a.startswith("--shard=")).split("=")[1]
+        if shard == "1/3":  # shard 2 finds no tests; shard 3 dies before writing a report
+            pathlib.Path(env["PLAYWRIGHT_JSON_OUTPUT_NAME"]).write_text(json.dumps(report(("logs in", "expected"))))
+        elif shard == "2/3":
+            pathlib.Path(env["PLAYWRIGHT_JSON_OUTPUT_NAME"]).write_text(json.dumps({"suites": []}))
+        return 1 if shard == "3/3" else 0
+    monkeypatch.setattr(proc, "stream", stream)
+
+    result = asyncio.run(pw_runner.run_sharded(["npx", "playwright"], str(tmp_path), {}, lambda *a: None, shards=3,
+                                               files=["login.spec.ts"]))
+    assert all(cmd[-1] == pw_runner.file_filter("login.spec.ts") for cmd in cmds) and len(cmds) == 3
+    assert result["code"] == 1 and result["shards"] == ["1/3", "2/3", "3/3"]
+    assert result["summary"]["total"] == 1 and result["tests"][0]["status"] == "passed"
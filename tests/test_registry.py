@@ -0,0 +1,89 @@
+# tests/test_registry.py
+# Streamed calls (/tool/stream, /files/stream) go through the registry like /tool calls: disabled and unknown
+# tools are refused, and a running stream holds its lane slot and project lock and counts as in flight.
+import asyncio, json
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+from common import load_server
+from mcp_common import metrics
+from mcp_common.registry import NotFound, ToolRegistry
+from mcp_common.workspace import Workspaces
+
+
+class Gen(BaseModel):
+    testsRoot: str
+
+
+def calls(tool: str, outcome: str) -> float:
+    return metrics.TOOL_CALLS._values.get(metrics.TOOL_CALLS._key({"tool": tool, "outcome": outcome}), 0)
+
+
+def registry(tmp_path) -> ToolRegistry:
+    reg = ToolRegistry(lanes={"gen": 1}, workspaces=Workspaces(str(tmp_path / "scratch")))
+    reg.tool("stream_gen", Gen, lane="gen", writes="testsRoot")(lambda i: None)
+    reg.tool("stream_off")(lambda i: None)
+    reg.disable("stream_off", reason="generator-only server")
+    return reg
+
+
+def test_a_stream_holds_its_slot_lock_and_in_flight_count(tmp_path):
+    async def main():
+        reg, root = registry(tmp_path), str(tmp_path / "tests")
+        t, args = reg.accept("stream_gen", {"testsRoot": root})
+        seen = []
+
+        def items(i):
+            for n in range(2):
+                seen.append((reg.in_flight, reg.workspaces.lock(root).writer))
+                yield {"n": n}
+        before = calls("stream_gen", "ok")
+        first = reg.stream(t, args, items)
+        assert reg.in_flight == 0  # nothing is held until the response is iterated
+        out = [json.loads(line) async for line in first]
+        assert out == [{"n": 0}, {"n": 1}] and seen == [(1, True), (1, True)]
+        assert reg.in_flight == 0 and not reg.workspaces.lock(root).writer
+        assert calls("stream_gen", "ok") == before + 1
+
+        async def slow(i):
+            yield {"n": 0}
+            await asyncio.sleep(0.05)
+        held = reg.stream(t, args, slow)
+        await anext(held)
+        queued = asyncio.create_task(anext(reg.stream(t, args, slow)))
+        await asyncio.sleep(0.01)
+        assert reg.waiting == 1 and not queued.done()  # the "gen" lane has one slot
+        await held.aclose()
+        assert json.loads(await queued) == {"n": 0}
+    asyncio.run(main())
+
+
+def test_refused_streams(tmp_path):
+    reg = registry(tmp_path)
+    before = calls("unknown", "disabled")
+    assert reg.accept("stream_off", {}) == (None, {"error": "tool stream_off is disabled: generator-only server"})
+    assert calls("unknown", "disabled") == before + 1
+    assert reg.accept("nope", {}) == (None, {"error": "unknown tool nope"})
+    with pytest.raises(HTTPException) as e:
+        reg.accept("stream_gen", {})
+    assert e.value.status_code == 422
+
+    t, args = reg.accept("stream_gen", {"testsRoot": str(tmp_path)})
+
+    def missing(i):
+        raise NotFound("unknown job x")
+    with pytest.raises(HTTPException) as e:
+        reg.stream(t, args, missing)
+    assert e.value.status_code == 404 and reg.in_flight == 0
+
+
+def test_generator_only_node_refuses_run_tests_over_the_stream_endpoint():
+    pw = load_server("pw-mcp-py")
+    pw.registry.disable("run_tests", reason="generator-only server (MCP_GENERATOR_ONLY=1)")
+
+    async def main():
+        out = await pw.tool_stream(pw.ToolCall(tool="run_tests", input={}))
+        assert out == {"error": "tool run_tests is disabled: generator-only server (MCP_GENERATOR_ONLY=1)"}
+        out = await pw.tool_stream(pw.ToolCall(tool="job_status", input={"jobId": "x"}))
+        assert out == {"error": "tool job_status does not stream"}
+    asyncio.run(main())
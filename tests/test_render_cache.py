@@ -0,0 +1,76 @@
+# tests/test_render_cache.py
+# Manifest writes: unchanged files are left alone (mtime kept), changed ones replaced, and paths escaping the
+# project root rejected before anything outside it is looked at.
+import os
+import pytest
+from mcp_common.render_cache import Manifest, RenderCache
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "project").mkdir()
+    return tmp_path / "project"
+
+
+def test_unchanged_file_is_not_rewritten(root):
+    m = Manifest(root)
+    assert m.write("src/A.java", "class A {}")
+    os.utime(root / "src/A.java", ns=(1, 1))
+    m.entries.clear()  # not in the manifest: the bytes are compared and the file adopted
+    assert not m.write("src/A.java", "class A {}")
+    assert (root / "src/A.java").stat().st_mtime_ns == 1
+    assert m.entries["src/A.java"]["mtime_ns"] == 1
+    m.save()
+    assert not Manifest(root).write("src/A.java", "class A {}")
+
+
+def test_changed_file_is_replaced(root):
+    m = Manifest(root)
+    m.write("a.ts", "one")
+    assert m.write("a.ts", "two")
+    assert (root / "a.ts").read_text() == "two"
+    assert not m.write("a.ts", "three", overwrite=False)
+    assert (root / "a.ts").read_text() == "two"
+    assert not list(root.glob(".*.tmp"))
+
+
+@pytest.mark.parametrize("rel", ["../outside.txt", "sub/../../outside.txt"])
+def test_escaping_paths_are_rejected(root, rel):
+    outside = root.parent / "outside.txt"
+    outside.write_text("same")  # identical bytes: must not be reported as "unchanged" or adopted
+    m = Manifest(root)
+    for call in (lambda: m.write(rel, "same"), lambda: m.write(rel, "same", overwrite=False),
+                 lambda: m.file_digest(rel), lambda: m.open(rel)):
+        with pytest.raises(ValueError, match="escapes the project root"):
+            call()
+    assert m.entries == {} and outside.read_text() == "same"
+
+
+def test_symlink_out_of_the_root_is_rejected(root):
+    (root.parent / "elsewhere").mkdir()
+    (root / "link").symlink_to(root.parent / "elsewhere")
+    with pytest.raises(ValueError):
+        Manifest(root).write("link/x.txt", "x")
+    assert not (root.parent / "elsewhere" / "x.txt").exists()
+
+
+def test_pending_write_commits_only_changes(root):
+    m = Manifest(root)
+    m.write("f.bin", "abc")
+    w = m.open("f.bin")
+    w.append(b"ab")
+    w.append(b"c")
+    assert not w.commit()
+    w = m.open("f.bin")
+    w.append(b"abd")
+    assert w.commit() and (root / "f.bin").read_bytes() == b"abd"
+    assert not list(root.glob(".*.tmp"))
+
+
+def test_render_cache_hits_and_evicts():
+    cache, calls = RenderCache(maxsize=1), []
+    render = lambda spec: calls.append(spec) or f"out{spec['n']}"
+    assert cache.render("k", {"n": 1}, render) == cache.render("k", {"n": 1}, render) == "out1"
+    cache.render("k", {"n": 2}, render)
+    cache.render("k", {"n": 1}, render)
+    assert len(calls) == 3 and cache.stats() == {"size": 1, "maxsize": 1, "hits": 1, "misses": 3}
@@ -0,0 +1,144 @@
+# tests/test_router.py
+# Router batch planning, rendered by the Selenium server in-process: every page of a batch gets its own page
+# object, so a target name shared by two pages resolves against each page. Tool errors from the servers surface as
+# ToolError, also where the router only tries a tool (a generator-only Playwright node); a /tools/batch request is
+# only resent when every call in it may be.
+import json, re
+import pytest, requests
+import router
+from client import ToolClient, ToolError
+from common import load_server
+from nodes import NodePool
+
+LOGIN, CHECKOUT = "https://shop.test/login", "https://shop.test/checkout"
+FOUND = {
+    LOGIN: {"submit": {"field": "submit", "locatorType": "css", "locatorValue": "#login-submit"}},
+    CHECKOUT: {"submit": {"field": "submit", "locatorType": "css", "locatorValue": "#pay-now"}},
+}
+ENTRIES = [{"scenario": "click submit", "appUrl": LOGIN},
+           {"name": "pay", "scenario": "click submit", "appUrl": CHECKOUT},
+           {"name": "pay-twice", "scenario": "click submit\nclick submit", "appUrl": CHECKOUT}]
+
+
+@pytest.fixture(scope="module")
+def sel():
+    return load_server("sel-testng-rest-py")
+
+
+@pytest.fixture
+def locators(monkeypatch):
+    monkeypatch.setattr(router, "resolve_locators", lambda pages: {url: FOUND[url] for url in pages})
+
+
+def render(sel, items) -> dict[str, str]:
+    """{class name: Java source} for generate_batch items."""
+    out = sel.generate_batch(sel.GenerateBatch(items=items))["results"]
+    assert not [r for r in out if "error" in r]
+    return {r["path"].rsplit("/", 1)[-1].removesuffix(".java"): r["content"] for r in out}
+
+
+@pytest.mark.parametrize("group", ["page", "scenario"])
+def test_each_page_class_uses_its_own_pom(sel, locators, group):
+    items = router.selenium_ui_items(ENTRIES, LOGIN, group)
+    sources = render(sel, items)
+    poms = {it["spec"]["url"]: it["spec"]["className"] for it in items if it["kind"] == "pom"}
+    assert len(poms) == 2 and len(set(poms.values())) == 2
+    assert '"#login-submit"' in sources[poms[LOGIN]] and '"#pay-now"' not in sources[poms[LOGIN]]
+    assert '"#pay-now"' in sources[poms[CHECKOUT]] and '"#login-submit"' not in sources[poms[CHECKOUT]]
+    assert LOGIN in sources[poms[LOGIN]] and CHECKOUT in sources[poms[CHECKOUT]]
+
+    tests = [it["spec"] for it in items if it["kind"] == "ui"]
+    assert len(tests) == (2 if group == "page" else 3)
+    for spec in tests:
+        src = sources[spec["className"]]
+        url = LOGIN if spec["pageObjectFqn"].endswith(poms[LOGIN]) else CHECKOUT
+        # the class constructs and imports its own page's POM, never the other page's
+        assert spec["pageObjectFqn"] == f"com.example.pages.{poms[url]}"
+        assert re.search(rf"\b{poms[url]}\b", src)
+        other = poms[CHECKOUT if url == LOGIN else LOGIN]
+        assert other not in src
+        assert "page.submit.click()" in src
+
+
+class FakeResponse:
+    def __init__(self, body, status_code: int = 200):
+        self.status_code, self.body = status_code, body
+
+    def json(self):
+        return self.body
+
+    def iter_lines(self):
+        return [json.dumps(self.body).encode("utf-8")]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} from the fake server")
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def fake_client(monkeypatch, answers: dict) -> ToolClient:
+    """A ToolClient whose POST /tool answers `answers[tool]`."""
+    c = ToolClient("http://node:1")
+    monkeypatch.setattr(c.session, "post", lambda url, json=None, **kw: FakeResponse(answers[json["tool"]]))
+    return c
+
+
+def test_error_only_results_raise(monkeypatch):
+    c = fake_client(monkeypatch, {"run_tests": {"error": "tool run_tests is disabled: generator-only"},
+                                  "git_push": {"pushed": False, "rejected": True, "error": "non-fast-forward"},
+                                  "generate_batch": {"error": "tool generate_batch does not stream"}})
+    with pytest.raises(ToolError, match="run_tests failed .*disabled"):
+        c.call("run_tests", {})
+    assert c.call("git_push", {})["rejected"]  # an error next to other fields is a result
+    with pytest.raises(ToolError):
+        list(c.stream("generate_batch", {}))
+
+
+@pytest.mark.parametrize("calls, attempts", [
+    ([("generate_pom_ui", {}), ("job_status", {"jobId": "j"})], 2),
+    ([("generate_pom_ui", {}), ("run_tests", {})], 1),  # a run may have been queued: never resent
+])
+def test_batch_is_resent_only_when_every_call_is_idempotent(monkeypatch, calls, attempts):
+    c, sent = ToolClient("http://node:1", backoff=0), []
+
+    def post(url, json=None, **kw):
+        sent.append(json)
+        results = {"results": [{"ok": True, "result": {}} for _ in json["calls"]]}
+        return FakeResponse(results, 503 if len(sent) == 1 else 200)
+    monkeypatch.setattr(c.session, "post", post)
+    if attempts == 1:
+        with pytest.raises(requests.HTTPError, match="503"):
+            c.batch(calls)
+    else:
+        assert c.batch(calls) == [{}, {}]
+    assert len(sent) == attempts
+
+
+def test_locators_skipped_on_generator_only_node(monkeypatch, capsys):
+    url = "http://pw-generator:1"
+    c = fake_client(monkeypatch, {"launch_browser": {"error": "tool launch_browser is disabled: generator-only"}})
+    monkeypatch.setitem(router._clients, url, c)
+    monkeypatch.setattr(router, "PW", NodePool("playwright", url, router.client))  # one node: never health-checked
+    assert router.resolve_locators({LOGIN: [[{"action": "click", "target": "submit"}]]}) == {}
+    assert "locator resolution skipped" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("target", ["class", "2fa code", "Sign in", "new"])
+def test_pom_fields_match_the_fields_tests_use(sel, monkeypatch, target):
+    monkeypatch.setattr(router, "resolve_locators", lambda pages: {LOGIN: {target: {
+        "field": target, "locatorType": "css", "locatorValue": "#x"}}})
+    items = router.selenium_ui_items([{"scenario": f"click {target}", "appUrl": LOGIN},
+                                      {"scenario": f"type abc into {target}", "appUrl": CHECKOUT}], LOGIN)
+    sources = render(sel, items)
+    declared = {name for src in sources.values() for name in re.findall(r"public WebElement (\w+);", src)}
+    used = {name for src in sources.values() for name in re.findall(r"\bpage\.(\w+)", src)}
+    assert len(used) == 1 and used <= declared
+    assert used == {e["name"] for it in items if it["kind"] == "pom" for e in it["spec"]["elements"]}
@@ -0,0 +1,120 @@
+# tests/test_run_cache.py
+# Fingerprints follow their inputs, reuse policies, and a TestNG run that skips Gradle for classes with a matching
+# green result (the sel server's run path, with proc.stream standing in for Gradle).
+import asyncio, pathlib
+import pytest
+from common import load_server
+from mcp_common import proc
+from mcp_common.run_cache import RunCache, plan, scan
+
+LOGIN = "src/test/java/com/example/LoginTest.java"
+CART = "src/test/java/com/example/CartTest.java"
+PAGE = "src/test/java/com/example/pages/LoginPage.java"
+UNITS = {"com.example.LoginTest": LOGIN, "com.example.CartTest": CART}
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    for rel, text in ((LOGIN, "class LoginTest { @Test void ok() {} }"),
+                      (CART, "class CartTest { @Test void ok() {} }"),
+                      (PAGE, "class LoginPage {}"), ("build.gradle", "plugins {}")):
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text(text)
+    return root
+
+
+def fingerprints(root, **context):
+    return plan(scan(root), UNITS, {"toolchain": "gradle-8", "app": None, **context})
+
+
+def test_fingerprint_follows_the_inputs(project):
+    before = fingerprints(project)
+    assert fingerprints(project) == before
+    (project / "build").mkdir()
+    (project / "build" / "out.class").write_bytes(b"\xca\xfe")  # build output is not an input
+    (project / ".LoginTest.java.1.tmp").write_text("half written")
+    assert fingerprints(project) == before
+
+    (project / LOGIN).write_text("class LoginTest { @Test void changed() {} }")
+    after = fingerprints(project)
+    assert after["com.example.LoginTest"] != before["com.example.LoginTest"]
+    assert after["com.example.CartTest"] == before["com.example.CartTest"]  # its own source did not change
+
+    (project / PAGE).write_text("class LoginPage { By email; }")  # shared inputs change every unit
+    shared = fingerprints(project)
+    assert all(shared[u] != after[u] for u in UNITS)
+    assert fingerprints(project, app="build-2") != shared
+    assert fingerprints(project, toolchain="gradle-9") != shared
+
+
+def entry(status="passed", first_try=True):
+    return [{"class": "C", "name": "ok", "status": status, "time": 0.1}], {"tests": 1}, status, first_try
+
+
+def test_reuse_policies(project):
+    cache = RunCache(project, "run_gradle_tests")
+    cache.record("green", "fp-green", *entry())
+    cache.record("red", "fp-red", *entry("failed", False))
+    cache.record("flaky", "fp-flaky", *entry("flaky", False))
+    cache.save()
+    fps = {"green": "fp-green", "red": "fp-red", "flaky": "fp-flaky", "new": "fp-new"}
+    cache = RunCache(project, "run_gradle_tests")
+    assert cache.reusable(fps, "never") == {}
+    assert sorted(cache.reusable(fps, "passed")) == ["flaky", "green"]  # failed units always run again
+    assert cache.reusable(fps, "stable") == {}
+    cache.record("green", "fp-green", *entry())
+    cache.save()
+    assert list(cache.reusable(fps, "stable")) == ["green"]  # two first-try passes in a row
+
+
+class Job:
+    def __init__(self):
+        self.lines = []
+
+    def log(self, stream, line):
+        self.lines.append((stream, line))
+
+
+@pytest.fixture
+def gradle(monkeypatch):
+    """proc.stream standing in for `gradle test`: writes one passing test per selected class; returns the filters
+    of every run."""
+    runs = []
+
+    async def stream(cmd, log, cwd=None, label=None, **kw):
+        filters = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "--tests"]
+        runs.append(filters)
+        results = pathlib.Path(cwd) / "build" / "test-results" / "test"
+        results.mkdir(parents=True, exist_ok=True)
+        for cls in filters or sorted(UNITS):
+            (results / f"TEST-{cls}.xml").write_text(
+                f'<testsuite name="{cls}" tests="1" failures="0" errors="0" skipped="0" time="0.5">'
+                f'<testcase classname="{cls}" name="ok" time="0.5"/></testsuite>')
+        return 0
+    monkeypatch.setattr(proc, "stream", stream)
+    return runs
+
+
+def test_cache_hit_skips_the_runner(project, gradle):
+    sel = load_server("sel-testng-rest-py")
+
+    def run():
+        i = sel.RunGradleTests(projectRoot=str(project), reuse="passed", appFingerprint="build-1")
+        return asyncio.run(sel._run_gradle(i, Job()))
+
+    first = run()
+    assert gradle == [[]] and first["summary"]["tests"] == 2 and first["cached"] == []
+    second = run()
+    assert gradle == [[]]  # nothing changed: Gradle is not started at all
+    assert second["cached"] == sorted(UNITS) and second["summary"]["tests"] == 2
+    assert all(t["cached"] for t in second["tests"])
+
+    inplace = asyncio.run(sel._run_gradle_in(sel.RunGradleTests(projectRoot=str(project), reuse="passed",
+                                                                appFingerprint="build-1"), str(project), Job()))
+    assert gradle == [[]] and inplace["cached"] == sorted(UNITS)  # MCP_RUN_WORKSPACE=inplace: same fingerprints
+
+    (project / CART).write_text("class CartTest { @Test void ok() { int changed; } }")
+    third = run()
+    assert gradle == [[], ["com.example.CartTest"]]  # only the changed class runs
+    assert third["cached"] == ["com.example.LoginTest"] and third["summary"]["tests"] == 2
@@ -0,0 +1,93 @@
+# tests/test_scenario_parser.py
+# The scenario grammar (router/scenario_parser.py), table-driven: every UI step form, API requests with their
+# continuation lines and quoted values, and the errors for malformed API lines.
+import pytest
+from scenario_parser import Grammar, ScenarioError, UI_GRAMMAR, parse_api, parse_ui
+
+
+@pytest.mark.parametrize("line, step", [
+    ("open https://shop.test/login", {"action": "open", "value": "https://shop.test/login"}),
+    ("open /login", {"action": "open", "value": "/login"}),
+    ("open the login page", {"action": "custom", "value": "open the login page"}),
+    ("type alice@example.com into email", {"action": "type", "target": "email", "value": "alice@example.com"}),
+    ("Type my secret  into   Password field", {"action": "type", "target": "Password field", "value": "my secret"}),
+    ("click Sign in", {"action": "click", "target": "Sign in"}),
+    ("assert text Welcome back on header", {"action": "assertText", "target": "header", "value": "Welcome back"}),
+    ("select Norway from country", {"action": "select", "target": "country", "value": "Norway"}),
+    ("select Large in size", {"action": "select", "target": "size", "value": "Large"}),
+    ("hover menu", {"action": "hover", "target": "menu"}),
+    ("hover over user menu", {"action": "hover", "target": "user menu"}),
+    ("wait 2", {"action": "wait", "value": "2000"}),
+    ("wait 1.5s", {"action": "wait", "value": "1500"}),
+    ("wait for 250 ms", {"action": "wait", "value": "250"}),
+    ("wait 3 seconds", {"action": "wait", "value": "3000"}),
+    ("wait for results", {"action": "waitFor", "target": "results"}),
+    ("scroll down", {"action": "custom", "value": "scroll down"}),
+])
+def test_ui_step(line, step):
+    assert parse_ui(line) == [step]
+
+
+def test_ui_lines_are_stripped_and_blank_lines_skipped():
+    assert parse_ui(["  click a  ", "", "   ", "click b\n"]) == [{"action": "click", "target": "a"},
+                                                               {"action": "click", "target": "b"}]
+
+
+def test_added_verb_takes_priority():
+    grammar = Grammar([("click", r"click\s+(?P<target>.+)")])
+    grammar.add("doubleClick", r"click\s+(?P<target>.+?)\s+twice", first=True)
+    assert grammar.match("click ok twice") == ("doubleClick", {"target": "ok"})
+    assert grammar.match("click ok") == ("click", {"target": "ok"})
+    assert UI_GRAMMAR.match("nothing like it") is None
+
+
+def request(method, path, status=200, headers=None, query=None, body=None, json_paths=None):
+    return {"name": f"{method} {path}", "method": method, "path": path, "headers": headers or {},
+            "query": query or {}, "body": body, "expect": {"status": status, "jsonPaths": json_paths or {}}}
+
+
+@pytest.mark.parametrize("text, requests", [
+    ("GET /health", [request("GET", "/health")]),
+    ("get /health expect 204", [request("GET", "/health", 204)]),
+    ("DELETE", [request("DELETE", "/")]),
+    ("POST /login expect 200 expect 401", [request("POST", "/login", 401)]),
+    ("GET /a\nPOST /b expect 201", [request("GET", "/a"), request("POST", "/b", 201)]),
+    # continuation lines extend the request above them
+    ("GET /items\n  header Accept: application/json\nheader X-Id=7",
+     [request("GET", "/items", headers={"Accept": "application/json", "X-Id": "7"})]),
+    ("GET /search\nquery q = 'blue shoes'\nquery page=2",
+     [request("GET", "/search", query={"q": "blue shoes", "page": "2"})]),
+    ('POST /users\nbody {"name": "ann"}\nexpect 201',
+     [request("POST", "/users", 201, body='{"name": "ann"}')]),
+    ('GET /users/1\nexpect status 200\nexpect $.name == "ann"\nexpect $.id equals 1',
+     [request("GET", "/users/1", json_paths={"$.name": "ann", "$.id": "1"})]),
+    ('GET /a\nheader Auth: "Bearer x"\n\nGET /b\nheader Auth: \'y\'',
+     [request("GET", "/a", headers={"Auth": "Bearer x"}), request("GET", "/b", headers={"Auth": "y"})]),
+    ('GET /a\nheader Q: "unbalanced', [request("GET", "/a", headers={"Q": '"unbalanced'})]),
+])
+def test_api_requests(text, requests):
+    assert parse_api(text) == requests
+
+
+@pytest.mark.parametrize("text, line, message", [
+    ("header Accept: json\nGET /a", 1, "'header Accept: json' has no request above it to extend"),
+    ("\n\nexpect 200", 3, "'expect 200' has no request above it to extend"),
+    ("GET /a\nheader Accept", 2, "malformed header line 'header Accept'; expected 'header <Name>: <value>'"),
+    ("GET /a\nquery page", 2, "malformed query line 'query page'; expected 'query <key>=<value>'"),
+    ("GET /a\nbody", 2, "malformed body line 'body'; expected 'body <json>'"),
+    ("GET /a\nexpect ok", 2,
+     "malformed expect line 'expect ok'; expected 'expect <status>' or 'expect $.path == <value>'"),
+    ("GET /a\nfetch /b", 2, "'fetch /b' is not a request: expected <METHOD> <path> with METHOD one of DELETE, GET, "
+                            "HEAD, OPTIONS, PATCH, POST, PUT"),
+    ("Check that the homepage loads", 1, "'Check that the homepage loads' is not a request"),
+])
+def test_api_errors(text, line, message):
+    with pytest.raises(ScenarioError) as e:
+        parse_api(text)
+    assert e.value.line == line
+    assert str(e.value).startswith(f"line {line}: {message}")
+
+
+def test_api_parses_lazily_from_lines():
+    lines = iter(["GET /a", "expect 201", "GET /b"])
+    assert [r["path"] for r in parse_api(lines)] == ["/a", "/b"]
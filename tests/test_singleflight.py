@@ -0,0 +1,92 @@
+# tests/test_singleflight.py
+# Identical concurrent calls run once; errors reach every waiter and are never reused; TTL reuse of successes.
+import asyncio
+import pytest
+from mcp_common import singleflight
+from mcp_common.singleflight import Flights, key
+
+
+def counted(result=None, error: Exception | None = None, delay: float = 0.02):
+    """A coroutine function plus the list of its executions."""
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+    return fn, calls
+
+
+def test_concurrent_identical_calls_run_once():
+    async def main():
+        flights, (fn, calls) = Flights(), counted({"ok": True})
+        results = await asyncio.gather(*(flights.do("sf_once", "k", fn) for _ in range(5)))
+        assert results == [{"ok": True}] * 5 and len(calls) == 1
+        assert singleflight.stats()["sf_once"] == {"ran": 1, "joined": 4, "reused": 0}
+        await flights.do("sf_once", "k", fn)  # no TTL: a later call runs again
+        assert len(calls) == 2
+    asyncio.run(main())
+
+
+def test_different_keys_do_not_coalesce():
+    async def main():
+        flights, (fn, calls) = Flights(), counted(1)
+        await asyncio.gather(flights.do("sf_keys", "a", fn), flights.do("sf_keys", "b", fn))
+        assert len(calls) == 2
+    asyncio.run(main())
+
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    async def main():
+        flights, (fn, calls) = Flights(), counted(error=RuntimeError("boom"))
+        results = await asyncio.gather(*(flights.do("sf_error", "k", fn, ttl=60) for _ in range(3)),
+                                       return_exceptions=True)
+        assert len(calls) == 1
+        assert all(isinstance(r, RuntimeError) and str(r) == "boom" for r in results)
+        with pytest.raises(RuntimeError):
+            await flights.do("sf_error", "k", fn, ttl=60)  # ran again, not served from a cached failure
+        assert len(calls) == 2 and not flights._recent and not flights._running
+    asyncio.run(main())
+
+
+def test_error_results_are_not_reused():
+    async def main():
+        flights, (fn, calls) = Flights(), counted({"error": "node busy"})
+        await flights.do("sf_error_result", "k", fn, ttl=60)
+        await flights.do("sf_error_result", "k", fn, ttl=60)
+        assert len(calls) == 2
+    asyncio.run(main())
+
+
+def test_success_is_reused_for_the_ttl(monkeypatch):
+    async def main():
+        flights, (fn, calls) = Flights(), counted("done", delay=0)
+        now = [1000.0]
+        monkeypatch.setattr(singleflight.time, "monotonic", lambda: now[0])
+        assert await flights.do("sf_ttl", "k", fn, ttl=2) == "done"
+        assert await flights.do("sf_ttl", "k", fn, ttl=2) == "done" and len(calls) == 1
+        now[0] += 3
+        await flights.do("sf_ttl", "k", fn, ttl=2)
+        assert len(calls) == 2
+        assert singleflight.stats()["sf_ttl"] == {"ran": 2, "joined": 0, "reused": 1}
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def main():
+        flights, (fn, calls) = Flights(), counted("shared", delay=0.05)
+        first = asyncio.create_task(flights.do("sf_cancel", "k", fn))
+        second = asyncio.create_task(flights.do("sf_cancel", "k", fn))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "shared" and len(calls) == 1
+    asyncio.run(main())
+
+
+def test_key_ignores_spelling_and_excluded_fields():
+    assert key("run_tests", {"b": 1, "a": 2}) == key("run_tests", {"a": 2, "b": 1})
+    assert key("run_tests", {"a": 1, "wait": True}, exclude=("wait",)) == key("run_tests", {"a": 1})
+    assert key("run_tests", {"a": 1}, generation=1) != key("run_tests", {"a": 1}, generation=2)
+    assert key("run_tests", {"a": 1}) != key("run_tests", {"a": 2}) != key("install", {"a": 2})
@@ -0,0 +1,19 @@
+# tests/test_startup.py
+# Cold start of the servers: each is imported in a fresh interpreter (bench/startup.py's probe), with and without
+# MCP_GENERATOR_ONLY, and must stay within its import budget without loading GitPython or Playwright.
+import pytest
+import startup
+
+DEFERRED = ("git", "playwright")
+SERVER_CASES = {name: case for name, case in startup.CASES.items() if name.split(".")[0] in ("sel", "pw")}
+
+
+@pytest.mark.parametrize("name", sorted(SERVER_CASES))
+def test_server_import(name):
+    cwd, module, env, _, budget_ms = SERVER_CASES[name]
+    # best of three, so one slow interpreter start on a busy machine does not fail the budget
+    runs = [startup.probe(cwd, module, env, DEFERRED) for _ in range(3)]
+    assert not {m for r in runs for m in r[2]}, f"{name} imported a deferred module at startup"
+    fastest = min(r[0] for r in runs) * 1000
+    assert fastest <= budget_ms, f"{name} imported in {fastest:.0f} ms, budget {budget_ms} ms"
+
@@ -0,0 +1,157 @@
+# tests/test_templating.py
+# mcp_common.templating: compiled templates, Java / TS string escaping (checked by decoding the literal the way
+# javac / a JS engine would), and golden renders of a Playwright spec, a page object and a TestNG test.
+import pathlib, re
+import pytest
+from common import load_server
+from mcp_common.templating import (CompiledTemplate, TemplateError, TemplateSet, java_identifier, java_string,
+                                   line_comment, ts_string, wait_ms)
+
+GOLDEN = pathlib.Path(__file__).parent / "golden"
+TRICKY = ['say "hi"', "it's", "back\\slash", "tick `x`", "${user}", "$${x}", "a\nb\r\nc", "tab\tend", "\b\f\v",
+          "nul\x00bell\x07", "\u2028sep\u2029", "ünïcödé ☃", "\\u000a", "*/ // <!--"]
+
+
+def decode_java(s: str) -> str:
+    """Contents of a Java "..." literal as javac reads them."""
+    simple = {"n": "\n", "r": "\r", "t": "\t", "b": "\b", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+    return re.sub(r"\\([0-7]{1,3}|.)", lambda m: simple.get(m[1]) or chr(int(m[1], 8)), s, flags=re.S)
+
+
+def decode_js(s: str) -> str:
+    """Contents of a JS '...', "..." or `...` literal; a backslash before any other character drops out."""
+    simple = {"n": "\n", "r": "\r", "t": "\t", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+    return re.sub(r"\\(u[0-9a-fA-F]{4}|.)", lambda m: chr(int(m[1][1:], 16)) if len(m[1]) == 5
+                  else simple.get(m[1], m[1]), s, flags=re.S)
+
+
+@pytest.mark.parametrize("value", TRICKY)
+def test_java_string_round_trips(value):
+    out = java_string(value)
+    assert decode_java(out) == value
+    bare = out.replace("\\\\", "")
+    assert not re.search(r'(?<!\\)"|[\r\n]', bare)
+    assert "\\u" not in bare  # javac would decode \uXXXX before lexing
+
+
+@pytest.mark.parametrize("value", TRICKY)
+def test_ts_string_round_trips(value):
+    out = ts_string(value)
+    assert decode_js(out) == value
+    bare = out.replace("\\\\", "")
+    assert not re.search(r"(?<!\\)[\"'`]|(?<!\\)\$\{|[\r\n\u2028\u2029]", bare)
+
+
+@pytest.mark.parametrize("value, out", [
+    ('say "hi"', 'say \\"hi\\"'), ("a\\b", "a\\\\b"), ("a\nb", "a\\nb"), ("\x01", "\\001"), ("${x}", "${x}"),
+])
+def test_java_string(value, out):
+    assert java_string(value) == out
+
+
+@pytest.mark.parametrize("value, out", [
+    ("it's", "it\\'s"), ("`x`", "\\`x\\`"), ("${x}", "\\${x}"), ("$x {y}", "$x {y}"), ("\x01", "\\u0001"),
+    ("\u2028", "\\u2028"),
+])
+def test_ts_string(value, out):
+    assert ts_string(value) == out
+
+
+def test_line_comment_has_no_line_breaks():
+    assert line_comment("a\nb\r\nc d") == "a b c d"
+
+
+@pytest.mark.parametrize("value, ms", [(250, 250), ("250", 250), (" 40 ", 40), ("2s", None), (-1, None),
+                                       (True, None), (None, None), ("1.5", None)])
+def test_wait_ms(value, ms):
+    assert wait_ms(value) == ms
+
+
+@pytest.mark.parametrize("name, ident", [("Sign in", "signIn"), ("signIn", "signIn"), ("2fa code", "e2faCode"),
+                                         ("class", "classElement"), ("new", "newElement"), ("", "element"),
+                                         ("user_name", "userName"), ("--", "element")])
+def test_java_identifier(name, ident):
+    assert java_identifier(name) == ident
+    assert java_identifier(ident) == ident  # POM fields and the steps using them agree
+
+
+def test_compiled_template_fields_and_literals():
+    t = CompiledTemplate("t", "class ${name} { String s = \"$$${value}\"; } // $name")
+    assert t.fields == ("name", "value")
+    assert t.render({"name": "A", "value": "{x}", "extra": 1}) == 'class A { String s = "${x}"; } // A'
+    assert t.bind("value", "name")("v", "B") == 'class B { String s = "$v"; } // B'
+
+
+@pytest.mark.parametrize("source, message", [("a $ b", "stray '\\$'"), ("${class}", "reserved"),
+                                             ("${_}", "reserved")])
+def test_compiled_template_rejects(source, message):
+    with pytest.raises(TemplateError, match=message):
+        CompiledTemplate("t", source)
+
+
+def test_render_and_bind_report_missing_fields():
+    t = CompiledTemplate("t", "${a}${b}")
+    with pytest.raises(TemplateError, match="'t'"):
+        t.render({"a": 1})
+    with pytest.raises(TemplateError, match="unknown fields \\['b'\\]"):
+        t.bind("a")
+
+
+def test_overrides(tmp_path):
+    (tmp_path / "step.click.tmpl").write_text("click(${target})\n")
+    (tmp_path / "step.drag.tmpl").write_text("drag(${target}, ${value})\n")
+    ts = TemplateSet({"step.click": "c(${target})", "file": "${body}\n"}, str(tmp_path),
+                     vocabulary={"step.": ("target", "value")})
+    assert ts.render("step.click", target="x") == "click(x)"  # one-line fragment: the editor's newline is dropped
+    assert set(ts.group("step.")) == {"click", "drag"} and sorted(ts.overridden) == ["step.click", "step.drag"]
+    (tmp_path / "file.tmpl").write_text("${body} ${other}\n")
+    with pytest.raises(TemplateError, match="unknown fields \\['other'\\]"):
+        TemplateSet({"file": "${body}\n"}, str(tmp_path), vocabulary={"step.": ("target", "value")})
+    with pytest.raises(TemplateError, match="does not exist"):
+        TemplateSet({}, str(tmp_path / "missing"))
+
+
+# steps with every escaping hazard; "2s" and "scroll" render as unsupported
+STEPS = [{"action": "open", "value": "https://shop.test/login?next=${home}"},
+         {"action": "type", "target": "email", "value": 'a"b\\c'},
+         {"action": "type", "target": "note", "value": "line1\nline2 `tick` 'q'", "selector": "textarea[name='note']"},
+         {"action": "click", "target": "Sign in", "selector": "text=Sign in"},
+         {"action": "wait", "value": "250"},
+         {"action": "wait", "value": "2s"},
+         {"action": "assertText", "target": "banner", "value": "Welcome, ${user}!"},
+         {"action": "scroll", "value": "down\n// */"}]
+
+
+@pytest.fixture(scope="module")
+def pw():
+    return load_server("pw-mcp-py")
+
+
+@pytest.fixture(scope="module")
+def sel():
+    return load_server("sel-testng-rest-py")
+
+
+def golden(name: str) -> str:
+    return (GOLDEN / name).read_text(encoding="utf-8")
+
+
+def test_golden_playwright_spec(pw):
+    assert pw._render_spec('Log in with "quotes" and `ticks`\nsecond line', STEPS) == golden("login.spec.ts")
+
+
+def test_golden_page_object(sel):
+    pom = sel.GeneratePOM(packageName="com.example.pages", className="LoginPage", url='https://shop.test/login?q="x"',
+                          elements=[{"name": "email", "locatorType": "id", "locatorValue": "email"},
+                                    {"name": "Sign in", "locatorType": "xpath",
+                                     "locatorValue": '//button[text()="Sign in"]'},
+                                    {"name": "class", "locatorType": "css", "locatorValue": "input.class\\:x"},
+                                    {"name": "signIn", "locatorType": "css", "locatorValue": "dup"}])
+    assert sel._render_pom(pom) == golden("LoginPage.java")
+
+
+def test_golden_testng_ui_test(sel):
+    test = sel.GenerateUiTest(packageName="com.example.tests", className="LoginTest",
+                              imports=["com.example.pages.LoginPage"], pageObjectFqn="com.example.pages.LoginPage",
+                              steps=[{k: v for k, v in s.items() if k != "selector"} for s in STEPS])
+    assert sel._render_ui_test(test) == golden("LoginTest.java")
@@ -0,0 +1,68 @@
+# tests/test_uploads.py
+# Streamed uploads (mcp_common.uploads): complete files land, and an upload that breaks off, whether truncated or
+# on a malformed line, leaves no temp files in the project.
+import asyncio, json
+import pytest
+from mcp_common.render_cache import Manifest
+from mcp_common.uploads import ndjson, write_stream
+
+
+async def body(*lines, tail: bytes = b""):
+    for line in lines:
+        yield (json.dumps(line) + "\n").encode("utf-8")
+        await asyncio.sleep(0)
+    if tail:
+        yield tail
+
+
+async def upload(root, chunks):
+    out = []
+    async for res in write_stream(Manifest(root), ndjson(chunks), concurrency=2):
+        out.append(res)
+    return out
+
+
+def leftovers(root) -> list[str]:
+    return sorted(p.name for p in root.rglob("*.tmp"))
+
+
+def test_chunked_files_land(tmp_path):
+    out = asyncio.run(upload(tmp_path, body(
+        {"path": "src/A.java", "content": "class ", "more": True},
+        {"path": "src/B.java", "content": "class B {}"},
+        {"path": "src/A.java", "content": "A {}"})))
+    assert sorted(r["path"] for r in out) == ["src/A.java", "src/B.java"] and all(r["written"] for r in out)
+    assert (tmp_path / "src/A.java").read_text() == "class A {}"
+    assert leftovers(tmp_path) == []
+
+
+def test_truncated_upload_reports_and_cleans_up(tmp_path):
+    out = asyncio.run(upload(tmp_path, body({"path": "src/A.java", "content": "class ", "more": True})))
+    assert out == [{"path": "src/A.java", "error": "upload ended before the file's last chunk"}]
+    assert not (tmp_path / "src/A.java").exists()
+    assert leftovers(tmp_path) == []
+
+
+@pytest.mark.parametrize("tail", [b"{not json\n", b'{"path": "src/C.java", "content": "class C'])
+def test_malformed_line_cleans_up(tmp_path, tail):
+    with pytest.raises(ValueError):
+        asyncio.run(upload(tmp_path, body(
+            {"path": "src/A.java", "content": "class A", "more": True},
+            {"path": "src/B.java", "content": "class B {}"}, tail=tail)))
+    assert (tmp_path / "src/B.java").read_text() == "class B {}"  # completed files stay written
+    assert not (tmp_path / "src/A.java").exists()
+    assert leftovers(tmp_path) == []
+
+
+def test_consumer_stopping_early_cleans_up(tmp_path):
+    async def main():
+        stream = write_stream(Manifest(tmp_path), ndjson(body(
+            {"path": "src/B.java", "content": "class B {}"},
+            {"path": "src/A.java", "content": "class A", "more": True},
+            {"path": "src/D.java", "content": "class D {}"})), concurrency=1)
+        first = await anext(stream)
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(main())["path"] == "src/B.java"
+    assert leftovers(tmp_path) == []
@@ -0,0 +1,138 @@
+# tests/test_workspace.py
+# Project locks (shared runs side by side, writers alone and in arrival order) and scratch workspace syncing.
+import asyncio, os
+import pytest
+from mcp_common.render_cache import Manifest
+from mcp_common.workspace import RWLock, Workspaces, sync
+
+
+def snapshot(root) -> dict:
+    """relpath -> (inode, size, mtime, bytes) of every file under root."""
+    out = {}
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            fp = os.path.join(dirpath, name)
+            st = os.lstat(fp)
+            out[os.path.relpath(fp, root)] = (st.st_ino, st.st_size, st.st_mtime_ns, open(fp, "rb").read())
+    return out
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    (root / "src" / "pages").mkdir(parents=True)
+    (root / "src" / "pages" / "LoginPage.java").write_text("class LoginPage {}")
+    (root / "src" / "LoginTest.java").write_text("class LoginTest {}")
+    (root / "build.gradle").write_text("plugins {}")
+    (root / "build").mkdir()
+    (root / "build" / "old.class").write_bytes(b"\xca\xfe")
+    return root
+
+
+def test_readers_share_the_lock():
+    async def main():
+        ws, inside = Workspaces(), []
+        both = asyncio.Event()
+
+        async def reader(n):
+            async with ws.locked("/p", exclusive=False):
+                inside.append(n)
+                if len(inside) == 2:
+                    both.set()
+                await asyncio.wait_for(both.wait(), 1)  # times out unless the other reader got in as well
+
+        await asyncio.gather(reader(1), reader(2))
+        assert ws.generation("/p") == 0  # shared holds are not writes
+    asyncio.run(main())
+
+
+def test_writer_excludes_readers_in_arrival_order():
+    async def main():
+        ws, events = Workspaces(), []
+        release = asyncio.Event()
+
+        async def hold(name, exclusive, wait=None):
+            async with ws.locked("/p", exclusive=exclusive):
+                events.append(f"{name} in")
+                if wait:
+                    await wait.wait()
+                events.append(f"{name} out")
+
+        first = asyncio.create_task(hold("r1", False, release))
+        await asyncio.sleep(0)
+        writer = asyncio.create_task(hold("w", True))
+        await asyncio.sleep(0)
+        late = asyncio.create_task(hold("r2", False))  # queued behind the writer, not let in beside r1
+        await asyncio.sleep(0.01)
+        assert events == ["r1 in"] and ws.lock("/p").waiting == 2
+        release.set()
+        await asyncio.gather(first, writer, late)
+        assert events == ["r1 in", "r1 out", "w in", "w out", "r2 in", "r2 out"]
+        assert ws.generation("/p") == 1
+    asyncio.run(main())
+
+
+def test_cancelled_writer_lets_readers_through():
+    async def main():
+        lock = RWLock()
+        await lock.acquire(False)
+        writer = asyncio.create_task(lock.acquire(True))
+        reader = asyncio.create_task(lock.acquire(False))
+        await asyncio.sleep(0)
+        writer.cancel()
+        await asyncio.wait_for(reader, 1)
+        assert lock.readers == 2 and not lock.writer and lock.waiting == 0
+    asyncio.run(main())
+
+
+def test_sync_mirrors_the_root_with_hard_links(project, tmp_path):
+    dest = tmp_path / "ws"
+    counts = sync(project, dest)
+    assert counts == {"linked": 3, "copied": 0, "removed": 0, "kept": 0}
+    for rel in ("src/pages/LoginPage.java", "src/LoginTest.java", "build.gradle"):
+        assert os.stat(project / rel).st_ino == os.stat(dest / rel).st_ino
+    assert not (dest / "build").exists()  # OUTPUTS are never mirrored
+    assert sync(project, dest) == {"linked": 0, "copied": 0, "removed": 0, "kept": 3}
+
+
+def test_sync_removes_deleted_files_without_touching_the_root(project, tmp_path):
+    dest = tmp_path / "ws"
+    sync(project, dest)
+    (dest / "build").mkdir()
+    (dest / "build" / "LoginTest.class").write_bytes(b"\xca\xfe")  # a run's own output, kept between syncs
+    (project / "src" / "LoginTest.java").unlink()
+    os.rename(project / "src" / "pages", project / "src" / "screens")
+    (project / "src" / "screens" / ".LoginPage.java.1234.tmp").write_text("half written")
+    before = snapshot(project)
+
+    counts = sync(project, dest)
+    assert snapshot(project) == before
+    assert counts == {"linked": 1, "copied": 0, "removed": 2, "kept": 1}  # src/pages and src/LoginTest.java
+    assert sorted(snapshot(dest)) == ["build.gradle", "build/LoginTest.class", "src/screens/LoginPage.java"]
+
+
+def test_rewrites_in_the_root_do_not_reach_a_synced_workspace(project, tmp_path):
+    dest = tmp_path / "ws"
+    sync(project, dest)
+    Manifest(project).write("src/LoginTest.java", "class LoginTest { int changed; }")  # temp file + rename
+    assert (dest / "src" / "LoginTest.java").read_text() == "class LoginTest {}"
+    assert sync(project, dest)["linked"] == 1
+    assert (dest / "src" / "LoginTest.java").read_text() == "class LoginTest { int changed; }"
+
+
+def test_concurrent_runs_get_their_own_workspaces(project, tmp_path):
+    async def main():
+        ws, paths = Workspaces(scratch_dir=str(tmp_path / "scratch")), []
+        both = asyncio.Event()
+
+        async def run():
+            async with ws.for_run(str(project), lambda *a: None) as path:
+                paths.append(path)
+                if len(paths) == 2:
+                    both.set()
+                await asyncio.wait_for(both.wait(), 5)
+
+        await asyncio.gather(run(), run())
+        assert len(set(paths)) == 2 and all(os.path.isfile(os.path.join(p, "build.gradle")) for p in paths)
+        assert ws._busy[os.path.realpath(project)] == set()
+    asyncio.run(main())